@@ -1,586 +1,1126 @@
-import os
-from dotenv import load_dotenv
-from flask import Flask, render_template, request, redirect, url_for, session, flash
-from flask_mysqldb import MySQL
-from flask_session import Session
-from datetime import date 
-
-# --- Load environment variables from .env file ---
-load_dotenv() 
-
-app = Flask(__name__)
-
-# --- Database Configuration ---
-# Reads from your .env file
-app.config['MYSQL_HOST'] = os.environ.get('DB_HOST')
-app.config['MYSQL_USER'] = os.environ.get('DB_USER')
-app.config['MYSQL_PASSWORD'] = os.environ.get('DB_PASS') 
-app.config['MYSQL_DB'] = os.environ.get('DB_NAME')
-app.config['MYSQL_CURSORCLASS'] = 'DictCursor'
-
-# --- Session Configuration ---
-app.config['SECRET_KEY'] = os.environ.get('FLASK_SECRET_KEY') 
-app.config['SESSION_TYPE'] = 'filesystem'
-Session(app)
-
-mysql = MySQL(app)
-
-# --- Routes ---
-
-@app.route('/')
-def home():
-    """Renders the login page or redirects to the dashboard if already logged in."""
-    if 'loggedin' in session:
-        return redirect(url_for('dashboard')) 
-    return render_template('login.html')
-
-@app.route('/login', methods=['GET', 'POST'])
-def login():
-    """Handles the user login form submission."""
-    error = None
-    if request.method == 'POST':
-        username = request.form['username']
-        password = request.form['password']
-        cursor = mysql.connection.cursor()
-        try:
-            # Check the Employee table for a matching user/password
-            cursor.execute(
-                'SELECT * FROM Employee WHERE username = %s AND password = %s', 
-                (username, password)
-            )
-            account = cursor.fetchone()
-            if account:
-                # Create a session for the logged-in user
-                session['loggedin'] = True
-                session['id'] = account['employee_id']
-                session['username'] = account['username']
-                session['role'] = account['role'] # This is key for varied privileges
-                return redirect(url_for('dashboard'))
-            else:
-                error = 'Incorrect username or password!'
-        except Exception as e:
-            error = f"An error occurred: {str(e)}"
-        finally:
-            cursor.close() # Ensure cursor is closed
-            
-    return render_template('login.html', error=error)
-
-@app.route('/dashboard')
-def dashboard():
-    """Displays the dashboard appropriate for the user's role."""
-    if 'loggedin' not in session:
-        return redirect(url_for('login'))
-        
-    cursor = mysql.connection.cursor()
-    try:
-        if session['role'] == 'Manager':
-            # --- "Procedures/Functions (With GUI)" ---
-            cursor.execute("SELECT fn_GetTotalAnimalCount() AS animal_count")
-            count_result = cursor.fetchone()
-            cursor.execute("SELECT fn_GetTotalCapacity() AS total_capacity")
-            capacity_result = cursor.fetchone()
-            
-            # --- "1 Aggregate Query (With GUI)" ---
-            cursor.execute("""
-                SELECT 
-                    date, 
-                    AVG(price) AS average_price,
-                    COUNT(ticket_id) AS tickets_sold
-                FROM Ticket
-                GROUP BY date
-                ORDER BY date DESC
-            """)
-            ticket_report = cursor.fetchall()
-            return render_template(
-                'manager_dashboard.html', 
-                animal_count=count_result['animal_count'],
-                total_capacity=capacity_result['total_capacity'],
-                ticket_report=ticket_report
-            )
-        elif session['role'] == 'Zookeeper':
-            return render_template('zookeeper_dashboard.html')
-        else:
-            # Fallback for other roles
-            return render_template('layout.html')
-    except Exception as e:
-        flash(f"Error loading dashboard: {str(e)}", "danger")
-        return render_template('layout.html')
-    finally:
-        cursor.close()
-
-@app.route('/logout')
-def logout():
-    """Logs the user out by clearing the session."""
-    session.pop('loggedin', None)
-    session.pop('id', None)
-    session.pop('username', None)
-    session.pop('role', None)
-    return redirect(url_for('home'))
-
-# --- ANIMAL MANAGEMENT ROUTES ---
-
-@app.route('/animals')
-def animals():
-    """
-    Displays the list of all animals.
-    Hits "Read operations (With GUI)" and "1 Join Query (With GUI)".
-    """
-    if 'loggedin' not in session:
-        return redirect(url_for('login'))
-    if session['role'] not in ['Manager', 'Zookeeper']:
-        flash('You do not have permission to access this page.', 'danger')
-        return redirect(url_for('dashboard'))
-
-    cursor = mysql.connection.cursor()
-    try:
-        # --- "1 Join Query (With GUI)" ---
-        cursor.execute("""
-            SELECT 
-                A.animal_id,
-                A.name AS animal_name,
-                A.species,
-                A.gender,
-                A.age,
-                H.name AS habitat_name,
-                H.type AS habitat_type
-            FROM Animal A
-            JOIN Habitat H ON A.habitat_id = H.habitat_id
-            ORDER BY A.name
-        """)
-        animals = cursor.fetchall()
-    except Exception as e:
-        flash(f"Error fetching animals: {str(e)}", "danger")
-        animals = []
-    finally:
-        cursor.close()
-        
-    # --- "Read operations (With GUI)" ---
-    return render_template('animals.html', animals=animals)
-
-@app.route('/add_animal', methods=['GET', 'POST'])
-def add_animal():
-    """
-    Handles adding a new animal (GET for form, POST for submission).
-    Hits "Create operations (With GUI)" and "Procedures/Functions (With GUI)".
-    """
-    if 'loggedin' not in session:
-        return redirect(url_for('login'))
-    if session['role'] not in ['Manager', 'Zookeeper']:
-        flash('You do not have permission to access this page.', 'danger')
-        return redirect(url_for('dashboard'))
-
-    if request.method == 'POST':
-        # --- "Create operations (With GUI)" ---
-        p_animal_id = request.form.get('animal_id')
-        p_name = request.form.get('name')
-        p_species = request.form.get('species')
-        p_gender = request.form.get('gender')
-        p_age = request.form.get('age')
-        p_habitat_id = request.form.get('habitat_id')
-
-        # Server-side validation
-        error = None
-        try:
-            if not p_name or not p_species or not p_animal_id or not p_age or not p_habitat_id:
-                error = 'Error: All fields are required.'
-            elif int(p_age) < 0:
-                error = 'Error: Age must be a positive number.'
-            elif int(p_animal_id) <= 0:
-                error = 'Error: Animal ID must be a positive number.'
-        except (ValueError, TypeError):
-            error = 'Error: Age and Animal ID must be valid numbers.'
-
-        if error:
-            flash(error, 'danger')
-        else:
-            # Validation passed, call the stored procedure
-            cursor = mysql.connection.cursor()
-            try:
-                # --- "Procedures/Functions (With GUI)" ---
-                cursor.execute("CALL sp_AddNewAnimal(%s, %s, %s, %s, %s, %s)",
-                               (p_animal_id, p_name, p_species, p_gender, p_age, p_habitat_id))
-                result = cursor.fetchall()
-                # Exhaust the cursor to prevent "commands out of sync"
-                while cursor.nextset(): pass 
-                mysql.connection.commit() 
-                
-                # Show the message from the procedure (e.g., "Habitat full")
-                if 'Error' in result[0]['message']:
-                    flash(result[0]['message'], 'danger')
-                else:
-                    flash(result[0]['message'], 'success')
-                    return redirect(url_for('animals'))
-            except Exception as e:
-                mysql.connection.rollback() 
-                flash(f'Database Error: {str(e)}', 'danger')
-            finally:
-                cursor.close() 
-    
-    # GET request: Show the form, populating the habitat dropdown
-    cursor = mysql.connection.cursor()
-    try:
-        cursor.execute("SELECT habitat_id, name, type FROM Habitat")
-        habitats = cursor.fetchall()
-    except Exception as e:
-        flash(f"Error fetching habitats: {str(e)}", "danger")
-        habitats = []
-    finally:
-        cursor.close()
-    
-    return render_template('add_animal.html', habitats=habitats)
-
-@app.route('/delete_animal', methods=['POST'])
-def delete_animal():
-    """
-    Handles deleting an animal.
-    Hits "Delete operations (With GUI)".
-    """
-    if 'loggedin' not in session:
-        return redirect(url_for('login'))
-    # Both Managers and Zookeepers can delete animals
-    if session['role'] not in ['Manager', 'Zookeeper']:
-        flash('You do not have permission to perform this action.', 'danger')
-        return redirect(url_for('dashboard'))
-
-    # --- "Delete operations (With GUI)" ---
-    animal_id = request.form['animal_id']
-    cursor = mysql.connection.cursor()
-    
-    try:
-        cursor.execute("DELETE FROM Animal WHERE animal_id = %s", [animal_id])
-        mysql.connection.commit()
-        flash('Animal deleted successfully.', 'success')
-        
-    except Exception as e:
-        mysql.connection.rollback()
-        # Check for foreign key constraint errors (e.g., if animal is in 'Visits' table)
-        if "1451" in str(e) or "foreign key constraint" in str(e).lower():
-            flash('Error: Cannot delete animal. It is referenced by other records (e.g., visits).', 'danger')
-        else:
-            flash(f'Database Error: {str(e)}', 'danger')
-    finally:
-        cursor.close()
-
-    return redirect(url_for('animals'))
-
-# --- HABITAT MANAGEMENT ROUTES ---
-
-@app.route('/habitats')
-def habitats():
-    """Displays the list of habitats and their current occupancy."""
-    if 'loggedin' not in session:
-        return redirect(url_for('login'))
-    if session['role'] != 'Manager':
-        flash('You do not have permission to access this page.', 'danger')
-        return redirect(url_for('dashboard'))
-
-    cursor = mysql.connection.cursor()
-    try:
-        # A subquery to count animals in each habitat
-        cursor.execute("""
-            SELECT 
-                H.habitat_id, H.name, H.type, H.capacity,
-                (SELECT COUNT(*) FROM Animal A WHERE A.habitat_id = H.habitat_id) AS current_occupancy
-            FROM Habitat H
-            ORDER BY H.name
-        """)
-        habitats = cursor.fetchall()
-    except Exception as e:
-        flash(f"Error fetching habitats: {str(e)}", "danger")
-        habitats = []
-    finally:
-        cursor.close()
-        
-    return render_template('habitats.html', habitats=habitats)
-
-@app.route('/delete_habitat', methods=['POST'])
-def delete_habitat():
-    """
-    Handles deleting a habitat.
-    Hits "Delete operations (With GUI)" and "Triggers (With GUI)".
-    """
-    if 'loggedin' not in session:
-        return redirect(url_for('login'))
-    if session['role'] != 'Manager':
-        flash('You do not have permission to access this page.', 'danger')
-        return redirect(url_for('dashboard'))
-
-    # --- "Delete operations (With GUI)" ---
-    habitat_id = request.form['habitat_id']
-    cursor = mysql.connection.cursor()
-    
-    try:
-        cursor.execute("DELETE FROM Habitat WHERE habitat_id = %s", [habitat_id])
-        mysql.connection.commit()
-        flash('Habitat deleted successfully.', 'success')
-        
-    except Exception as e:
-        # --- "Triggers (With GUI)" ---
-        # Catches the error from trg_Before_Habitat_Delete
-        mysql.connection.rollback()
-        if "Cannot delete habitat. It still contains animals" in str(e):
-            flash('Error: Cannot delete habitat. It still contains animals.', 'danger')
-        else:
-            flash(f'Database Error: {str(e)}', 'danger')
-    finally:
-        cursor.close()
-
-    return redirect(url_for('habitats'))
-
-# --- VISITOR MANAGEMENT ROUTES ---
-
-@app.route('/visitors')
-def visitors():
-    """Displays the list of all visitors."""
-    if 'loggedin' not in session:
-        return redirect(url_for('login'))
-    if session['role'] != 'Manager':
-        flash('You do not have permission to access this page.', 'danger')
-        return redirect(url_for('dashboard'))
-
-    cursor = mysql.connection.cursor()
-    try:
-        cursor.execute("SELECT * FROM Visitor ORDER BY l_name, f_name")
-        visitors = cursor.fetchall()
-    except Exception as e:
-        flash(f"Error fetching visitors: {str(e)}", "danger")
-        visitors = []
-    finally:
-        cursor.close()
-        
-    return render_template('visitors.html', visitors=visitors)
-
-@app.route('/visitors/unvisited')
-def visitors_unvisited():
-    """
-    Displays the report of visitors who haven't visited any animal.
-    Hits "1 Nested Query (With GUI)".
-    """
-    if 'loggedin' not in session:
-        return redirect(url_for('login'))
-    if session['role'] != 'Manager':
-        flash('You do not have permission to access this page.', 'danger')
-        return redirect(url_for('dashboard'))
-
-    cursor = mysql.connection.cursor()
-    try:
-        # --- "1 Nested Query (With GUI)" ---
-        cursor.execute("""
-            SELECT visitor_id, f_name, l_name
-            FROM Visitor
-            WHERE visitor_id NOT IN (SELECT DISTINCT visitor_id FROM Visits)
-        """)
-        visitors = cursor.fetchall()
-    except Exception as e:
-        flash(f"Error running report: {str(e)}", "danger")
-        visitors = []
-    finally:
-        cursor.close()
-        
-    return render_template('visitors_unvisited.html', visitors=visitors)
-
-@app.route('/edit_visitor/<int:visitor_id>', methods=['GET', 'POST'])
-def edit_visitor(visitor_id):
-    """
-    Handles editing a visitor's details (GET for form, POST for update).
-    Hits "Update operations (With GUI)".
-    """
-    if 'loggedin' not in session:
-        return redirect(url_for('login'))
-    if session['role'] != 'Manager':
-        flash('You do not have permission to access this page.', 'danger')
-        return redirect(url_for('dashboard'))
-
-    cursor = mysql.connection.cursor()
-
-    # --- "Update operations (With GUI)" ---
-    if request.method == 'POST':
-        f_name = request.form['f_name']
-        l_name = request.form['l_name']
-        age = request.form['age']
-        phone_no = request.form['phone_no']
-
-        # Server-side validation
-        error = None
-        try:
-            if not f_name or not l_name or not phone_no:
-                error = 'Error: Name and Phone Number fields cannot be empty.'
-            elif int(age) <= 0:
-                error = 'Error: Age must be a positive number.'
-        except (ValueError, TypeError):
-            error = 'Error: Age must be a valid number.'
-        
-        if error:
-            flash(error, 'danger')
-            # Re-fetch data to render the form again
-            cursor.execute("SELECT * FROM Visitor WHERE visitor_id = %s", [visitor_id])
-            visitor = cursor.fetchone()
-            cursor.close()
-            return render_template('edit_visitor.html', visitor=visitor)
-            
-        # Validation passed, run UPDATE
-        try:
-            cursor.execute("""
-                UPDATE Visitor 
-                SET f_name = %s, l_name = %s, age = %s, phone_no = %s
-                WHERE visitor_id = %s
-            """, (f_name, l_name, age, phone_no, visitor_id))
-            mysql.connection.commit()
-            flash('Visitor updated successfully.', 'success')
-        except Exception as e:
-            mysql.connection.rollback()
-            flash(f"Error updating visitor: {str(e)}", "danger")
-        finally:
-            cursor.close()
-            
-        return redirect(url_for('visitors'))
-
-    # --- GET request: Show the pre-filled form ---
-    try:
-        cursor.execute("SELECT * FROM Visitor WHERE visitor_id = %s", [visitor_id])
-        visitor = cursor.fetchone()
-        if not visitor:
-            flash('Visitor not found.', 'danger')
-            return redirect(url_for('visitors'))
-    except Exception as e:
-        flash(f"Error fetching visitor: {str(e)}", "danger")
-        return redirect(url_for('visitors'))
-    finally:
-        cursor.close()
-
-    return render_template('edit_visitor.html', visitor=visitor)
-
-@app.route('/veterinary')
-def view_veterinary_records():
-    """
-    Displays the list of all veterinary records.
-    Uses JOINs to show animal and vet names.
-    """
-    if 'loggedin' not in session:
-        return redirect(url_for('login'))
-    
-    # Allow Managers, Zookeepers, and Vets to see this page
-    if session['role'] not in ['Manager', 'Zookeeper', 'Veterinarian']:
-        flash('You do not have permission to access this page.', 'danger')
-        return redirect(url_for('dashboard'))
-
-    cursor = mysql.connection.cursor()
-    try:
-        # This query JOINS 3 tables to get all the info we need
-        cursor.execute("""
-            SELECT 
-                V.record_id,
-                V.checkup_date,
-                V.status,
-                V.notes,
-                A.name AS animal_name,
-                E.name AS vet_name
-            FROM Veterinary_Status V
-            JOIN Animal A ON V.animal_id = A.animal_id
-            JOIN Employee E ON V.vet_id = E.employee_id
-            ORDER BY V.checkup_date DESC
-        """)
-        records = cursor.fetchall()
-    except Exception as e:
-        flash(f"Error fetching veterinary records: {str(e)}", "danger")
-        records = []
-    finally:
-        cursor.close()
-        
-    return render_template('veterinary.html', records=records)
-
-@app.route('/add_vet_record', methods=['GET', 'POST'])
-def add_vet_record():
-    """
-    Handles adding a new veterinary record (GET for form, POST for submission).
-    """
-    if 'loggedin' not in session:
-        return redirect(url_for('login'))
-    if session['role'] not in ['Manager', 'Zookeeper', 'Veterinarian']:
-        flash('You do not have permission to perform this action.', 'danger')
-        return redirect(url_for('dashboard'))
-
-    cursor = mysql.connection.cursor()
-
-    if request.method == 'POST':
-        # Get data from the form
-        p_record_id = request.form.get('record_id')
-        p_animal_id = request.form.get('animal_id')
-        p_vet_id = request.form.get('vet_id')
-        p_checkup_date = request.form.get('checkup_date')
-        p_status = request.form.get('status')
-        p_notes = request.form.get('notes')
-
-        # --- Basic Validation ---
-        error = None
-        try:
-            if not all([p_record_id, p_animal_id, p_vet_id, p_checkup_date, p_status]):
-                error = 'Error: Record ID, Animal, Vet, Date, and Status are required fields.'
-            elif int(p_record_id) <= 0:
-                 error = 'Error: Record ID must be a positive number.'
-        except (ValueError, TypeError):
-             error = 'Error: Record ID must be a valid number.'
-        
-        if error:
-            flash(error, 'danger')
-            # If validation fails, we must re-load the data for the dropdowns
-            cursor.execute("SELECT animal_id, name, species FROM Animal ORDER BY name")
-            animals = cursor.fetchall()
-            cursor.execute("SELECT employee_id, name FROM Employee WHERE role = 'Veterinarian' ORDER BY name")
-            vets = cursor.fetchall()
-            cursor.close()
-            return render_template('add_vet_record.html', animals=animals, vets=vets)
-        
-        # --- Insert into DB ---
-        try:
-            cursor.execute("""
-                INSERT INTO Veterinary_Status (record_id, animal_id, vet_id, checkup_date, status, notes)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (p_record_id, p_animal_id, p_vet_id, p_checkup_date, p_status, p_notes))
-            
-            mysql.connection.commit()
-            flash('New veterinary record added successfully!', 'success')
-            cursor.close()
-            return redirect(url_for('view_veterinary_records'))
-            
-        except Exception as e:
-            mysql.connection.rollback()
-            # Check for duplicate primary key
-            if "1062" in str(e) or "duplicate entry" in str(e).lower():
-                 flash('Error: A record with this ID already exists.', 'danger')
-            else:
-                flash(f'Database Error: {str(e)}', 'danger')
-            
-            # Re-load dropdown data even after a DB error
-            cursor.execute("SELECT animal_id, name, species FROM Animal ORDER BY name")
-            animals = cursor.fetchall()
-            cursor.execute("SELECT employee_id, name FROM Employee WHERE role = 'Veterinarian' ORDER BY name")
-            vets = cursor.fetchall()
-            cursor.close()
-            return render_template('add_vet_record.html', animals=animals, vets=vets)
-
-    # --- GET Request: Show the form ---
-    try:
-        # Fetch animals for the dropdown
-        cursor.execute("SELECT animal_id, name, species FROM Animal ORDER BY name")
-        animals = cursor.fetchall()
-        
-        # Fetch employees who are veterinarians for the dropdown
-        cursor.execute("SELECT employee_id, name FROM Employee WHERE role = 'Veterinarian' ORDER BY name")
-        vets = cursor.fetchall()
-        
-    except Exception as e:
-        flash(f"Error fetching data for form: {str(e)}", "danger")
-        animals = []
-        vets = []
-    finally:
-        cursor.close()
-        
-    return render_template('add_vet_record.html', animals=animals, vets=vets)
-
-
-# --- End of routes ---
-
-if __name__ == '__main__':
-    app.run(debug=True)
-
+import os
+import asyncio
+import hmac
+import click
+from dotenv import load_dotenv
+from flask import Flask, Response, render_template, stream_template, request, redirect, url_for, session, flash, jsonify, abort, send_file
+from datetime import date, timedelta
+import MySQLdb.cursors
+from db_pool import MySQLPool, PoolTimeout
+from async_db import AsyncDB
+from exports import EXPORT_FORMATS, export_response
+from pagination import Keyset, decode_cursor, fetch_page, stream_rows
+from filters import Filter, FilterSet, like_prefix, non_negative_int
+from caching import TTLCache, DailyTicketTotals, ReferenceData
+from http_cache import ResponseCache
+from templating import Templating
+import session_backends
+import settings
+import bulk_import
+import archive
+from validation import validate_animal, validate_visitor, validate_vet_record
+from auth import EmployeeAuth, requires_roles, login_required
+from credentials import Credentials
+from metrics import Metrics
+from jobs import JobQueue, Report
+from write_behind import BufferFull, WriteBehindBuffer
+
+app = Flask(__name__)
+
+# The extensions are bound to the app, and read their settings, in
+# create_app() below
+mysql = MySQLPool()
+async_db = AsyncDB(mysql)
+auth = EmployeeAuth()
+credentials = Credentials()
+metrics = Metrics()
+job_queue = JobQueue()
+
+# Vet checkups and feedings from /api/ingest/<entity>, written in batches
+# by a background thread
+write_buffer = WriteBehindBuffer()
+
+# Manager dashboard aggregates. Invalidated by the write routes below,
+# and otherwise refreshed when the TTL runs out.
+dashboard_cache = TTLCache()
+
+# Listing pages, keyed by the change versions of the tables they read
+response_cache = ResponseCache()
+
+# Precompiled templates, fingerprinted static files and cached table rows
+templating = Templating()
+
+# Form reference data. The write routes bump the dataset they change
+# ('habitats', 'animals'); vets have no write route, so only the TTL applies.
+reference_data = ReferenceData()
+
+
+def create_app(config=None):
+    """
+    Configures the app from the environment (and .env) and binds the
+    extensions to it. This is the entry point for every server and command:
+
+        gunicorn 'app:create_app()'
+        flask --app app:create_app run
+
+    `config` overrides the environment, e.g. for a benchmark. The pool, the
+    job workers and the write buffer start on first use in each worker
+    process; only with WRITE_BUFFER_SPILL_DIR set does the write buffer start
+    here, to replay the rows that killed workers left in their spill files.
+    Calling it again returns the same, already configured app; since the
+    extensions have read their settings by then, passing `config` on a later
+    call raises RuntimeError rather than being ignored.
+    """
+    if 'zoo' in app.extensions:
+        if config:
+            raise RuntimeError("create_app() was already called; its config can't be changed now.")
+        return app
+    load_dotenv()
+    settings.from_env(app.config, app.root_path)
+    if config:
+        app.config.update(config)
+
+    session_backends.init_app(app)
+    mysql.init_app(app)
+    auth.init_app(app, mysql)
+    credentials.init_app(app, mysql)
+    metrics.init_app(app, mysql)
+    job_queue.init_app(app)
+    write_buffer.init_app(app, mysql)
+    dashboard_cache.maxsize = app.config['DASHBOARD_CACHE_SIZE']
+    dashboard_cache.ttl = app.config['DASHBOARD_CACHE_TTL']
+    response_cache.init_app(app)
+    templating.init_app(app)
+    reference_data.cache.maxsize = app.config['REFERENCE_CACHE_SIZE']
+    reference_data.cache.ttl = app.config['REFERENCE_CACHE_TTL']
+    app.extensions['zoo'] = True
+    return app
+
+
+# --- Listing Helpers ---
+
+# Sort keys for the paginated listings. The trailing primary key makes
+# every position unique so no row is skipped or repeated between pages.
+ANIMAL_KEYSET = Keyset(['A.name', 'A.animal_id'], ['animal_name', 'animal_id'])
+VISITOR_KEYSET = Keyset(['l_name', 'f_name', 'visitor_id'], ['l_name', 'f_name', 'visitor_id'])
+UNVISITED_KEYSET = Keyset(['visitor_id'], ['visitor_id'])
+VET_RECORD_KEYSET = Keyset(['V.checkup_date', 'V.record_id'], ['checkup_date', 'record_id'], descending=True)
+
+# Visitors with no visits, live or archived. An anti-join: NOT EXISTS probes
+# the primary keys once per visitor and, unlike NOT IN, stays correct if
+# the subquery ever returns NULL.
+UNVISITED_CONDITION = (
+    "NOT EXISTS (SELECT 1 FROM Visits V WHERE V.visitor_id = Visitor.visitor_id)"
+    " AND NOT EXISTS (SELECT 1 FROM Visits_Archive VA WHERE VA.visitor_id = Visitor.visitor_id)"
+)
+
+# Filters accepted by /animals, /visitors and their JSON APIs. Each one maps
+# to an index from migration 006 (or a prefix of the listing's sort index).
+ANIMAL_FILTERS = FilterSet([
+    Filter('species', 'A.species'),
+    Filter('habitat_id', 'A.habitat_id', '=', int, 'habitat'),
+    Filter('gender', 'A.gender'),
+    Filter('min_age', 'A.age', '>=', non_negative_int, 'minimum age'),
+    Filter('max_age', 'A.age', '<=', non_negative_int, 'maximum age'),
+    Filter('name', 'A.name', 'prefix'),
+])
+VISITOR_FILTERS = FilterSet([
+    Filter('name', ['l_name', 'f_name'], 'prefix'),  # either name starts with it
+    Filter('l_name', 'l_name', 'prefix', label='last name'),
+    Filter('f_name', 'f_name', 'prefix', label='first name'),
+    Filter('phone', 'phone_no', 'prefix', label='phone number'),
+    Filter('min_age', 'age', '>=', non_negative_int, 'minimum age'),
+    Filter('max_age', 'age', '<=', non_negative_int, 'maximum age'),
+])
+
+ANIMAL_LISTING_SQL = """
+    SELECT 
+        A.animal_id,
+        A.name AS animal_name,
+        A.species,
+        A.gender,
+        A.age,
+        A.habitat_id,
+        H.name AS habitat_name,
+        H.type AS habitat_type
+    FROM Animal A
+    JOIN Habitat H ON A.habitat_id = H.habitat_id
+"""
+ANIMAL_COLUMNS = ['animal_id', 'animal_name', 'species', 'gender', 'age', 'habitat_id', 'habitat_name', 'habitat_type']
+VISITOR_COLUMNS = ['visitor_id', 'f_name', 'l_name', 'age', 'phone_no']
+
+def page_limit():
+    """?limit=, clamped to 1..MAX_PAGE_SIZE (PAGE_SIZE if absent)."""
+    limit = request.args.get('limit', app.config['PAGE_SIZE'], type=int)
+    return max(1, min(limit, app.config['MAX_PAGE_SIZE']))
+
+def render_listing(template, rows_name, select_sql, keyset, error_label, export_columns, conditions=(),
+                   filter_set=None, **context):
+    """
+    Renders one page of a keyset-paginated listing.
+    ?after=<cursor> picks the page and ?limit= its size. With ?stream=1 every
+    remaining row is streamed from a server-side cursor instead, and with
+    ?format=csv|ndjson (plus optional &gzip=1) they are streamed as a download.
+    `filter_set` adds the filters it defines as query parameters; `context`
+    is passed on to the template.
+    """
+    limit = page_limit()
+
+    after = None
+    token = request.args.get('after')
+    if token:
+        try:
+            after = decode_cursor(token, keyset)
+        except ValueError as e:
+            flash(str(e), 'danger')
+
+    conditions, params, filters = list(conditions), [], {}
+    if filter_set is not None:
+        try:
+            extra, params, filters = filter_set.parse(request.args)
+            conditions.extend(extra)
+        except ValueError as e:
+            flash(str(e), 'danger')
+
+    fmt = request.args.get('format')
+    if fmt in EXPORT_FORMATS:
+        cursor = mysql.read_connection.cursor(MySQLdb.cursors.SSDictCursor)
+        rows = stream_rows(cursor, select_sql, keyset, after, conditions, params,
+                           batch_size=app.config['STREAM_BATCH_SIZE'])
+        return export_response(rows, export_columns, fmt, rows_name,
+                               compress=request.args.get('gzip') == '1')
+
+    if request.args.get('stream') == '1':
+        # Unbuffered cursor: rows go out as MySQL sends them, never all in memory
+        cursor = mysql.read_connection.cursor(MySQLdb.cursors.SSDictCursor)
+        rows = stream_rows(cursor, select_sql, keyset, after, conditions, params,
+                           batch_size=app.config['STREAM_BATCH_SIZE'])
+        return stream_template(template, **{rows_name: rows}, next_cursor=None, limit=limit, filters=filters,
+                               **context)
+
+    cursor = mysql.read_connection.cursor()
+    try:
+        rows, next_cursor = fetch_page(cursor, select_sql, keyset, after, limit, conditions, params)
+    except Exception as e:
+        flash(f"Error fetching {error_label}: {str(e)}", "danger")
+        rows, next_cursor = [], None
+    finally:
+        cursor.close()
+
+    return render_template(template, **{rows_name: rows}, next_cursor=next_cursor, limit=limit, filters=filters,
+                           **context)
+
+def search_listing(select_sql, keyset, filter_set, columns):
+    """
+    One page of a filtered listing as JSON: {"items": [...], "next_cursor": ...}.
+    Bad filter values or cursors are a 400 with {"error": ...}.
+    """
+    token = request.args.get('after')
+    try:
+        after = decode_cursor(token, keyset) if token else None
+        conditions, params, _ = filter_set.parse(request.args)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    cursor = mysql.read_connection.cursor()
+    try:
+        rows, next_cursor = fetch_page(cursor, select_sql, keyset, after, page_limit(), conditions, params)
+    finally:
+        cursor.close()
+    return jsonify(items=[{column: row[column] for column in columns} for row in rows],
+                   next_cursor=next_cursor)
+
+def export_query(sql, columns, filename, params=()):
+    """
+    Streams every row of a query as a CSV/NDJSON download, picked with
+    ?format=, from an unbuffered cursor. ?gzip=1 compresses the stream.
+    """
+    return export_response(iter_query(sql, params), columns, request.args.get('format'), filename,
+                           compress=request.args.get('gzip') == '1')
+
+def iter_query(sql, params=()):
+    """Yields a query's rows from an unbuffered cursor, STREAM_BATCH_SIZE at a time."""
+    cursor = mysql.read_connection.cursor(MySQLdb.cursors.SSDictCursor)
+    try:
+        cursor.execute(sql, params)
+        while True:
+            batch = cursor.fetchmany(app.config['STREAM_BATCH_SIZE'])
+            if not batch:
+                break
+            yield from batch
+    finally:
+        cursor.close()
+
+# --- Reference Data Helpers ---
+
+def fetch_all(sql, params=()):
+    """Runs a query and returns every row."""
+    cursor = mysql.connection.cursor()
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+def habitat_choices():
+    """Habitats for the add_animal dropdown."""
+    return reference_data.get_or_load(
+        'habitats', fetch_all, "SELECT habitat_id, name, type FROM Habitat ORDER BY name")
+
+def vet_choices():
+    """Veterinarians for the add_vet_record dropdown."""
+    return reference_data.get_or_load(
+        'vets', fetch_all, "SELECT employee_id, name FROM Employee WHERE role = 'Veterinarian' ORDER BY name")
+
+def _search_animals(term, limit):
+    # An exact ID match first, then names starting with the term. The LIKE
+    # prefix is a range scan on idx_animal_name (name, animal_id).
+    matches = []
+    if term.isdigit():
+        matches = list(fetch_all("SELECT animal_id, name, species FROM Animal WHERE animal_id = %s", [int(term)]))
+    pattern = like_prefix(term)
+    by_name = fetch_all("""
+        SELECT animal_id, name, species
+        FROM Animal
+        WHERE name LIKE %s
+        ORDER BY name, animal_id
+        LIMIT %s
+    """, [pattern, limit])
+    seen = {row['animal_id'] for row in matches}
+    matches.extend(row for row in by_name if row['animal_id'] not in seen)
+    return matches[:limit]
+
+def search_animals(term, limit):
+    """Animals whose name starts with `term` (or whose ID is `term`), cached per term."""
+    return reference_data.get_or_load('animals', _search_animals, term.strip().lower(), limit)
+
+# --- Dashboard Helpers ---
+
+async def load_ticket_totals():
+    """Loads the per-day ticket totals from the rollup table (one row per day)."""
+    # --- "1 Aggregate Query (With GUI)" ---
+    # Ticket_Daily_Rollup is kept current by triggers on Ticket
+    return DailyTicketTotals(await async_db.fetch_all("""
+        SELECT date, tickets_sold, priced_tickets, total_revenue
+        FROM Ticket_Daily_Rollup
+    """, replica=True))
+
+def record_ticket_sale(day, price, count=1):
+    """
+    Applies a ticket sale (or a refund, with a negative count) to the cached
+    ticket report instead of throwing the whole report away.
+    """
+    dashboard_cache.update('ticket_totals', lambda totals: totals.apply(day, price, count))
+
+def apply_imported_rows(entity_name, inserted):
+    """Keeps the caches in step with a committed bulk-import batch."""
+    if entity_name == 'animals':
+        dashboard_cache.invalidate('animal_count')
+        reference_data.bump('animals')
+        response_cache.bump('Animal')
+    elif entity_name == 'visitors':
+        response_cache.bump('Visitor')
+    elif entity_name == 'vet_records':
+        response_cache.bump('Veterinary_Status')
+    elif entity_name == 'tickets':
+        # values are (ticket_id, transaction_id, price, date, pay_mode, visitor_id)
+        for values in inserted:
+            record_ticket_sale(date.fromisoformat(values[3]), values[2])
+
+write_buffer.on_flushed = apply_imported_rows
+
+# --- Background Reports ---
+# Full histories are too slow to build inside a request: the routes below
+# queue them and the browser polls /jobs/<id> until the CSV is ready.
+
+TICKET_HISTORY_COLUMNS = ['ticket_id', 'date', 'price', 'pay_mode', 'transaction_id', 'visitor_id', 'f_name', 'l_name']
+VET_HISTORY_COLUMNS = ['record_id', 'checkup_date', 'animal_id', 'animal_name', 'vet_name', 'status', 'notes']
+UNVISITED_COLUMNS = ['visitor_id', 'f_name', 'l_name']
+
+@job_queue.job('ticket_history', concurrency=1)
+def ticket_history_report(include_archive=False, since=None):
+    """Every ticket sold (or from `since` on), oldest first, with the visitor's name; archived ones on request."""
+    conditions, params = ([], []) if since is None else (['date >= %s'], [since])
+    source, params = archive.history_source('Ticket', include_archive, conditions, params)
+    return Report(TICKET_HISTORY_COLUMNS, iter_query(f"""
+        SELECT T.ticket_id, T.date, T.price, T.pay_mode, T.transaction_id, T.visitor_id, V.f_name, V.l_name
+        FROM {source} T
+        LEFT JOIN Visitor V ON T.visitor_id = V.visitor_id
+        ORDER BY T.date, T.ticket_id
+    """, params))
+
+@job_queue.job('vet_history', concurrency=2)
+def vet_history_report(animal_id=None, include_archive=False, since=None):
+    """Every veterinary record (or one animal's, or from `since` on), oldest first; archived ones on request."""
+    conditions, params = [], []
+    if animal_id is not None:
+        conditions.append('animal_id = %s')
+        params.append(animal_id)
+    if since is not None:
+        conditions.append('checkup_date >= %s')
+        params.append(since)
+    source, params = archive.history_source('Veterinary_Status', include_archive, conditions, params)
+    return Report(VET_HISTORY_COLUMNS, iter_query(f"""
+        SELECT V.record_id, V.checkup_date, V.animal_id, A.name AS animal_name,
+               E.name AS vet_name, V.status, V.notes
+        FROM {source} V
+        JOIN Animal A ON V.animal_id = A.animal_id
+        JOIN Employee E ON V.vet_id = E.employee_id
+        ORDER BY V.checkup_date, V.record_id
+    """, params))
+
+@job_queue.job('unvisited_visitors', concurrency=1)
+def unvisited_visitors_report():
+    """Every visitor with no row in Visits or Visits_Archive."""
+    return Report(UNVISITED_COLUMNS, iter_query(f"""
+        SELECT visitor_id, f_name, l_name
+        FROM Visitor
+        WHERE {UNVISITED_CONDITION}
+        ORDER BY visitor_id
+    """))
+
+def queue_report(name, **params):
+    """Queues a report for the current user and sends them to its status page."""
+    job_id = job_queue.enqueue(name, owner=session['id'], **params)
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(id=job_id, status_url=url_for('job_status', job_id=job_id)), 202
+    return redirect(url_for('job_status', job_id=job_id))
+
+def history_options():
+    """
+    The include_archive and since options posted with a history report
+    form. Raises ValueError for a malformed date.
+    """
+    since = request.form.get('since') or None
+    if since is not None:
+        since = date.fromisoformat(since).isoformat()
+    return {'include_archive': request.form.get('include_archive') == '1', 'since': since}
+
+def owned_job(job_id):
+    """The current user's job, or a 404 (other users' jobs are not revealed)."""
+    job = job_queue.get(job_id)
+    if job is None or job['owner'] != session['id']:
+        abort(404)
+    return job
+
+# --- CLI Commands ---
+
+@app.cli.command('import-data')
+@click.argument('entity', type=click.Choice(sorted(bulk_import.ENTITIES)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']),
+              help='Defaults to the file extension.')
+@click.option('--batch-size', type=int, default=None, help='Rows per INSERT transaction.')
+def import_data(entity, path, fmt, batch_size):
+    """Bulk-loads animals, visitors or tickets from a CSV or NDJSON file."""
+    fmt = fmt or bulk_import.guess_format(path)
+    if fmt is None:
+        raise click.UsageError("Can't tell the file format from its name; pass --format.")
+    with open(path, 'rb') as f:
+        report = bulk_import.import_rows(
+            mysql.connection, entity, bulk_import.iter_rows(f, fmt),
+            batch_size=batch_size or app.config['IMPORT_BATCH_SIZE'],
+        )
+    for line_no, message in report.errors:
+        print(f"line {line_no}: {message}")
+    print(report.summary())
+
+@app.cli.command('rebuild-ticket-rollup')
+def rebuild_ticket_rollup():
+    """Recomputes Ticket_Daily_Rollup from the Ticket and Ticket_Archive tables."""
+    cursor = mysql.connection.cursor()
+    try:
+        cursor.execute("CALL sp_RebuildTicketRollup()")
+        result = cursor.fetchall()
+        # Exhaust the cursor to prevent "commands out of sync"
+        while cursor.nextset(): pass
+        mysql.connection.commit()
+    finally:
+        cursor.close()
+    print(f"Rebuilt ticket rollup for {result[0]['days_rebuilt']} day(s).")
+
+@app.cli.command('archive-history')
+@click.option('--before', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Archive rows dated before this day (default: ARCHIVE_KEEP_DAYS ago).')
+@click.option('--batch-size', type=int, default=None, help='Rows moved per transaction.')
+@click.option('--dry-run', is_flag=True, help='Only count the rows that would be archived.')
+def archive_history(before, batch_size, dry_run):
+    """Moves old tickets, visits and vet records into the archive tables."""
+    cutoff = before.date() if before else date.today() - timedelta(days=app.config['ARCHIVE_KEEP_DAYS'])
+    if dry_run:
+        counts = archive.count_history(mysql.connection, cutoff)
+    else:
+        counts = archive.move_history(mysql.connection, cutoff,
+                                      batch_size=batch_size or app.config['ARCHIVE_BATCH_SIZE'])
+    verb = 'Would archive' if dry_run else 'Archived'
+    print(f"{verb} {counts['Ticket']} ticket(s), {counts['Visits']} visit(s) and "
+          f"{counts['Veterinary_Status']} vet record(s) dated before {cutoff}.")
+
+@app.cli.command('hash-passwords')
+def hash_passwords():
+    """Replaces plaintext Employee passwords with Argon2 hashes."""
+    converted = credentials.hash_plaintext_passwords(mysql.connection)
+    print(f"Hashed {converted} plaintext password(s).")
+
+@app.cli.command('revoke-sessions')
+@click.argument('employee_ids', nargs=-1, type=int)
+def revoke_sessions(employee_ids):
+    """Logs out the given employees (or everyone if no ids are given)."""
+    affected = auth.revoke_sessions(employee_ids or None)
+    print(f"Revoked sessions for {affected} employee(s).")
+
+@app.cli.command('check-occupancy')
+@click.option('--repair', is_flag=True, help='Reset mismatched counters to the real animal count.')
+def check_occupancy(repair):
+    """Compares Habitat.current_occupancy with the Animal table."""
+    cursor = mysql.connection.cursor()
+    try:
+        cursor.execute("CALL sp_CheckHabitatOccupancy(%s)", [repair])
+        mismatches = cursor.fetchall()
+        # Exhaust the cursor to prevent "commands out of sync"
+        while cursor.nextset(): pass
+        mysql.connection.commit()
+    finally:
+        cursor.close()
+
+    if not mismatches:
+        print("All habitat occupancy counters are consistent.")
+        return
+    for row in mismatches:
+        print(f"Habitat {row['habitat_id']} ({row['name']}): "
+              f"stored {row['stored_occupancy']}, actual {row['actual_occupancy']}")
+    if repair:
+        print(f"Repaired {len(mismatches)} habitat(s).")
+
+# --- Error Handlers ---
+
+@app.errorhandler(PoolTimeout)
+def handle_pool_timeout(e):
+    """Every pooled connection stayed busy for DB_POOL_WAIT_TIMEOUT seconds."""
+    return "The database is busy right now. Please try again in a moment.", 503
+
+# --- Routes ---
+
+@app.route('/')
+def home():
+    """Renders the login page or redirects to the dashboard if already logged in."""
+    if 'loggedin' in session:
+        return redirect(url_for('dashboard')) 
+    return render_template('login.html')
+
+@app.route('/login', methods=['GET', 'POST'])
+async def login():
+    """Handles the user login form submission."""
+    error = None
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+
+        retry_after = credentials.reserve_attempt(username, request.remote_addr)
+        if retry_after:
+            error = f'Too many failed logins. Try again in {retry_after} seconds.'
+            return render_template('login.html', error=error), 429
+
+        try:
+            # Look the user up by username and check the password hash off-thread
+            account = await credentials.authenticate(username, password, request.remote_addr)
+            if account:
+                # Create a session for the logged-in user
+                # (the role is re-checked against Employee by requires_roles)
+                auth.login(account)
+                return redirect(url_for('dashboard'))
+            else:
+                error = 'Incorrect username or password!'
+        except Exception as e:
+            error = f"An error occurred: {str(e)}"
+            
+    return render_template('login.html', error=error)
+
+@app.route('/dashboard')
+@login_required
+async def dashboard():
+    """Displays the dashboard appropriate for the user's role."""
+    if session['role'] == 'Manager':
+        try:
+            # --- "Procedures/Functions (With GUI)" ---
+            # Served from dashboard_cache; on a miss the three queries run concurrently
+            animal_count, total_capacity, ticket_totals = await asyncio.gather(
+                dashboard_cache.get_or_load_async(
+                    'animal_count',
+                    lambda: async_db.scalar("SELECT fn_GetTotalAnimalCount() AS animal_count", 'animal_count',
+                                                  replica=True)
+                ),
+                dashboard_cache.get_or_load_async(
+                    'total_capacity',
+                    lambda: async_db.scalar("SELECT fn_GetTotalCapacity() AS total_capacity", 'total_capacity',
+                                                  replica=True)
+                ),
+                dashboard_cache.get_or_load_async('ticket_totals', load_ticket_totals),
+            )
+            ticket_report = ticket_totals.report()
+        except Exception as e:
+            flash(f"Error loading dashboard: {str(e)}", "danger")
+            return render_template('layout.html')
+        return render_template(
+            'manager_dashboard.html', 
+            animal_count=animal_count,
+            total_capacity=total_capacity,
+            ticket_report=ticket_report,
+            cache_stats=dashboard_cache.stats()
+        )
+    elif session['role'] == 'Zookeeper':
+        return render_template('zookeeper_dashboard.html')
+    else:
+        # Fallback for other roles
+        return render_template('layout.html')
+
+@app.route('/dashboard/ticket_report')
+@requires_roles('Manager')
+def ticket_report_export():
+    """Downloads the dashboard's ticket sales report (?format=csv|ndjson, ?gzip=1)."""
+    if request.args.get('format') not in EXPORT_FORMATS:
+        return redirect(url_for('ticket_report_export', format='csv', gzip=request.args.get('gzip')))
+    return export_query("""
+            SELECT date, average_price, tickets_sold, total_revenue
+            FROM Ticket_Daily_Rollup
+            ORDER BY date DESC
+        """, ['date', 'average_price', 'tickets_sold', 'total_revenue'], 'ticket_report')
+
+@app.route('/admin/db_pool')
+@requires_roles('Manager')
+def db_pool_stats():
+    """Returns this worker's connection pool metrics (and its replica pools') as JSON."""
+    return jsonify(mysql.stats())
+
+@requires_roles('Manager')
+def metrics_for_manager_session():
+    """
+    Not a route: the session-login fallback of /metrics for requests without
+    the METRICS_TOKEN bearer token, so a logged-in manager can still look.
+    """
+    return Response(metrics.expose(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """This worker's metrics in the Prometheus text format."""
+    token = app.config['METRICS_TOKEN']
+    if token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return Response(metrics.expose(), mimetype='text/plain; version=0.0.4')
+    return metrics_for_manager_session()
+
+@app.route('/admin/jobs')
+@requires_roles('Manager')
+def job_stats():
+    """Returns the background job queue's counts per type and status as JSON."""
+    return jsonify(job_queue.stats())
+
+@app.route('/dashboard/ticket_report/history', methods=['POST'])
+@requires_roles('Manager')
+def queue_ticket_history():
+    """Queues the full ticket history report (archived tickets on request)."""
+    try:
+        options = history_options()
+    except ValueError:
+        flash('Error: Date must be in YYYY-MM-DD format.', 'danger')
+        return redirect(url_for('dashboard'))
+    return queue_report('ticket_history', **options)
+
+@app.route('/jobs/<job_id>')
+@login_required
+def job_status(job_id):
+    """
+    A queued report's status page, which reloads itself until the report is
+    ready. ?format=json returns the status as JSON for scripts.
+    """
+    job = owned_job(job_id)
+    if request.args.get('format') == 'json':
+        return jsonify(
+            id=job['id'], type=job['type'], status=job['status'], attempts=job['attempts'],
+            error=job['error'], result=job['result'],
+            result_url=url_for('job_result', job_id=job_id) if job['result_file'] else None,
+        )
+    return render_template('job_status.html', job=job)
+
+@app.route('/jobs/<job_id>/result')
+@login_required
+def job_result(job_id):
+    """Downloads a finished report's CSV."""
+    job = owned_job(job_id)
+    path = job_queue.result_path(job)
+    if job['status'] != 'done' or path is None or not os.path.exists(path):
+        abort(404)
+    return send_file(path, mimetype='text/csv', as_attachment=True, download_name=f"{job['type']}.csv")
+
+@app.route('/logout')
+def logout():
+    """Logs the user out by clearing the session."""
+    auth.logout()
+    return redirect(url_for('home'))
+
+# --- ANIMAL MANAGEMENT ROUTES ---
+
+@app.route('/animals')
+@requires_roles('Manager', 'Zookeeper')
+@response_cache.cached('Animal', 'Habitat')
+def animals():
+    """
+    Displays the list of animals, one keyset page at a time, optionally
+    filtered (?species=, ?habitat_id=, ?gender=, ?min_age=, ?max_age=, ?name=).
+    Hits "Read operations (With GUI)" and "1 Join Query (With GUI)".
+    """
+    # --- "1 Join Query (With GUI)" ---
+    # --- "Read operations (With GUI)" ---
+    return render_listing('animals.html', 'animals', ANIMAL_LISTING_SQL, ANIMAL_KEYSET, 'animals',
+                          ANIMAL_COLUMNS, filter_set=ANIMAL_FILTERS, habitats=habitat_choices())
+
+@app.route('/add_animal', methods=['GET', 'POST'])
+@requires_roles('Manager', 'Zookeeper')
+def add_animal():
+    """
+    Handles adding a new animal (GET for form, POST for submission).
+    Hits "Create operations (With GUI)" and "Procedures/Functions (With GUI)".
+    """
+    if request.method == 'POST':
+        # --- "Create operations (With GUI)" ---
+        p_animal_id = request.form.get('animal_id')
+        p_name = request.form.get('name')
+        p_species = request.form.get('species')
+        p_gender = request.form.get('gender')
+        p_age = request.form.get('age')
+        p_habitat_id = request.form.get('habitat_id')
+
+        # Server-side validation
+        error = validate_animal(request.form)
+
+        if error:
+            flash(error, 'danger')
+        else:
+            # Validation passed, call the stored procedure
+            cursor = mysql.connection.cursor()
+            try:
+                # --- "Procedures/Functions (With GUI)" ---
+                cursor.execute("CALL sp_AddNewAnimal(%s, %s, %s, %s, %s, %s)",
+                               (p_animal_id, p_name, p_species, p_gender, p_age, p_habitat_id))
+                result = cursor.fetchall()
+                # Exhaust the cursor to prevent "commands out of sync"
+                while cursor.nextset(): pass 
+                mysql.connection.commit() 
+                
+                # Show the message from the procedure (e.g., "Habitat full")
+                if 'Error' in result[0]['message']:
+                    flash(result[0]['message'], 'danger')
+                else:
+                    dashboard_cache.invalidate('animal_count')
+                    reference_data.bump('animals')
+                    response_cache.bump('Animal')
+                    flash(result[0]['message'], 'success')
+                    return redirect(url_for('animals'))
+            except Exception as e:
+                mysql.connection.rollback() 
+                flash(f'Database Error: {str(e)}', 'danger')
+            finally:
+                cursor.close() 
+    
+    # GET request (or a failed POST): Show the form, populating the habitat dropdown
+    try:
+        habitats = habitat_choices()
+    except Exception as e:
+        flash(f"Error fetching habitats: {str(e)}", "danger")
+        habitats = []
+    
+    return render_template('add_animal.html', habitats=habitats)
+
+@app.route('/delete_animal', methods=['POST'])
+@requires_roles('Manager', 'Zookeeper')
+def delete_animal():
+    """
+    Handles deleting an animal.
+    Hits "Delete operations (With GUI)".
+    """
+    # --- "Delete operations (With GUI)" ---
+    animal_id = request.form['animal_id']
+    cursor = mysql.connection.cursor()
+    
+    try:
+        cursor.execute("DELETE FROM Animal WHERE animal_id = %s", [animal_id])
+        mysql.connection.commit()
+        dashboard_cache.invalidate('animal_count')
+        reference_data.bump('animals')
+        response_cache.bump('Animal')
+        flash('Animal deleted successfully.', 'success')
+        
+    except Exception as e:
+        mysql.connection.rollback()
+        # Check for foreign key constraint errors (e.g., if animal is in 'Visits' table)
+        if "1451" in str(e) or "foreign key constraint" in str(e).lower():
+            flash('Error: Cannot delete animal. It is referenced by other records (e.g., visits).', 'danger')
+        else:
+            flash(f'Database Error: {str(e)}', 'danger')
+    finally:
+        cursor.close()
+
+    return redirect(url_for('animals'))
+
+# --- BULK IMPORT ROUTES ---
+
+@app.route('/import', methods=['GET', 'POST'])
+@requires_roles('Manager')
+def import_upload():
+    """
+    Bulk-loads an uploaded CSV or NDJSON file (GET for form, POST for upload).
+    Rows are streamed from the upload and inserted in batches.
+    """
+    report = None
+    if request.method == 'POST':
+        entity = request.form.get('entity')
+        upload = request.files.get('file')
+        fmt = request.form.get('format') or bulk_import.guess_format(upload.filename if upload else None)
+
+        if entity not in bulk_import.ENTITIES:
+            flash('Error: Choose what kind of records to import.', 'danger')
+        elif not upload or not upload.filename:
+            flash('Error: Choose a file to upload.', 'danger')
+        elif fmt not in ('csv', 'ndjson'):
+            flash('Error: Upload a .csv or .ndjson file, or pick the format.', 'danger')
+        else:
+            try:
+                report = bulk_import.import_rows(
+                    mysql.connection, entity, bulk_import.iter_rows(upload.stream, fmt),
+                    batch_size=app.config['IMPORT_BATCH_SIZE'],
+                    on_inserted=apply_imported_rows,
+                )
+                flash(report.summary(), 'success' if not report.failed else 'danger')
+            except Exception as e:
+                flash(f'Database Error: {str(e)}', 'danger')
+
+    return render_template('import_data.html', entities=sorted(bulk_import.ENTITIES), report=report)
+
+# --- HABITAT MANAGEMENT ROUTES ---
+
+@app.route('/habitats')
+@requires_roles('Manager')
+@response_cache.cached('Habitat', 'Animal')
+def habitats():
+    """Displays the list of habitats and their current occupancy."""
+    cursor = mysql.read_connection.cursor()
+    try:
+        # current_occupancy is maintained by the triggers on Animal
+        cursor.execute("""
+            SELECT 
+                H.habitat_id, H.name, H.type, H.capacity, H.current_occupancy
+            FROM Habitat H
+            ORDER BY H.name
+        """)
+        habitats = cursor.fetchall()
+    except Exception as e:
+        flash(f"Error fetching habitats: {str(e)}", "danger")
+        habitats = []
+    finally:
+        cursor.close()
+        
+    return render_template('habitats.html', habitats=habitats)
+
+@app.route('/delete_habitat', methods=['POST'])
+@requires_roles('Manager')
+def delete_habitat():
+    """
+    Handles deleting a habitat.
+    Hits "Delete operations (With GUI)" and "Triggers (With GUI)".
+    """
+    # --- "Delete operations (With GUI)" ---
+    habitat_id = request.form['habitat_id']
+    cursor = mysql.connection.cursor()
+    
+    try:
+        cursor.execute("DELETE FROM Habitat WHERE habitat_id = %s", [habitat_id])
+        mysql.connection.commit()
+        dashboard_cache.invalidate('total_capacity')
+        reference_data.bump('habitats')
+        response_cache.bump('Habitat')
+        flash('Habitat deleted successfully.', 'success')
+        
+    except Exception as e:
+        # --- "Triggers (With GUI)" ---
+        # Catches the error from trg_Before_Habitat_Delete
+        mysql.connection.rollback()
+        if "Cannot delete habitat. It still contains animals" in str(e):
+            flash('Error: Cannot delete habitat. It still contains animals.', 'danger')
+        else:
+            flash(f'Database Error: {str(e)}', 'danger')
+    finally:
+        cursor.close()
+
+    return redirect(url_for('habitats'))
+
+# --- VISITOR MANAGEMENT ROUTES ---
+
+@app.route('/visitors')
+@requires_roles('Manager')
+@response_cache.cached('Visitor')
+def visitors():
+    """Displays the list of visitors, one keyset page at a time, optionally filtered."""
+    return render_listing('visitors.html', 'visitors',
+                          "SELECT * FROM Visitor", VISITOR_KEYSET, 'visitors',
+                          VISITOR_COLUMNS, filter_set=VISITOR_FILTERS)
+
+@app.route('/visitors/unvisited')
+@requires_roles('Manager')
+def visitors_unvisited():
+    """
+    Displays the report of visitors who haven't visited any animal.
+    Hits "1 Nested Query (With GUI)". ?format=csv|ndjson downloads it instead.
+    """
+    # --- "1 Nested Query (With GUI)" ---
+    return render_listing('visitors_unvisited.html', 'visitors',
+                          "SELECT visitor_id, f_name, l_name FROM Visitor", UNVISITED_KEYSET, 'report',
+                          ['visitor_id', 'f_name', 'l_name'], conditions=[UNVISITED_CONDITION])
+
+@app.route('/visitors/unvisited/history', methods=['POST'])
+@requires_roles('Manager')
+def queue_unvisited_report():
+    """Queues the full unvisited-visitors report."""
+    return queue_report('unvisited_visitors')
+
+@app.route('/edit_visitor/<int:visitor_id>', methods=['GET', 'POST'])
+@requires_roles('Manager')
+def edit_visitor(visitor_id):
+    """
+    Handles editing a visitor's details (GET for form, POST for update).
+    Hits "Update operations (With GUI)".
+    """
+    cursor = mysql.connection.cursor()
+
+    # --- "Update operations (With GUI)" ---
+    if request.method == 'POST':
+        f_name = request.form['f_name']
+        l_name = request.form['l_name']
+        age = request.form['age']
+        phone_no = request.form['phone_no']
+
+        # Server-side validation
+        error = validate_visitor(request.form)
+        
+        if error:
+            flash(error, 'danger')
+            # Re-fetch data to render the form again
+            cursor.execute("SELECT * FROM Visitor WHERE visitor_id = %s", [visitor_id])
+            visitor = cursor.fetchone()
+            cursor.close()
+            return render_template('edit_visitor.html', visitor=visitor)
+            
+        # Validation passed, run UPDATE
+        try:
+            cursor.execute("""
+                UPDATE Visitor 
+                SET f_name = %s, l_name = %s, age = %s, phone_no = %s
+                WHERE visitor_id = %s
+            """, (f_name, l_name, age, phone_no, visitor_id))
+            mysql.connection.commit()
+            response_cache.bump('Visitor')
+            flash('Visitor updated successfully.', 'success')
+        except Exception as e:
+            mysql.connection.rollback()
+            flash(f"Error updating visitor: {str(e)}", "danger")
+        finally:
+            cursor.close()
+            
+        return redirect(url_for('visitors'))
+
+    # --- GET request: Show the pre-filled form ---
+    try:
+        cursor.execute("SELECT * FROM Visitor WHERE visitor_id = %s", [visitor_id])
+        visitor = cursor.fetchone()
+        if not visitor:
+            flash('Visitor not found.', 'danger')
+            return redirect(url_for('visitors'))
+    except Exception as e:
+        flash(f"Error fetching visitor: {str(e)}", "danger")
+        return redirect(url_for('visitors'))
+    finally:
+        cursor.close()
+
+    return render_template('edit_visitor.html', visitor=visitor)
+
+@app.route('/veterinary')
+@requires_roles('Manager', 'Zookeeper', 'Veterinarian')
+@response_cache.cached('Veterinary_Status', 'Animal', 'Employee')
+def view_veterinary_records():
+    """
+    Displays the list of all veterinary records, newest first and paginated.
+    Uses JOINs to show animal and vet names.
+    """
+    # This query JOINS 3 tables to get all the info we need
+    return render_listing('veterinary.html', 'records', """
+            SELECT 
+                V.record_id,
+                V.checkup_date,
+                V.status,
+                V.notes,
+                A.name AS animal_name,
+                E.name AS vet_name
+            FROM Veterinary_Status V
+            JOIN Animal A ON V.animal_id = A.animal_id
+            JOIN Employee E ON V.vet_id = E.employee_id
+        """, VET_RECORD_KEYSET, 'veterinary records',
+        ['record_id', 'checkup_date', 'animal_name', 'vet_name', 'status', 'notes'])
+
+@app.route('/veterinary/history', methods=['POST'])
+@requires_roles('Manager', 'Zookeeper', 'Veterinarian')
+def queue_vet_history():
+    """
+    Queues the veterinary history report, for every animal or just the
+    posted animal_id (archived records on request).
+    """
+    animal_id = request.form.get('animal_id', type=int)
+    try:
+        options = history_options()
+    except ValueError:
+        flash('Error: Date must be in YYYY-MM-DD format.', 'danger')
+        return redirect(url_for('view_veterinary_records'))
+    return queue_report('vet_history', animal_id=animal_id, **options)
+
+@app.route('/add_vet_record', methods=['GET', 'POST'])
+@requires_roles('Manager', 'Zookeeper', 'Veterinarian')
+def add_vet_record():
+    """
+    Handles adding a new veterinary record (GET for form, POST for submission).
+    The animal is picked with the typeahead search instead of a full dropdown.
+    """
+    if request.method == 'POST':
+        # Get data from the form
+        p_record_id = request.form.get('record_id')
+        p_animal_id = request.form.get('animal_id')
+        p_vet_id = request.form.get('vet_id')
+        p_checkup_date = request.form.get('checkup_date')
+        p_status = request.form.get('status')
+        p_notes = request.form.get('notes')
+
+        # --- Basic Validation ---
+        error = validate_vet_record(request.form)
+        
+        if error:
+            flash(error, 'danger')
+        else:
+            # --- Insert into DB ---
+            cursor = mysql.connection.cursor()
+            try:
+                cursor.execute("""
+                    INSERT INTO Veterinary_Status (record_id, animal_id, vet_id, checkup_date, status, notes)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """, (p_record_id, p_animal_id, p_vet_id, p_checkup_date, p_status, p_notes))
+                
+                mysql.connection.commit()
+                response_cache.bump('Veterinary_Status')
+                flash('New veterinary record added successfully!', 'success')
+                return redirect(url_for('view_veterinary_records'))
+                
+            except Exception as e:
+                mysql.connection.rollback()
+                # Check for duplicate primary key
+                if "1062" in str(e) or "duplicate entry" in str(e).lower():
+                     flash('Error: A record with this ID already exists.', 'danger')
+                else:
+                    flash(f'Database Error: {str(e)}', 'danger')
+            finally:
+                cursor.close()
+
+    # --- GET Request (or a failed POST): Show the form ---
+    try:
+        vets = vet_choices()
+    except Exception as e:
+        flash(f"Error fetching data for form: {str(e)}", "danger")
+        vets = []
+        
+    return render_template('add_vet_record.html', vets=vets)
+
+@app.route('/animals/search')
+@requires_roles('Manager', 'Zookeeper', 'Veterinarian')
+def animal_search():
+    """Typeahead for the animal pickers: ?q=<name prefix or ID> -> JSON list of matches."""
+    term = request.args.get('q', '').strip()
+    if not term:
+        return jsonify([])
+    limit = max(1, min(request.args.get('limit', app.config['ANIMAL_SEARCH_LIMIT'], type=int),
+                       app.config['ANIMAL_SEARCH_LIMIT']))
+    return jsonify(list(search_animals(term, limit)))
+
+# --- BATCH INGESTION API ---
+
+# Who may post each kind of record
+INGEST_ROLES = {
+    'vet_records': ('Manager', 'Zookeeper', 'Veterinarian'),
+    'feedings': ('Manager', 'Zookeeper'),
+}
+
+@app.route('/api/ingest/<entity>', methods=['POST'])
+@requires_roles('Manager', 'Zookeeper', 'Veterinarian')
+def api_ingest(entity):
+    """
+    Accepts a JSON list of vet records or feedings (or {"rows": [...]}),
+    with the same fields as the import files. Answers 400 with the rejected
+    rows if any row is invalid, and buffers none of them: a 202 means every
+    row will be written (in a later batch).
+    """
+    if entity not in INGEST_ROLES:
+        abort(404)
+    if session.get('role') not in INGEST_ROLES[entity]:
+        abort(403)
+    body = request.get_json(silent=True)
+    rows = body.get('rows') if isinstance(body, dict) else body
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        return jsonify(error='Send a JSON list of records, or {"rows": [...]}.'), 400
+
+    accepted, rejected = [], []
+    for index, row in enumerate(rows):
+        values, error = bulk_import.prepare_row(bulk_import.ENTITIES[entity], row)
+        if error:
+            rejected.append({'index': index, 'error': error})
+        else:
+            accepted.append(values)
+    if rejected:
+        return jsonify(error='Some records are invalid; none were accepted.', rejected=rejected), 400
+    buffered = 0
+    if accepted:
+        try:
+            buffered = write_buffer.submit(entity, accepted)
+        except ValueError as e:
+            return jsonify(error=str(e)), 413
+        except BufferFull as e:
+            response = jsonify(error=str(e))
+            response.status_code = 503
+            response.headers['Retry-After'] = str(max(1, round(app.config['WRITE_BUFFER_FLUSH_INTERVAL'])))
+            return response
+    return jsonify(accepted=len(accepted), rejected=rejected, buffered=buffered), 202
+
+@app.route('/admin/write_buffer')
+@requires_roles('Manager')
+def write_buffer_stats():
+    """Returns this worker's write buffer depth and flush counts as JSON."""
+    return jsonify(write_buffer.stats())
+
+# --- SEARCH API ---
+
+@app.route('/api/animals')
+@requires_roles('Manager', 'Zookeeper')
+@response_cache.cached('Animal', 'Habitat')
+def api_animals():
+    """
+    Filtered animal search as JSON, with the same filters as /animals.
+    ?after=<next_cursor> fetches the next page.
+    """
+    return search_listing(ANIMAL_LISTING_SQL, ANIMAL_KEYSET, ANIMAL_FILTERS, ANIMAL_COLUMNS)
+
+@app.route('/api/visitors')
+@requires_roles('Manager')
+@response_cache.cached('Visitor')
+def api_visitors():
+    """
+    Filtered visitor search as JSON: ?name= (first or last name prefix),
+    ?l_name=, ?f_name=, ?phone= (prefixes), ?min_age=, ?max_age=.
+    """
+    return search_listing("SELECT * FROM Visitor", VISITOR_KEYSET, VISITOR_FILTERS, VISITOR_COLUMNS)
+
+# --- End of routes ---
+
+if __name__ == '__main__':
+    create_app().run(debug=True)
+
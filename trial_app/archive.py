@@ -0,0 +1,212 @@
+"""
+Hot/cold split of the history tables (migrations/008_history_archive.sql).
+
+move_history(conn, cutoff) moves everything dated before `cutoff` out of
+the live tables, in transactions of `batch_size` rows:
+- tickets, with their visitor's visits, into Ticket_Archive / Visits_Archive
+- veterinary records into Veterinary_Status_Archive
+
+A batch is copied and deleted in the same transaction, so every row is in
+exactly one of the two tables at any time and an interrupted run can just
+be started again. Archived tickets stay in Ticket_Daily_Rollup.
+
+Reports that want the archived rows too read from history_source():
+
+    source, params = history_source('Veterinary_Status', include_archive=True,
+                                    conditions=['checkup_date >= %s'], params=[since])
+    sql = f"SELECT ... FROM {source} V JOIN Animal A ON ..."
+
+The archives are partitioned by year, so a date condition limits the
+archive side to the years it covers.
+"""
+from datetime import timedelta
+
+# live table -> (archive table, date column, columns in both)
+ARCHIVES = {
+    'Ticket': ('Ticket_Archive', 'date',
+               ['ticket_id', 'transaction_id', 'price', 'date', 'pay_mode', 'visitor_id']),
+    'Veterinary_Status': ('Veterinary_Status_Archive', 'checkup_date',
+                          ['record_id', 'animal_id', 'vet_id', 'checkup_date', 'status', 'notes']),
+}
+
+
+def history_source(table, include_archive=False, conditions=(), params=()):
+    """
+    A derived table of `table`'s rows matching `conditions` (on bare column
+    names), with the archived rows added if include_archive is set. Returns
+    (sql, params); the caller gives the source an alias.
+    """
+    archive_table, _, columns = ARCHIVES[table]
+    column_list = ", ".join(columns)
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    parts = [f"SELECT {column_list} FROM {table}{where}"]
+    if include_archive:
+        parts.append(f"SELECT {column_list} FROM {archive_table}{where}")
+    return "(" + " UNION ALL ".join(parts) + ")", list(params) * len(parts)
+
+
+# --- Partitions ---
+
+def year_partitions(conn, archive_table):
+    """The years that have their own partition in `archive_table`, oldest first."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT PARTITION_NAME AS name
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME <> 'p_future'
+        """, [archive_table])
+        return sorted(int(row['name'][1:]) for row in cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+def add_year_partitions(conn, archive_table, first_year, last_year):
+    """
+    Splits a partition per year off p_future, up to and including
+    `last_year`. first_year only matters for an archive with no year
+    partitions yet. Returns the years added.
+    """
+    existing = year_partitions(conn, archive_table)
+    years = list(range(existing[-1] + 1 if existing else first_year, last_year + 1))
+    if years:
+        partitions = ", ".join(f"PARTITION p{year} VALUES LESS THAN ('{year + 1}-01-01')" for year in years)
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"""
+                ALTER TABLE {archive_table} REORGANIZE PARTITION p_future INTO
+                ({partitions}, PARTITION p_future VALUES LESS THAN (MAXVALUE))
+            """)
+        finally:
+            cursor.close()
+    return years
+
+
+def _prepare_partitions(conn, cutoff):
+    """Adds the partitions for every year that has rows to move before `cutoff`."""
+    last_year = (cutoff - timedelta(days=1)).year
+    for table, (archive_table, date_column, _) in ARCHIVES.items():
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT YEAR(MIN({date_column})) AS first_year FROM {table} WHERE {date_column} < %s",
+                           [cutoff])
+            first_year = cursor.fetchone()['first_year']
+        finally:
+            cursor.close()
+        if first_year is not None:
+            add_year_partitions(conn, archive_table, first_year, last_year)
+
+
+# --- Moving rows ---
+
+def _move_tickets(cursor, cutoff, batch_size):
+    cursor.execute("""
+        SELECT ticket_id FROM Ticket
+        WHERE date < %s
+        ORDER BY date, ticket_id
+        LIMIT %s
+        FOR UPDATE
+    """, [cutoff, batch_size])
+    ids = [row['ticket_id'] for row in cursor.fetchall()]
+    if not ids:
+        return {}
+    # A visitor's visits go with their ticket
+    cursor.execute("""
+        INSERT INTO Visits_Archive (visitor_id, animal_id, visit_date)
+        SELECT V.visitor_id, V.animal_id, T.date
+        FROM Visits V
+        JOIN Ticket T ON T.visitor_id = V.visitor_id
+        WHERE T.ticket_id IN %s
+    """, [ids])
+    visits = cursor.rowcount
+    cursor.execute("""
+        DELETE V FROM Visits V
+        JOIN Ticket T ON T.visitor_id = V.visitor_id
+        WHERE T.ticket_id IN %s
+    """, [ids])
+    cursor.execute("""
+        INSERT INTO Ticket_Archive (ticket_id, transaction_id, price, date, pay_mode, visitor_id)
+        SELECT ticket_id, transaction_id, price, date, pay_mode, visitor_id
+        FROM Ticket
+        WHERE ticket_id IN %s
+    """, [ids])
+    # Tells trg_After_Ticket_Delete to leave the rollup alone
+    cursor.execute("SET @zoo_archiving = 1")
+    try:
+        cursor.execute("DELETE FROM Ticket WHERE ticket_id IN %s", [ids])
+    finally:
+        cursor.execute("SET @zoo_archiving = NULL")
+    return {'Ticket': len(ids), 'Visits': visits}
+
+
+def _move_vet_records(cursor, cutoff, batch_size):
+    cursor.execute("""
+        SELECT record_id FROM Veterinary_Status
+        WHERE checkup_date < %s
+        ORDER BY checkup_date, record_id
+        LIMIT %s
+        FOR UPDATE
+    """, [cutoff, batch_size])
+    ids = [row['record_id'] for row in cursor.fetchall()]
+    if not ids:
+        return {}
+    cursor.execute("""
+        INSERT INTO Veterinary_Status_Archive (record_id, animal_id, vet_id, checkup_date, status, notes)
+        SELECT record_id, animal_id, vet_id, checkup_date, status, notes
+        FROM Veterinary_Status
+        WHERE record_id IN %s
+    """, [ids])
+    cursor.execute("DELETE FROM Veterinary_Status WHERE record_id IN %s", [ids])
+    return {'Veterinary_Status': len(ids)}
+
+
+def _run_batch(conn, move, cutoff, batch_size):
+    cursor = conn.cursor()
+    try:
+        moved = move(cursor, cutoff, batch_size)
+        conn.commit()
+        return moved
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def move_history(conn, cutoff, batch_size=1000, on_batch=None):
+    """
+    Archives every ticket (with its visits) and veterinary record dated
+    before `cutoff` (a date). Calls on_batch(counts) after each committed
+    batch. Returns the rows moved per live table.
+    """
+    _prepare_partitions(conn, cutoff)
+    totals = {'Ticket': 0, 'Visits': 0, 'Veterinary_Status': 0}
+    for move in (_move_tickets, _move_vet_records):
+        while True:
+            moved = _run_batch(conn, move, cutoff, batch_size)
+            if not moved:
+                break
+            for table, count in moved.items():
+                totals[table] += count
+            if on_batch:
+                on_batch(moved)
+    return totals
+
+
+def count_history(conn, cutoff):
+    """How many rows move_history(conn, cutoff) would move, per live table."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) AS n FROM Ticket WHERE date < %s", [cutoff])
+        tickets = cursor.fetchone()['n']
+        cursor.execute("""
+            SELECT COUNT(*) AS n FROM Visits V
+            JOIN Ticket T ON T.visitor_id = V.visitor_id
+            WHERE T.date < %s
+        """, [cutoff])
+        visits = cursor.fetchone()['n']
+        cursor.execute("SELECT COUNT(*) AS n FROM Veterinary_Status WHERE checkup_date < %s", [cutoff])
+        records = cursor.fetchone()['n']
+    finally:
+        cursor.close()
+    return {'Ticket': tickets, 'Visits': visits, 'Veterinary_Status': records}
@@ -0,0 +1,71 @@
+"""
+ASGI entry point, for serving the app with an ASGI server:
+
+    uvicorn asgi:asgi_app --workers 4
+    hypercorn asgi:asgi_app
+
+The same app still runs under any WSGI server (flask --app app:create_app run,
+gunicorn 'app:create_app()'); async views such as /dashboard work in both modes.
+
+asgiref's WsgiToAsgi runs every request on one shared thread per process,
+so a worker would serve its requests one at a time. ThreadPoolWsgiToAsgi
+runs them on a pool of ASGI_THREADS threads instead.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+from app import create_app
+
+
+class ThreadPoolWsgiToAsgi(WsgiToAsgi):
+    """WsgiToAsgi that runs each request on a thread of its own pool."""
+
+    def __init__(self, wsgi_application, max_workers=10):
+        super().__init__(wsgi_application)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='asgi-request')
+
+    async def __call__(self, scope, receive, send):
+        await _PooledInstance(self.wsgi_application, self.executor)(scope, receive, send)
+
+
+class _PooledInstance(WsgiToAsgiInstance):
+
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def run_wsgi_app(self, body):
+        await sync_to_async(self._run_wsgi_app, thread_sensitive=False, executor=self.executor)(body)
+
+    # Copied from WsgiToAsgiInstance.run_wsgi_app in asgiref 3.8.1 (pinned in
+    # requirements.txt), plus closing the response so streamed ones clean up.
+    # Compare it with upstream before raising the pin.
+    def _run_wsgi_app(self, body):
+        """Runs the WSGI app on a pool thread and sends its response."""
+        environ = self.build_environ(self.scope, body)
+        bytes_sent = 0
+        output = self.wsgi_application(environ, self.start_response)
+        try:
+            for chunk in output:
+                if not self.response_started:
+                    self.response_started = True
+                    self.sync_send(self.response_start)
+                if self.response_content_length is not None:
+                    chunk = chunk[:self.response_content_length - bytes_sent]
+                self.sync_send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                bytes_sent += len(chunk)
+                if bytes_sent == self.response_content_length:
+                    break
+        finally:
+            if hasattr(output, 'close'):
+                output.close()
+        if not self.response_started:
+            self.response_started = True
+            self.sync_send(self.response_start)
+        self.sync_send({'type': 'http.response.body'})
+
+
+app = create_app()
+asgi_app = ThreadPoolWsgiToAsgi(app, max_workers=app.config['ASGI_THREADS'])
@@ -0,0 +1,90 @@
+"""
+Awaitable MySQL queries for async views, so independent queries overlap.
+
+Flask runs every async view in an event loop of its own, so a loop-bound
+driver pool (aiomysql and friends) can't be shared between requests.
+Instead each query borrows its own connection from the process-wide
+ConnectionPool and runs in a worker thread; MySQLdb releases the GIL while
+it waits on the server, so queries started together really run at the same
+time:
+
+    count, capacity = await asyncio.gather(
+        async_db.scalar("SELECT fn_GetTotalAnimalCount() AS n", 'n'),
+        async_db.scalar("SELECT fn_GetTotalCapacity() AS n", 'n'),
+    )
+
+Reads that can tolerate replica lag pass replica=True. execute() commits a
+single statement on its own primary connection; anything that must share a
+transaction keeps using the request's mysql.connection.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+
+class AsyncDB:
+    """Async query helpers over a MySQLPool's connection pool."""
+
+    def __init__(self, mysql):
+        self.mysql = mysql
+
+    @asynccontextmanager
+    async def connection(self, replica=False):
+        """
+        Borrows a pooled connection of its own for the duration of the block.
+        With replica=True it comes from a read replica when MySQLPool would
+        route a read there, and from the primary otherwise.
+        """
+        acquired = await asyncio.to_thread(self.mysql.acquire_replica) if replica else None
+        if acquired is None:
+            pool = self.mysql.pool
+            started = time.perf_counter()
+            raw = await asyncio.to_thread(pool.acquire)
+            if self.mysql.wait_observer is not None:
+                self.mysql.wait_observer(time.perf_counter() - started)
+        else:
+            pool, raw = acquired
+        wrapper = self.mysql.connection_wrapper
+        try:
+            yield wrapper(raw) if wrapper else raw
+        finally:
+            await asyncio.to_thread(pool.release, raw)
+
+    async def fetch_all(self, sql, params=(), replica=False):
+        async with self.connection(replica) as conn:
+            return await asyncio.to_thread(_fetch_all, conn, sql, params)
+
+    async def fetch_one(self, sql, params=(), replica=False):
+        rows = await self.fetch_all(sql, params, replica)
+        return rows[0] if rows else None
+
+    async def scalar(self, sql, column, params=(), replica=False):
+        """Runs a single-row query and returns one of its columns."""
+        return (await self.fetch_one(sql, params, replica))[column]
+
+    async def execute(self, sql, params=()):
+        """Runs and commits one write statement. Returns the affected row count."""
+        async with self.connection() as conn:
+            return await asyncio.to_thread(_execute, conn, sql, params)
+
+
+def _fetch_all(conn, sql, params):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def _execute(conn, sql, params):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        conn.commit()
+        return cursor.rowcount
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
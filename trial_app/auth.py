@@ -0,0 +1,175 @@
+"""
+Declarative access control for the routes.
+
+    @app.route('/habitats')
+    @requires_roles('Manager')
+    def habitats(): ...
+
+The logged-in employee's role is read from a small in-process cache of
+Employee rows (principals) instead of trusting the role copied into the
+session at login, so a role change or a session revocation takes effect
+within AUTH_PRINCIPAL_TTL seconds without a DB query on every request.
+
+Sessions are revoked through Employee.session_epoch: login stores the
+current epoch in the session, and bumping it in the database invalidates
+every session issued before, in every worker.
+"""
+import inspect
+from functools import wraps
+
+from flask import current_app, flash, g, redirect, request, session, url_for
+
+from caching import TTLCache
+from session_backends import regenerate_session
+
+
+class EmployeeAuth:
+    """Holds the principal cache; registered as app.extensions['employee_auth']."""
+
+    def __init__(self, app=None, mysql=None):
+        self.mysql = mysql
+        self.principals = None
+        if app is not None:
+            self.init_app(app, mysql)
+
+    def init_app(self, app, mysql):
+        app.config.setdefault('AUTH_PRINCIPAL_TTL', 30.0)
+        app.config.setdefault('AUTH_PRINCIPAL_CACHE_SIZE', 1024)
+        self.mysql = mysql
+        self.principals = TTLCache(
+            maxsize=int(app.config['AUTH_PRINCIPAL_CACHE_SIZE']),
+            ttl=float(app.config['AUTH_PRINCIPAL_TTL']),
+        )
+        app.extensions['employee_auth'] = self
+
+    def _load(self, employee_id):
+        cursor = self.mysql.connection.cursor()
+        try:
+            cursor.execute(
+                'SELECT employee_id, username, role, session_epoch FROM Employee WHERE employee_id = %s',
+                [employee_id]
+            )
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+
+    def principal(self, employee_id):
+        """The cached Employee row for `employee_id`, or None if it no longer exists."""
+        return self.principals.get_or_load(employee_id, lambda: self._load(employee_id))
+
+    def login(self, account):
+        """Starts a fresh session for an Employee row and warms the cache with it."""
+        regenerate_session(
+            loggedin=True,
+            id=account['employee_id'],
+            username=account['username'],
+            role=account['role'],
+            epoch=account['session_epoch'],
+        )
+        self.principals.set(account['employee_id'], {
+            'employee_id': account['employee_id'],
+            'username': account['username'],
+            'role': account['role'],
+            'session_epoch': account['session_epoch'],
+        })
+
+    @staticmethod
+    def logout():
+        """Ends the session; its id can't be used again."""
+        regenerate_session()
+
+    def invalidate(self, *employee_ids):
+        """Forgets cached principals (all of them if no ids are given)."""
+        if employee_ids:
+            self.principals.invalidate(*employee_ids)
+        else:
+            self.principals.clear()
+
+    def revoke_sessions(self, employee_ids=None):
+        """
+        Logs out every existing session of the given employees (or of
+        everyone if employee_ids is None). Returns the number of employees
+        affected. Other workers notice within AUTH_PRINCIPAL_TTL seconds.
+        """
+        ids = None if employee_ids is None else list(employee_ids)
+        if ids == []:
+            return 0
+        conn = self.mysql.connection
+        cursor = conn.cursor()
+        try:
+            if ids is None:
+                cursor.execute("UPDATE Employee SET session_epoch = session_epoch + 1")
+            else:
+                placeholders = ', '.join(['%s'] * len(ids))
+                cursor.execute(
+                    f"UPDATE Employee SET session_epoch = session_epoch + 1 WHERE employee_id IN ({placeholders})",
+                    ids
+                )
+            affected = cursor.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        if ids is None:
+            self.invalidate()
+        else:
+            self.invalidate(*ids)
+        return affected
+
+
+def current_auth():
+    return current_app.extensions['employee_auth']
+
+
+def _check_access(roles):
+    """None if the request may go ahead, otherwise the redirect to send instead."""
+    if 'loggedin' not in session:
+        return redirect(url_for('login'))
+
+    principal = current_auth().principal(session['id'])
+    if principal is None or principal['session_epoch'] != session.get('epoch'):
+        # Employee deleted or their sessions were revoked
+        session.clear()
+        return redirect(url_for('login'))
+
+    # Pick up role changes made since login (the navbar reads session.role)
+    if session.get('role') != principal['role']:
+        session['role'] = principal['role']
+    g.principal = principal
+
+    if roles and principal['role'] not in roles:
+        action = 'perform this action' if request.method == 'POST' else 'access this page'
+        flash(f'You do not have permission to {action}.', 'danger')
+        return redirect(url_for('dashboard'))
+    return None
+
+
+def requires_roles(*roles):
+    """
+    Route decorator: the user must be logged in with a live session and,
+    if any roles are given, hold one of them. Works on sync and async views.
+    """
+    def decorator(view):
+        if inspect.iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapped_async(*args, **kwargs):
+                denied = _check_access(roles)
+                if denied is not None:
+                    return denied
+                return await view(*args, **kwargs)
+            return wrapped_async
+
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            denied = _check_access(roles)
+            if denied is not None:
+                return denied
+            return view(*args, **kwargs)
+        return wrapped
+    return decorator
+
+
+# Any logged-in employee, whatever the role
+login_required = requires_roles()
@@ -0,0 +1,291 @@
+"""
+Benchmarks the hot/cold split of the history tables as history grows.
+
+For each history length it seeds a scratch database (default `zoo_bench`,
+dropped and re-created) with that many years of tickets, visits and vet
+checkups, all in the live tables, and times:
+- the old dashboard aggregate (GROUP BY date over every ticket), the last
+  30 days per day, the first /veterinary page and one animal's checkups
+- single-row INSERT + COMMIT latency into Ticket and Veterinary_Status
+then moves everything older than --keep-days into the archive tables with
+archive.move_history() and times the same again, plus a one-year read of
+the archive (partition-pruned) against reading all of it.
+
+Uses the DB_* settings from .env and the archive tables from migration 008.
+Run from trial_app/:
+
+    python benchmarks/bench_archive.py [--years 1,3,10] [--tickets-per-day 300]
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+import MySQLdb
+import MySQLdb.cursors
+from dotenv import load_dotenv
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+import archive  # noqa: E402
+
+MIGRATION = os.path.join(os.path.dirname(HERE), 'migrations', '008_history_archive.sql')
+
+# The live tables with the indexes from migration 004; no foreign keys, so
+# the seed doesn't need visitors, animals or employees
+SCHEMA = [
+    """CREATE TABLE Ticket (
+        ticket_id INT PRIMARY KEY,
+        transaction_id VARCHAR(50),
+        price DECIMAL(10,2),
+        date DATE,
+        pay_mode VARCHAR(50),
+        visitor_id INT UNIQUE,
+        KEY idx_ticket_date (date)
+    )""",
+    """CREATE TABLE Visits (
+        visitor_id INT,
+        animal_id INT,
+        PRIMARY KEY (visitor_id, animal_id),
+        KEY idx_visits_animal (animal_id, visitor_id)
+    )""",
+    """CREATE TABLE Veterinary_Status (
+        record_id INT PRIMARY KEY,
+        animal_id INT,
+        vet_id INT,
+        checkup_date DATE,
+        status VARCHAR(50),
+        notes TEXT,
+        KEY idx_vet_animal_date (animal_id, checkup_date),
+        KEY idx_vet_date (checkup_date, record_id)
+    )""",
+]
+
+QUERIES = [
+    ('GROUP BY date, all tickets', """
+        SELECT date, AVG(price) AS average_price, COUNT(ticket_id) AS tickets_sold
+        FROM Ticket GROUP BY date ORDER BY date DESC
+    """, 'all'),
+    ('last 30 days per day', """
+        SELECT date, COUNT(*) AS tickets_sold, SUM(price) AS revenue
+        FROM Ticket WHERE date >= %s GROUP BY date
+    """, 'recent'),
+    ('/veterinary first page', """
+        SELECT record_id, checkup_date, status FROM Veterinary_Status
+        ORDER BY checkup_date DESC, record_id DESC LIMIT 51
+    """, None),
+    ("one animal's checkups", """
+        SELECT record_id, checkup_date, status FROM Veterinary_Status
+        WHERE animal_id = %s ORDER BY checkup_date
+    """, 'animal'),
+]
+
+INSERT_BATCH = 5000
+
+
+def connect(database=None):
+    kwargs = {
+        'host': os.environ.get('DB_HOST', 'localhost'),
+        'user': os.environ.get('DB_USER'),
+        'passwd': os.environ.get('DB_PASS') or '',
+        'cursorclass': MySQLdb.cursors.DictCursor,
+    }
+    if database:
+        kwargs['db'] = database
+    return MySQLdb.connect(**kwargs)
+
+
+def archive_schema():
+    """The CREATE TABLE statements of migration 008."""
+    with open(MIGRATION, encoding='utf-8') as f:
+        return re.findall(r"CREATE TABLE .*?\);", f.read(), re.S)
+
+
+def insert_all(conn, sql, rows):
+    cursor = conn.cursor()
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == INSERT_BATCH:
+            cursor.executemany(sql, batch)
+            conn.commit()
+            batch = []
+    if batch:
+        cursor.executemany(sql, batch)
+        conn.commit()
+    cursor.close()
+
+
+def seed(conn, days, end, tickets_per_day, checkups_per_day, animals, seed_value):
+    rng = random.Random(seed_value)
+    first = end - timedelta(days=days - 1)
+
+    def tickets():
+        ticket_id = 0
+        for offset in range(days):
+            day = first + timedelta(days=offset)
+            for _ in range(tickets_per_day):
+                ticket_id += 1
+                yield (ticket_id, f'TX{ticket_id}', rng.choice((10, 15, 25)), day,
+                       rng.choice(('Cash', 'Card')), ticket_id)
+
+    def visits():
+        for visitor_id in range(1, days * tickets_per_day + 1):
+            for animal_id in rng.sample(range(1, animals + 1), rng.randint(0, 3)):
+                yield (visitor_id, animal_id)
+
+    def checkups():
+        record_id = 0
+        for offset in range(days):
+            day = first + timedelta(days=offset)
+            for _ in range(checkups_per_day):
+                record_id += 1
+                yield (record_id, rng.randint(1, animals), rng.randint(1, 20), day,
+                       rng.choice(('Healthy', 'Under Observation', 'Sick')), 'Routine checkup')
+
+    insert_all(conn, "INSERT INTO Ticket VALUES (%s, %s, %s, %s, %s, %s)", tickets())
+    insert_all(conn, "INSERT INTO Visits VALUES (%s, %s)", visits())
+    insert_all(conn, "INSERT INTO Veterinary_Status VALUES (%s, %s, %s, %s, %s, %s)", checkups())
+    cursor = conn.cursor()
+    cursor.execute("ANALYZE TABLE Ticket, Visits, Veterinary_Status")
+    cursor.fetchall()
+    cursor.close()
+
+
+def time_query(conn, sql, params=None, repeat=5):
+    """Median wall time (ms) to run `sql` and fetch every row."""
+    cursor = conn.cursor()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    cursor.close()
+    return statistics.median(timings)
+
+
+def insert_latency(conn, end, count, ticket_id, record_id):
+    """Median ms of a single-row INSERT + COMMIT into Ticket and Veterinary_Status."""
+    cursor = conn.cursor()
+    tickets, records = [], []
+    for n in range(count):
+        started = time.perf_counter()
+        cursor.execute("INSERT INTO Ticket VALUES (%s, %s, %s, %s, %s, %s)",
+                       (ticket_id + n, f'TX{ticket_id + n}', 15, end, 'Card', ticket_id + n))
+        conn.commit()
+        tickets.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        cursor.execute("INSERT INTO Veterinary_Status VALUES (%s, %s, %s, %s, %s, %s)",
+                       (record_id + n, 1, 1, end, 'Healthy', 'Benchmark'))
+        conn.commit()
+        records.append((time.perf_counter() - started) * 1000)
+    cursor.close()
+    return statistics.median(tickets), statistics.median(records)
+
+
+def measure(conn, params, end, inserts, ticket_id, record_id, repeat):
+    results = {label: time_query(conn, sql, params[kind] if kind else None, repeat)
+               for label, sql, kind in QUERIES}
+    results['Ticket insert'], results['Veterinary_Status insert'] = insert_latency(
+        conn, end, inserts, ticket_id, record_id)
+    return results
+
+
+def archive_reads(conn, year, repeat):
+    """A year of archived checkups (pruned) against the whole archive, and the partitions each reads."""
+    results = []
+    for label, conditions, params in (
+            (f'archive, {year} only', ['checkup_date >= %s', 'checkup_date < %s'],
+             [date(year, 1, 1), date(year + 1, 1, 1)]),
+            ('archive, all years', [], [])):
+        conditions = conditions + ['animal_id = %s']
+        params = params + [1]
+        source, args = archive.history_source('Veterinary_Status', True, conditions, params)
+        sql = f"SELECT record_id, checkup_date, status FROM {source} V ORDER BY checkup_date"
+        cursor = conn.cursor()
+        cursor.execute("EXPLAIN " + sql, args)
+        partitions = next((row['partitions'] for row in cursor.fetchall()
+                           if row['table'] == 'Veterinary_Status_Archive'), None)
+        cursor.close()
+        results.append((label, time_query(conn, sql, args, repeat), partitions))
+    return results
+
+
+def run_size(database, years, args):
+    admin = connect()
+    cursor = admin.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+    cursor.execute(f"CREATE DATABASE `{database}`")
+    cursor.close()
+    admin.close()
+
+    conn = connect(database)
+    cursor = conn.cursor()
+    for statement in SCHEMA + archive_schema():
+        cursor.execute(statement)
+    cursor.close()
+
+    end = date(2025, 10, 31)
+    days = years * 365
+    seed(conn, days, end, args.tickets_per_day, args.checkups_per_day, args.animals, args.seed)
+    params = {'recent': [end - timedelta(days=30)], 'animal': [1], 'all': None}
+    ticket_id = days * args.tickets_per_day + 1
+    record_id = days * args.checkups_per_day + 1
+
+    before = measure(conn, params, end, args.inserts, ticket_id, record_id, args.repeat)
+
+    started = time.perf_counter()
+    moved = archive.move_history(conn, end - timedelta(days=args.keep_days), batch_size=args.batch_size)
+    archive_seconds = time.perf_counter() - started
+    cursor = conn.cursor()
+    cursor.execute("ANALYZE TABLE Ticket, Visits, Veterinary_Status")
+    cursor.fetchall()
+    cursor.close()
+
+    after = measure(conn, params, end, args.inserts, ticket_id + args.inserts, record_id + args.inserts,
+                    args.repeat)
+    reads = archive_reads(conn, end.year - 1, args.repeat) if moved['Veterinary_Status'] else []
+    conn.close()
+    return before, after, moved, archive_seconds, reads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--years', default='1,3,10', help='Comma-separated history lengths.')
+    parser.add_argument('--tickets-per-day', type=int, default=300)
+    parser.add_argument('--checkups-per-day', type=int, default=30)
+    parser.add_argument('--animals', type=int, default=500)
+    parser.add_argument('--keep-days', type=int, default=180, help='Retention window left in the live tables.')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--inserts', type=int, default=200, help='Single-row inserts timed per table.')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database', default='zoo_bench')
+    parser.add_argument('--keep', action='store_true', help="Don't drop the scratch database afterwards.")
+    args = parser.parse_args()
+
+    load_dotenv()
+    for years in (int(value) for value in args.years.split(',')):
+        before, after, moved, archive_seconds, reads = run_size(args.database, years, args)
+        print(f"\n{years} year(s) of history; archived {moved['Ticket']} tickets, {moved['Visits']} visits, "
+              f"{moved['Veterinary_Status']} vet records in {archive_seconds:.1f} s")
+        print(f"{'':<30}{'all live ms':>13}{'archived ms':>13}")
+        for label in before:
+            print(f"{label:<30}{before[label]:>13.2f}{after[label]:>13.2f}")
+        for label, ms, partitions in reads:
+            print(f"{label:<30}{ms:>13.2f}   partitions read: {partitions}")
+
+    if not args.keep:
+        conn = connect()
+        cursor = conn.cursor()
+        cursor.execute(f"DROP DATABASE IF EXISTS `{args.database}`")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
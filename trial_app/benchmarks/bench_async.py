@@ -0,0 +1,170 @@
+"""
+Compares manager-dashboard throughput when served over WSGI and over ASGI.
+
+Starts the app in-process behind a threaded WSGI server (wsgiref), behind
+uvicorn with asgi.py's thread-pooled adapter ('asgi') and behind uvicorn
+with asgiref's plain WsgiToAsgi ('asgi-shared', one request thread per
+process), then has N concurrent clients log in as the datagen manager and
+load /dashboard repeatedly. uvicorn is in requirements.txt. The
+dashboard cache is disabled (DASHBOARD_CACHE_TTL=0) unless --cache is given,
+so every request runs its three queries.
+
+Before that it checks the two adapters alone, without MySQL: N concurrent
+requests to a WSGI app that sleeps --sleep seconds (standing in for a
+request waiting on the database) should take about --sleep seconds in
+total, not N times that. Run from trial_app/:
+
+    python benchmarks/bench_async.py [--concurrency 1,8,32] [--requests 200]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_uvicorn(shared=False):
+    import uvicorn
+    from asgiref.wsgi import WsgiToAsgi
+
+    from asgi import app, asgi_app
+
+    port = free_port()
+    served = WsgiToAsgi(app) if shared else asgi_app
+    server = uvicorn.Server(uvicorn.Config(served, host='127.0.0.1', port=port, log_level='warning'))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def adapter_check(concurrency, sleep):
+    """Seconds for `concurrency` simultaneous requests to a sleeping WSGI app, per adapter."""
+    from asgiref.wsgi import WsgiToAsgi
+
+    from asgi import ThreadPoolWsgiToAsgi
+
+    def slow_app(environ, start_response):
+        time.sleep(sleep)
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [b'ok']
+
+    async def request(adapter):
+        scope = {'type': 'http', 'method': 'GET', 'path': '/', 'query_string': b'',
+                 'http_version': '1.1', 'headers': []}
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            pass
+
+        await adapter(scope, receive, send)
+
+    async def burst(adapter):
+        started = time.perf_counter()
+        await asyncio.gather(*(request(adapter) for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+    return {
+        'asgi-shared': asyncio.run(burst(WsgiToAsgi(slow_app))),
+        'asgi': asyncio.run(burst(ThreadPoolWsgiToAsgi(slow_app, max_workers=concurrency))),
+    }
+
+
+def run(base_url, concurrency, requests, username, password):
+    from load_test import HttpClient, percentile
+
+    timings, errors = [], []
+
+    def client():
+        http = HttpClient(base_url)
+        if http.request('POST', '/login', {'username': username, 'password': password}) != 302:
+            errors.append('login')
+            return
+        for _ in range(requests):
+            started = time.perf_counter()
+            status = http.request('GET', '/dashboard')
+            timings.append(time.perf_counter() - started)
+            if status != 200:
+                errors.append(status)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    timings.sort()
+    return {
+        'requests_per_sec': len(timings) / elapsed,
+        'p50_ms': percentile(timings, 50) * 1000,
+        'p95_ms': percentile(timings, 95) * 1000,
+        'errors': len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--concurrency', default='1,8,32', help='Comma-separated client counts.')
+    parser.add_argument('--requests', type=int, default=200, help='Dashboard loads per client.')
+    parser.add_argument('--modes', default='wsgi,asgi,asgi-shared')
+    parser.add_argument('--sleep', type=float, default=0.5, help='Seconds each adapter-check request takes.')
+    parser.add_argument('--cache', action='store_true', help='Keep the dashboard cache on.')
+    parser.add_argument('--username', default='bench_manager')
+    parser.add_argument('--password', default='bench123')
+    args = parser.parse_args()
+
+    if not args.cache:
+        os.environ['DASHBOARD_CACHE_TTL'] = '0'
+    from load_test import start_server
+
+    concurrency_levels = [int(value) for value in args.concurrency.split(',')]
+    print(f"Adapter check: concurrent requests that each take {args.sleep:.2f} s")
+    print(f"{'clients':>8}{'asgi-shared s':>15}{'asgi s':>10}")
+    for concurrency in concurrency_levels:
+        seconds = adapter_check(concurrency, args.sleep)
+        print(f"{concurrency:>8}{seconds['asgi-shared']:>15.2f}{seconds['asgi']:>10.2f}")
+    print()
+
+    servers = {}
+    for mode in args.modes.split(','):
+        if mode == 'wsgi':
+            servers[mode] = start_server()
+        elif mode in ('asgi', 'asgi-shared'):
+            try:
+                servers[mode] = start_uvicorn(shared=mode == 'asgi-shared')
+            except ImportError:
+                print(f"Skipping {mode}: uvicorn is not installed.")
+        else:
+            parser.error(f"Unknown mode {mode!r}; use wsgi, asgi and/or asgi-shared.")
+
+    print(f"{'mode':<12}{'clients':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+    for concurrency in concurrency_levels:
+        for mode, (_, base_url) in servers.items():
+            r = run(base_url, concurrency, args.requests, args.username, args.password)
+            print(f"{mode:<12}{concurrency:>8}{r['requests_per_sec']:>10.1f}{r['p50_ms']:>10.1f}"
+                  f"{r['p95_ms']:>10.1f}{r['errors']:>8}")
+
+    for mode, (server, _) in servers.items():
+        if mode == 'wsgi':
+            server.shutdown()
+        else:
+            server.should_exit = True
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Times recording feedings three ways:
+- per row:  one INSERT and one commit per feeding, like the add_vet_record form
+- batched:  bulk_import.insert_batch, one multi-row transaction per --batch-size rows
+- endpoint: POST /api/ingest/feedings through the test client, --request-size
+            feedings per request, timed until the write buffer has flushed them
+
+Needs a database with data from benchmarks/datagen.py, at least one Diet
+row, migration 007 applied and the app's usual .env. The benchmark's
+feedings are dated 2000-01-01 and deleted afterwards. Run from trial_app/:
+
+    python benchmarks/bench_ingest.py [--rows 20000] [--batch-size 500] [--request-size 1000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+import bulk_import  # noqa: E402
+from app import create_app, mysql, write_buffer  # noqa: E402
+from datagen import ACCOUNTS  # noqa: E402
+
+app = create_app()
+
+MARKER = '2000-01-01 00:00:00'
+
+
+def feedings(animal_ids, diet_ids, count, seed=42):
+    rng = random.Random(seed)
+    return [{'animal_id': rng.choice(animal_ids), 'diet_id': rng.choice(diet_ids),
+             'date_time': MARKER, 'qty': rng.randint(1, 20)} for _ in range(count)]
+
+
+def cleanup(conn):
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM Feeding_Log WHERE date_time = %s", [MARKER])
+    conn.commit()
+    cursor.close()
+
+
+def per_row(conn, rows):
+    entity = bulk_import.ENTITIES['feedings']
+    cursor = conn.cursor()
+    for row in rows:
+        values, _ = bulk_import.prepare_row(entity, row)
+        cursor.execute(entity.insert_sql, values)
+        conn.commit()
+    cursor.close()
+
+
+def batched(conn, rows, batch_size):
+    entity = bulk_import.ENTITIES['feedings']
+    batch = [(n, bulk_import.prepare_row(entity, row)[0]) for n, row in enumerate(rows)]
+    report = bulk_import.ImportReport('feedings')
+    for start in range(0, len(batch), batch_size):
+        bulk_import.insert_batch(conn, entity, batch[start:start + batch_size], report)
+    return report
+
+
+def endpoint(rows, request_size):
+    client = app.test_client()
+    username = next(name for name, (role, _) in ACCOUNTS.items() if role == 'Zookeeper')
+    client.post('/login', data={'username': username, 'password': ACCOUNTS[username][1]})
+    done = write_buffer.flushed + write_buffer.rejected + len(rows)
+    busy = 0
+    for start in range(0, len(rows), request_size):
+        while True:
+            response = client.post('/api/ingest/feedings', json=rows[start:start + request_size])
+            if response.status_code != 503:
+                break
+            busy += 1
+            time.sleep(0.05)
+        if response.status_code != 202:
+            raise SystemExit(f"/api/ingest/feedings answered {response.status_code}: {response.get_data(as_text=True)}")
+    while write_buffer.flushed + write_buffer.rejected < done:
+        time.sleep(0.01)
+    return busy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--request-size', type=int, default=1000, help='Feedings per POST to the endpoint.')
+    parser.add_argument('--skip-per-row', action='store_true', help='The per-row run is slow on big --rows.')
+    args = parser.parse_args()
+
+    with app.app_context():
+        conn = mysql.connection
+        cursor = conn.cursor()
+        cursor.execute("SELECT animal_id FROM Animal")
+        animal_ids = [row['animal_id'] for row in cursor.fetchall()]
+        cursor.execute("SELECT diet_id FROM Diet")
+        diet_ids = [row['diet_id'] for row in cursor.fetchall()]
+        cursor.close()
+        if not animal_ids or not diet_ids:
+            raise SystemExit("Needs at least one Animal and one Diet row.")
+        rows = feedings(animal_ids, diet_ids, args.rows)
+
+        print(f"{'method':<12}{'rows':>8}{'seconds':>10}{'rows/s':>10}")
+        runs = [] if args.skip_per_row else [('per row', lambda: per_row(conn, rows))]
+        runs += [('batched', lambda: batched(conn, rows, args.batch_size))]
+        for name, run in runs:
+            cleanup(conn)
+            started = time.perf_counter()
+            run()
+            seconds = time.perf_counter() - started
+            print(f"{name:<12}{len(rows):>8}{seconds:>10.2f}{len(rows) / seconds:>10.0f}")
+        cleanup(conn)
+
+    started = time.perf_counter()
+    busy = endpoint(rows, args.request_size)
+    seconds = time.perf_counter() - started
+    print(f"{'endpoint':<12}{len(rows):>8}{seconds:>10.2f}{len(rows) / seconds:>10.0f}"
+          f"  ({busy} request(s) answered 503 and were retried)")
+    with app.app_context():
+        cleanup(mysql.connection)
+
+
+if __name__ == '__main__':
+    main()
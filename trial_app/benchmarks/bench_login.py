@@ -0,0 +1,77 @@
+"""
+Times Argon2id password checks at several cost settings and concurrency levels.
+
+Each setting hashes a password once, then `--concurrency` clients verify it
+repeatedly through a thread pool of LOGIN_HASH_WORKERS threads, the way
+login() does. Pick the highest cost whose p99 stays within --budget-ms and
+set PASSWORD_TIME_COST / PASSWORD_MEMORY_COST accordingly. No database is
+needed. Run from trial_app/:
+
+    python benchmarks/bench_login.py [--time-costs 1,2,3] [--memory-costs 19456,65536] [--budget-ms 250]
+"""
+import argparse
+import itertools
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from argon2 import PasswordHasher
+
+
+def percentile(sorted_values, pct):
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def run(time_cost, memory_cost, parallelism, workers, concurrency, logins):
+    hasher = PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+    stored = hasher.hash('correct horse battery staple')
+    pool = ThreadPoolExecutor(max_workers=workers)
+
+    def client(_):
+        timings = []
+        for _ in range(logins):
+            started = time.perf_counter()
+            pool.submit(hasher.verify, stored, 'correct horse battery staple').result()
+            timings.append(time.perf_counter() - started)
+        return timings
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        timings = sorted(itertools.chain.from_iterable(clients.map(client, range(concurrency))))
+    elapsed = time.perf_counter() - started
+    pool.shutdown()
+    return {
+        'logins_per_sec': len(timings) / elapsed,
+        'p50_ms': statistics.median(timings) * 1000,
+        'p95_ms': percentile(timings, 95) * 1000,
+        'p99_ms': percentile(timings, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--time-costs', default='1,2,3')
+    parser.add_argument('--memory-costs', default='19456,65536', help='KiB.')
+    parser.add_argument('--parallelism', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('LOGIN_HASH_WORKERS', 4)),
+                        help='Hashing threads (LOGIN_HASH_WORKERS).')
+    parser.add_argument('--concurrency', default='1,8', help='Comma-separated concurrent logins.')
+    parser.add_argument('--logins', type=int, default=20, help='Logins per client.')
+    parser.add_argument('--budget-ms', type=float, default=250.0, help='Login p99 budget.')
+    args = parser.parse_args()
+
+    print(f"{'time':>5}{'memory KiB':>12}{'clients':>9}{'logins/s':>10}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  budget")
+    for time_cost in (int(value) for value in args.time_costs.split(',')):
+        for memory_cost in (int(value) for value in args.memory_costs.split(',')):
+            for concurrency in (int(value) for value in args.concurrency.split(',')):
+                r = run(time_cost, memory_cost, args.parallelism, args.workers, concurrency, args.logins)
+                verdict = 'ok' if r['p99_ms'] <= args.budget_ms else 'over'
+                print(f"{time_cost:>5}{memory_cost:>12}{concurrency:>9}{r['logins_per_sec']:>10.1f}"
+                      f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}  {verdict}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Times rendering the listing templates at 1k/10k/100k rows, without touching
+MySQL: the rows are synthetic.
+
+For each size it renders animals.html (and visitors.html) with
+- inline:  the old template, every row's markup written out in the loop
+- no cache: rows rendered through the rows.html macros, fragment cache off
+- cold:    through the fragment cache, starting empty
+- warm:    the same rows again, every fragment served from the cache
+and, separately, a small page with template auto-reload on and off. Run
+from trial_app/:
+
+    python benchmarks/bench_render.py [--sizes 1000,10000,100000] [--repeat 3]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+from flask import render_template, session  # noqa: E402
+
+from app import create_app, templating  # noqa: E402
+from caching import TTLCache  # noqa: E402
+
+app = create_app()
+
+# The animals table as it was rendered before rows.html
+INLINE_ANIMALS = """
+{% for animal in animals %}
+<tr>
+    <td>{{ animal.animal_name }}</td>
+    <td>{{ animal.species }}</td>
+    <td>{{ animal.gender }}</td>
+    <td>{{ animal.age }}</td>
+    <td>{{ animal.habitat_name }} ({{ animal.habitat_type }})</td>
+    <td>
+        <form action="{{ url_for('delete_animal') }}" method="POST"
+              onsubmit="return confirm('Are you sure you want to delete this animal?');"
+              style="display: inline;">
+            <input type="hidden" name="animal_id" value="{{ animal.animal_id }}">
+            <button type="submit" class="btn btn-danger btn-sm">Delete</button>
+        </form>
+    </td>
+</tr>
+{% endfor %}
+"""
+
+
+def animal_rows(count):
+    return [{
+        'animal_id': n, 'animal_name': f'Animal {n}', 'species': ('Lion', 'Zebra', 'Parrot')[n % 3],
+        'gender': ('Male', 'Female')[n % 2], 'age': n % 30, 'habitat_id': n % 20,
+        'habitat_name': f'Habitat {n % 20}', 'habitat_type': 'Savanna',
+    } for n in range(count)]
+
+
+def visitor_rows(count):
+    return [{'visitor_id': n, 'f_name': f'First{n}', 'l_name': f'Last{n}', 'age': 18 + n % 60,
+             'phone_no': f'555-{n:07d}'} for n in range(count)]
+
+
+def timed(render, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        render()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='1000,10000,100000', help='Comma-separated row counts.')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    page = {'next_cursor': None, 'limit': 50, 'filters': {}, 'habitats': []}
+    inline = app.jinja_env.from_string(INLINE_ANIMALS)
+    cache = TTLCache(maxsize=1_000_000, ttl=3600)
+
+    with app.test_request_context('/animals'):
+        session.update(loggedin=True, role='Manager', username='bench')
+
+        print(f"{'template':<16}{'rows':>8}{'inline ms':>11}{'no cache ms':>13}{'cold ms':>10}{'warm ms':>10}")
+        for size in (int(value) for value in args.sizes.split(',')):
+            for name, rows_name, rows in (('animals.html', 'animals', animal_rows(size)),
+                                          ('visitors.html', 'visitors', visitor_rows(size))):
+                context = dict(page, **{rows_name: rows})
+                inline_ms = timed(lambda: inline.render(animals=rows), args.repeat) \
+                    if rows_name == 'animals' else float('nan')
+
+                templating.rows = None
+                plain_ms = timed(lambda: render_template(name, **context), args.repeat)
+
+                templating.rows = cache
+                cold_ms = []
+                for _ in range(args.repeat):
+                    cache.clear()
+                    cold_ms.append(timed(lambda: render_template(name, **context), 1))
+                warm_ms = timed(lambda: render_template(name, **context), args.repeat)
+                print(f"{name:<16}{size:>8}{inline_ms:>11.1f}{plain_ms:>13.1f}"
+                      f"{statistics.median(cold_ms):>10.1f}{warm_ms:>10.1f}")
+
+        # Per-request overhead of checking template files for changes
+        small = dict(page, animals=animal_rows(20))
+        for reload in (True, False):
+            app.jinja_env.auto_reload = reload
+            ms = timed(lambda: [render_template('animals.html', **small) for _ in range(200)], args.repeat)
+            print(f"auto_reload={reload!s:<6} 200 renders of a 20-row page: {ms:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
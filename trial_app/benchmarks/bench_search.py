@@ -0,0 +1,101 @@
+"""
+Times the animal and visitor filters with and without the migration 006
+indexes, next to the old way of finding a row: fetching the whole table.
+
+Each filter's first page is built by the app's own FilterSet and keyset
+query builder; the "no index" column runs the same SQL with IGNORE INDEX
+on the new indexes. Needs a database with data from benchmarks/datagen.py,
+migration 006 applied and the app's usual .env. Run from trial_app/:
+
+    python benchmarks/bench_search.py [--repeat 5] [--limit 50]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+from app import (ANIMAL_FILTERS, ANIMAL_KEYSET, ANIMAL_LISTING_SQL, VISITOR_FILTERS,  # noqa: E402
+                 VISITOR_KEYSET, create_app, mysql)
+from pagination import build_query  # noqa: E402
+
+app = create_app()
+
+VISITOR_LISTING_SQL = "SELECT * FROM Visitor"
+ANIMAL_NO_INDEX = ANIMAL_LISTING_SQL.replace(
+    "FROM Animal A", "FROM Animal A IGNORE INDEX (idx_animal_species_name, idx_animal_habitat_name)")
+VISITOR_NO_INDEX = "SELECT * FROM Visitor IGNORE INDEX (idx_visitor_first_name, idx_visitor_phone)"
+
+
+def time_query(conn, sql, params, repeat):
+    timings = []
+    for _ in range(repeat):
+        cursor = conn.cursor()
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+        cursor.close()
+    return statistics.median(timings), len(rows)
+
+
+def sample_values(conn):
+    """Filter values that exist in the data set: a common species, a habitat, name prefixes."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT species, COUNT(*) AS n FROM Animal GROUP BY species ORDER BY n DESC LIMIT 1")
+    species = cursor.fetchone()['species']
+    cursor.execute("SELECT habitat_id FROM Animal GROUP BY habitat_id ORDER BY COUNT(*) DESC LIMIT 1")
+    habitat_id = cursor.fetchone()['habitat_id']
+    cursor.execute("SELECT f_name, l_name, phone_no FROM Visitor ORDER BY visitor_id LIMIT 1")
+    visitor = cursor.fetchone()
+    cursor.close()
+    return species, habitat_id, visitor
+
+
+def cases(species, habitat_id, visitor):
+    yield 'animals', {'species': species}
+    yield 'animals', {'habitat_id': str(habitat_id)}
+    yield 'animals', {'species': species, 'min_age': '2', 'max_age': '6'}
+    yield 'animals', {'name': 'Ra'}
+    yield 'visitors', {'name': visitor['l_name'][:2]}
+    yield 'visitors', {'f_name': visitor['f_name'][:3], 'l_name': visitor['l_name'][:3]}
+    yield 'visitors', {'phone': visitor['phone_no'][:6]}
+    yield 'visitors', {'min_age': '30', 'max_age': '40'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--limit', type=int, default=50, help='Page size, as on the listing pages.')
+    args = parser.parse_args()
+
+    with app.app_context():
+        conn = mysql.connection
+        species, habitat_id, visitor = sample_values(conn)
+
+        print(f"{'listing':<10}{'filter':<40}{'rows':>6}{'indexed ms':>12}{'no index ms':>13}")
+        for listing, filters in cases(species, habitat_id, visitor):
+            if listing == 'animals':
+                filter_set, keyset, sql, no_index = ANIMAL_FILTERS, ANIMAL_KEYSET, ANIMAL_LISTING_SQL, ANIMAL_NO_INDEX
+            else:
+                filter_set, keyset, sql, no_index = VISITOR_FILTERS, VISITOR_KEYSET, VISITOR_LISTING_SQL, VISITOR_NO_INDEX
+            conditions, params, _ = filter_set.parse(filters)
+            indexed_sql, indexed_args = build_query(sql, keyset, None, args.limit, conditions, params)
+            plain_sql, plain_args = build_query(no_index, keyset, None, args.limit, conditions, params)
+            indexed_ms, rows = time_query(conn, indexed_sql, indexed_args, args.repeat)
+            plain_ms, _ = time_query(conn, plain_sql, plain_args, args.repeat)
+            label = '&'.join(f"{key}={value}" for key, value in filters.items())
+            print(f"{listing:<10}{label[:39]:<40}{rows:>6}{indexed_ms:>12.2f}{plain_ms:>13.2f}")
+
+        # The old way: load the whole listing and find the row in the browser
+        for listing, sql, keyset in (('animals', ANIMAL_LISTING_SQL, ANIMAL_KEYSET),
+                                     ('visitors', VISITOR_LISTING_SQL, VISITOR_KEYSET)):
+            full_sql, full_args = build_query(sql, keyset)
+            full_ms, rows = time_query(conn, full_sql, full_args, args.repeat)
+            print(f"{listing:<10}{'(whole table)':<40}{rows:>6}{full_ms:>12.2f}{'':>13}")
+
+
+if __name__ == '__main__':
+    main()
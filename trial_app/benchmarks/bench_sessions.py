@@ -0,0 +1,88 @@
+"""
+Compares the session backends on the app's real session payload.
+
+Each backend gets a tiny Flask app with a login route that stores the same
+four keys as login() and a page that does the routes' 'loggedin' check.
+Run from trial_app/:
+
+    python benchmarks/bench_sessions.py [--requests 5000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from flask import Flask, session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import session_backends  # noqa: E402
+
+
+def make_app(backend, session_dir):
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'benchmark-secret'
+    app.config['SESSION_BACKEND'] = backend
+    app.config['SESSION_FILE_DIR'] = session_dir
+    session_backends.init_app(app)
+
+    @app.route('/login')
+    def login():
+        session['loggedin'] = True
+        session['id'] = 1
+        session['username'] = 'ajohnson'
+        session['role'] = 'Manager'
+        return 'ok'
+
+    @app.route('/page')
+    def page():
+        if 'loggedin' not in session:
+            return 'login', 302
+        return session['role']
+
+    return app
+
+
+def run(backend, requests):
+    session_dir = tempfile.mkdtemp(prefix=f'bench-{backend}-')
+    try:
+        client = make_app(backend, session_dir).test_client()
+        client.get('/login')
+        cookie = client.get_cookie('session')
+        cookie_size = len(cookie.value) if cookie else 0
+
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = client.get('/page')
+            assert response.status_code == 200, response.status_code
+        elapsed = time.perf_counter() - started
+        files = sum(len(names) for _, _, names in os.walk(session_dir))
+    finally:
+        shutil.rmtree(session_dir, ignore_errors=True)
+
+    return {
+        'backend': backend,
+        'requests_per_sec': requests / elapsed,
+        'us_per_request': elapsed / requests * 1e6,
+        'cookie_bytes': cookie_size,
+        'files_on_disk': files,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--backends', default='filesystem,cookie,memory')
+    args = parser.parse_args()
+
+    print(f"{'backend':<12}{'req/s':>10}{'us/req':>10}{'cookie B':>10}{'files':>8}")
+    for backend in args.backends.split(','):
+        result = run(backend, args.requests)
+        print(f"{result['backend']:<12}{result['requests_per_sec']:>10.0f}"
+              f"{result['us_per_request']:>10.1f}{result['cookie_bytes']:>10}"
+              f"{result['files_on_disk']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+Measures the app's cold start: what a new worker process or a one-off
+`flask` command pays before it does any work.
+
+Each run starts a fresh Python process that times
+- importing app.py (and everything it imports)
+- create_app(): reading the settings and binding the extensions
+- the first request through the test client (default GET /login, which
+  doesn't touch the database)
+and reports its peak RSS and how many modules ended up loaded. Runs are
+repeated and the medians shown, once as a server worker starts
+(TEMPLATE_PRECOMPILE on) and once as a CLI command does (off).
+
+Doesn't need MySQL for the default path. Run from trial_app/:
+
+    python benchmarks/bench_startup.py [--runs 10]
+    python benchmarks/bench_startup.py --compare benchmarks/results/<earlier>.json --max-regression 20
+
+With --max-regression it exits with status 1 if any median grew by more
+than that many percent over the --compare file, so it can gate a build.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(HERE)
+RESULTS_DIR = os.path.join(HERE, 'results')
+
+MODES = {
+    'server': {'TEMPLATE_PRECOMPILE': 'true'},
+    'cli': {'TEMPLATE_PRECOMPILE': 'false'},
+}
+METRICS = [
+    # key, column header, format
+    ('import_ms', 'import ms', '.1f'),
+    ('create_ms', 'create_app ms', '.1f'),
+    ('first_request_ms', '1st request ms', '.1f'),
+    ('process_ms', 'process ms', '.1f'),
+    ('rss_mb', 'peak RSS MB', '.1f'),
+    ('modules', 'modules', '.0f'),
+]
+
+
+def child(path):
+    """Runs in the fresh process: prints one JSON line of timings."""
+    import resource
+
+    sys.path.insert(0, APP_DIR)
+    started = time.perf_counter()
+    import app as app_module
+    imported = time.perf_counter()
+    app = app_module.create_app()
+    created = time.perf_counter()
+    status = app.test_client().get(path).status_code
+    answered = time.perf_counter()
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    rss_mb = rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+    print(json.dumps({
+        'import_ms': (imported - started) * 1000,
+        'create_ms': (created - imported) * 1000,
+        'first_request_ms': (answered - created) * 1000,
+        'rss_mb': rss_mb,
+        'modules': len(sys.modules),
+        'status': status,
+    }))
+
+
+def run_once(path, env):
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', path],
+                               cwd=APP_DIR, env=env, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        sys.exit(f"Startup run failed:\n{completed.stderr}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['process_ms'] = elapsed
+    return result
+
+
+def measure(path, runs, settings):
+    env = dict(os.environ, **settings)
+    # Bytecode is written by the first run, as it would be on a deployed host
+    run_once(path, env)
+    results = [run_once(path, env) for _ in range(runs)]
+    statuses = {result['status'] for result in results}
+    return {key: statistics.median(result[key] for result in results) for key, _, _ in METRICS}, statuses
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(modes, baseline=None):
+    """Prints the medians per mode; returns the largest growth (%) over the baseline."""
+    print(f"{'':<8}" + "".join(f"{label:>16}" for _, label, _ in METRICS))
+    worst = 0.0
+    for mode, medians in modes.items():
+        print(f"{mode:<8}" + "".join(f"{medians[key]:>16{fmt}}" for key, _, fmt in METRICS))
+        base = (baseline or {}).get('modes', {}).get(mode)
+        if not base:
+            continue
+        changes = []
+        for key, _, _ in METRICS:
+            if base.get(key):
+                change = (medians[key] - base[key]) / base[key] * 100
+                worst = max(worst, change)
+                changes.append(f"{change:>+15.1f}%")
+            else:
+                changes.append(f"{'-':>16}")
+        print(f"{'vs base':<8}" + "".join(changes))
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=10, help='Fresh processes per mode.')
+    parser.add_argument('--path', default='/login', help='Path of the first request.')
+    parser.add_argument('--output', help='Results file (default: benchmarks/results/startup-<time>-<commit>.json).')
+    parser.add_argument('--compare', help='Earlier results file to compare against.')
+    parser.add_argument('--max-regression', type=float,
+                        help='Fail if any median grew by more than this many percent over --compare.')
+    parser.add_argument('--child', metavar='PATH', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    started_at = datetime.now()
+    modes = {}
+    for mode, settings in MODES.items():
+        modes[mode], statuses = measure(args.path, args.runs, settings)
+        if statuses - {200}:
+            print(f"Note: {mode} runs answered {args.path} with {sorted(statuses)}")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    worst = print_report(modes, baseline)
+
+    commit = git_commit()
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"startup-{started_at:%Y%m%d-%H%M%S}-{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'commit': commit,
+            'started_at': started_at.isoformat(timespec='seconds'),
+            'runs': args.runs,
+            'path': args.path,
+            'python': platform.python_version(),
+            'modes': modes,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+    if baseline and args.max_regression is not None and worst > args.max_regression:
+        sys.exit(f"Startup regressed by {worst:.1f}% (allowed {args.max_regression:.1f}%).")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Benchmarks the unvisited-visitors report: the old NOT IN query against the
+NOT EXISTS anti-join, plus the Visits reverse lookup before and after
+idx_visits_animal.
+
+Seeds a scratch database (default `zoo_bench`, dropped and re-created) with
+a deterministic data set at each size, using the DB_* settings from .env.
+Run from trial_app/:
+
+    python benchmarks/bench_unvisited.py [--sizes 10000,100000,1000000]
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+import MySQLdb
+from dotenv import load_dotenv
+
+OLD_REPORT = """
+    SELECT visitor_id, f_name, l_name
+    FROM Visitor
+    WHERE visitor_id NOT IN (SELECT DISTINCT visitor_id FROM Visits)
+"""
+NEW_REPORT = """
+    SELECT visitor_id, f_name, l_name
+    FROM Visitor
+    WHERE NOT EXISTS (SELECT 1 FROM Visits V WHERE V.visitor_id = Visitor.visitor_id)
+    ORDER BY visitor_id
+"""
+NEW_REPORT_PAGE = NEW_REPORT + " LIMIT 50"
+REVERSE_LOOKUP = "SELECT COUNT(*) FROM Visits WHERE animal_id = %s"
+
+SCHEMA = [
+    """CREATE TABLE Visitor (
+        visitor_id INT PRIMARY KEY,
+        f_name VARCHAR(50),
+        l_name VARCHAR(50),
+        age INT,
+        phone_no VARCHAR(20)
+    )""",
+    # No foreign keys, so no implicit index on animal_id: this is the "before"
+    """CREATE TABLE Visits (
+        visitor_id INT,
+        animal_id INT,
+        PRIMARY KEY (visitor_id, animal_id)
+    )""",
+]
+
+INSERT_BATCH = 5000
+
+
+def connect(database=None):
+    kwargs = {
+        'host': os.environ.get('DB_HOST', 'localhost'),
+        'user': os.environ.get('DB_USER'),
+        'passwd': os.environ.get('DB_PASS') or '',
+    }
+    if database:
+        kwargs['db'] = database
+    return MySQLdb.connect(**kwargs)
+
+
+def seed(conn, visitors, animals, seed_value):
+    """About 70% of visitors visit 1-3 animals; the rest never visit any."""
+    rng = random.Random(seed_value)
+    cursor = conn.cursor()
+    batch = []
+    for visitor_id in range(1, visitors + 1):
+        batch.append((visitor_id, f'First{visitor_id}', f'Last{rng.randrange(10000)}',
+                      rng.randint(5, 80), f'555-{visitor_id:07d}'))
+        if len(batch) == INSERT_BATCH:
+            cursor.executemany("INSERT INTO Visitor VALUES (%s, %s, %s, %s, %s)", batch)
+            batch = []
+    if batch:
+        cursor.executemany("INSERT INTO Visitor VALUES (%s, %s, %s, %s, %s)", batch)
+
+    batch = []
+    for visitor_id in range(1, visitors + 1):
+        if rng.random() < 0.7:
+            for animal_id in rng.sample(range(1, animals + 1), rng.randint(1, 3)):
+                batch.append((visitor_id, animal_id))
+        if len(batch) >= INSERT_BATCH:
+            cursor.executemany("INSERT INTO Visits VALUES (%s, %s)", batch)
+            batch = []
+    if batch:
+        cursor.executemany("INSERT INTO Visits VALUES (%s, %s)", batch)
+    conn.commit()
+    cursor.execute("ANALYZE TABLE Visitor, Visits")
+    cursor.fetchall()
+    cursor.close()
+
+
+def time_query(conn, sql, params=None, repeat=5):
+    """Median wall time (ms) to run `sql` and fetch every row."""
+    cursor = conn.cursor()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    cursor.close()
+    return statistics.median(timings), len(rows)
+
+
+def run_size(database, visitors, animals, repeat, seed_value):
+    admin = connect()
+    cursor = admin.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+    cursor.execute(f"CREATE DATABASE `{database}`")
+    cursor.close()
+    admin.close()
+
+    conn = connect(database)
+    cursor = conn.cursor()
+    for statement in SCHEMA:
+        cursor.execute(statement)
+    cursor.close()
+
+    started = time.perf_counter()
+    seed(conn, visitors, animals, seed_value)
+    seed_seconds = time.perf_counter() - started
+
+    results = {'visitors': visitors, 'seed_s': seed_seconds}
+    results['not_in_ms'], results['unvisited'] = time_query(conn, OLD_REPORT, repeat=repeat)
+    results['not_exists_ms'], _ = time_query(conn, NEW_REPORT, repeat=repeat)
+    results['first_page_ms'], _ = time_query(conn, NEW_REPORT_PAGE, repeat=repeat)
+
+    results['reverse_before_ms'], _ = time_query(conn, REVERSE_LOOKUP, [animals // 2], repeat)
+    cursor = conn.cursor()
+    cursor.execute("CREATE INDEX idx_visits_animal ON Visits (animal_id, visitor_id)")
+    cursor.close()
+    results['reverse_after_ms'], _ = time_query(conn, REVERSE_LOOKUP, [animals // 2], repeat)
+
+    conn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help='Comma-separated visitor counts.')
+    parser.add_argument('--animals', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database', default='zoo_bench')
+    parser.add_argument('--keep', action='store_true', help="Don't drop the scratch database afterwards.")
+    args = parser.parse_args()
+
+    load_dotenv()
+    header = (f"{'visitors':>10}{'unvisited':>11}{'NOT IN ms':>11}{'NOT EXISTS ms':>15}"
+              f"{'1st page ms':>13}{'by animal ms':>14}{'+index ms':>11}")
+    print(header)
+    for size in (int(value) for value in args.sizes.split(',')):
+        r = run_size(args.database, size, args.animals, args.repeat, args.seed)
+        print(f"{r['visitors']:>10}{r['unvisited']:>11}{r['not_in_ms']:>11.1f}"
+              f"{r['not_exists_ms']:>15.1f}{r['first_page_ms']:>13.2f}"
+              f"{r['reverse_before_ms']:>14.2f}{r['reverse_after_ms']:>11.2f}")
+
+    if not args.keep:
+        conn = connect()
+        cursor = conn.cursor()
+        cursor.execute(f"DROP DATABASE IF EXISTS `{args.database}`")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
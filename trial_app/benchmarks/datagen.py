@@ -0,0 +1,225 @@
+"""
+Generates a deterministic synthetic ZooDB data set at any scale.
+
+Adds habitats, animals, veterinarians, visitors, tickets, visits and vet
+records to the database in .env (or --database), numbering new rows after
+the highest existing IDs. The same --seed on the same starting database
+always produces the same rows, so load into a freshly created ZooDB (schema,
+procedures, create_usernames.sql and migrations/) to compare runs.
+
+Also creates one login per role for benchmarks/load_test.py (see ACCOUNTS).
+Run from trial_app/:
+
+    python benchmarks/datagen.py --scale medium
+    python benchmarks/datagen.py --animals 20000 --visitors 1000000 --tickets 800000
+"""
+import argparse
+import os
+import random
+import time
+from datetime import date, timedelta
+
+import MySQLdb
+from dotenv import load_dotenv
+
+SCALES = {
+    'small':  dict(habitats=20, animals=1000, vets=5, visitors=10000, tickets=8000,
+                   visits=20000, vet_records=5000),
+    'medium': dict(habitats=100, animals=10000, vets=20, visitors=100000, tickets=80000,
+                   visits=200000, vet_records=50000),
+    'large':  dict(habitats=500, animals=100000, vets=100, visitors=1000000, tickets=800000,
+                   visits=2000000, vet_records=500000),
+}
+
+# username -> (role, password); plaintext like create_usernames.sql
+ACCOUNTS = {
+    'bench_manager': ('Manager', 'bench123'),
+    'bench_keeper': ('Zookeeper', 'bench123'),
+    'bench_vet': ('Veterinarian', 'bench123'),
+}
+
+FIRST_NAMES = ['Alex', 'Maria', 'James', 'Priya', 'Chen', 'Fatima', 'Liam', 'Sofia', 'Noah', 'Aisha',
+               'Ethan', 'Yuki', 'Lucas', 'Amara', 'Mateo', 'Zara', 'Omar', 'Elena', 'Ravi', 'Grace']
+LAST_NAMES = ['Smith', 'Garcia', 'Nguyen', 'Patel', 'Kim', 'Okafor', 'Muller', 'Rossi', 'Silva',
+              'Cohen', 'Ivanov', 'Tanaka', 'Haddad', 'Brown', 'Lopez', 'Singh', 'Dubois', 'Khan']
+SPECIES = ['Lion', 'Tiger', 'Elephant', 'Giraffe', 'Zebra', 'Python', 'Iguana', 'Penguin',
+           'Flamingo', 'Gorilla', 'Red Panda', 'Crocodile', 'Otter', 'Kangaroo', 'Tortoise']
+HABITAT_TYPES = ['Savannah', 'Tropical', 'Aquatic', 'Arctic', 'Forest', 'Desert', 'Aviary']
+SYLLABLES = ['ka', 'lo', 'mi', 'ra', 'zu', 'be', 'to', 'ni', 'sha', 'gor', 'fi', 'nu']
+VET_STATUSES = ['Healthy', 'Under Observation', 'Treatment', 'Recovered', 'Critical']
+PAY_MODES = ['Cash', 'Card', 'UPI', 'Online']
+PRICES = [None, '0.00', '15.00', '25.00', '40.00']
+PRICE_WEIGHTS = [2, 8, 30, 45, 15]
+
+INSERT_BATCH = 5000
+
+
+def connect(database):
+    return MySQLdb.connect(
+        host=os.environ.get('DB_HOST', 'localhost'),
+        user=os.environ.get('DB_USER'),
+        passwd=os.environ.get('DB_PASS') or '',
+        db=database,
+    )
+
+
+def next_id(cursor, table, column):
+    cursor.execute(f"SELECT COALESCE(MAX({column}), 0) + 1 FROM {table}")
+    return cursor.fetchone()[0]
+
+
+def insert_all(conn, sql, rows):
+    """Inserts an iterable of tuples in committed batches. Returns the row count."""
+    cursor = conn.cursor()
+    batch, count = [], 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) == INSERT_BATCH:
+            cursor.executemany(sql, batch)
+            conn.commit()
+            count += len(batch)
+            batch = []
+    if batch:
+        cursor.executemany(sql, batch)
+        conn.commit()
+        count += len(batch)
+    cursor.close()
+    return count
+
+
+def _animal_name(rng):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+
+
+def generate(conn, counts, seed=42, end_date=date(2025, 10, 31), days=365):
+    """
+    Inserts the rows described by `counts` (keys as in SCALES) and returns
+    {table: rows inserted}. Dates fall in the `days` days up to `end_date`.
+    """
+    rng = random.Random(seed)
+    cursor = conn.cursor()
+    first = {
+        'habitat': next_id(cursor, 'Habitat', 'habitat_id'),
+        'animal': next_id(cursor, 'Animal', 'animal_id'),
+        'employee': next_id(cursor, 'Employee', 'employee_id'),
+        'visitor': next_id(cursor, 'Visitor', 'visitor_id'),
+        'ticket': next_id(cursor, 'Ticket', 'ticket_id'),
+        'record': next_id(cursor, 'Veterinary_Status', 'record_id'),
+    }
+    cursor.execute("SELECT username FROM Employee WHERE username IN %s", [list(ACCOUNTS)])
+    existing_accounts = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+
+    n_habitats, n_animals = counts['habitats'], counts['animals']
+    n_visitors = counts['visitors']
+    if counts['tickets'] > n_visitors:
+        raise ValueError("Ticket.visitor_id is UNIQUE: tickets cannot exceed visitors.")
+    start_date = end_date - timedelta(days=days - 1)
+    inserted = {}
+
+    def random_day():
+        return start_date + timedelta(days=rng.randrange(days))
+
+    # Habitats get room for their animals plus some headroom for add_animal
+    habitat_of = [rng.randrange(n_habitats) for _ in range(n_animals)]
+    occupancy = [0] * n_habitats
+    for h in habitat_of:
+        occupancy[h] += 1
+    inserted['Habitat'] = insert_all(conn, """
+        INSERT INTO Habitat (habitat_id, name, type, capacity) VALUES (%s, %s, %s, %s)
+    """, ((first['habitat'] + h, f"{rng.choice(HABITAT_TYPES)} Zone {first['habitat'] + h}",
+           rng.choice(HABITAT_TYPES), occupancy[h] + rng.randint(5, 20))
+          for h in range(n_habitats)))
+
+    inserted['Animal'] = insert_all(conn, """
+        INSERT INTO Animal (animal_id, name, species, gender, age, habitat_id)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, ((first['animal'] + a, _animal_name(rng), rng.choice(SPECIES), rng.choice(['Male', 'Female']),
+           rng.randint(0, 40), first['habitat'] + habitat_of[a])
+          for a in range(n_animals)))
+    del habitat_of
+
+    # Veterinarians, plus the benchmark logins that don't exist yet
+    employees = [(f"Vet {first['employee'] + v}", 'Veterinarian', None, None)
+                 for v in range(counts['vets'])]
+    employees += [(f"Bench {role}", role, username, password)
+                  for username, (role, password) in ACCOUNTS.items()
+                  if username not in existing_accounts]
+    inserted['Employee'] = insert_all(conn, """
+        INSERT INTO Employee (employee_id, name, phone_no, role, start_date, supervisor_id, username, password)
+        VALUES (%s, %s, %s, %s, %s, NULL, %s, %s)
+    """, ((first['employee'] + i, name, f"555-{first['employee'] + i:07d}", role,
+           start_date.isoformat(), username, password)
+          for i, (name, role, username, password) in enumerate(employees)))
+    vet_ids = [first['employee'] + v for v in range(counts['vets'])]
+
+    inserted['Visitor'] = insert_all(conn, """
+        INSERT INTO Visitor (visitor_id, f_name, l_name, age, phone_no) VALUES (%s, %s, %s, %s, %s)
+    """, ((first['visitor'] + v, rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), rng.randint(3, 85),
+           f"555-{first['visitor'] + v:07d}")
+          for v in range(n_visitors)))
+
+    ticket_visitors = sorted(rng.sample(range(n_visitors), counts['tickets']))
+    inserted['Ticket'] = insert_all(conn, """
+        INSERT INTO Ticket (ticket_id, transaction_id, price, date, pay_mode, visitor_id)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, ((first['ticket'] + t, f"TXN{first['ticket'] + t:010d}",
+           rng.choices(PRICES, PRICE_WEIGHTS)[0], random_day().isoformat(), rng.choice(PAY_MODES),
+           first['visitor'] + v)
+          for t, v in enumerate(ticket_visitors)))
+    del ticket_visitors
+
+    # About 70% of visitors visit some animals; the rest stay "unvisited"
+    def visits():
+        if not n_animals:
+            return
+        per_visitor = counts['visits'] / max(1, n_visitors * 0.7)
+        whole, fraction = int(per_visitor), per_visitor - int(per_visitor)
+        for v in range(n_visitors):
+            if rng.random() >= 0.7:
+                continue
+            k = min(n_animals, whole + (1 if rng.random() < fraction else 0))
+            for a in sorted(rng.sample(range(n_animals), k)):
+                yield first['visitor'] + v, first['animal'] + a
+    inserted['Visits'] = insert_all(conn, "INSERT INTO Visits (visitor_id, animal_id) VALUES (%s, %s)",
+                                    visits())
+
+    if vet_ids and n_animals:
+        inserted['Veterinary_Status'] = insert_all(conn, """
+            INSERT INTO Veterinary_Status (record_id, animal_id, vet_id, checkup_date, status, notes)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, ((first['record'] + r, first['animal'] + rng.randrange(n_animals), rng.choice(vet_ids),
+               random_day().isoformat(), rng.choice(VET_STATUSES), f"Routine check #{first['record'] + r}")
+              for r in range(counts['vet_records'])))
+    return inserted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small',
+                        help='Preset row counts; the options below override them.')
+    for name in SCALES['small']:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, dest=name)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--end-date', type=date.fromisoformat, default=date(2025, 10, 31))
+    parser.add_argument('--days', type=int, default=365, help='Days of ticket and checkup history.')
+    parser.add_argument('--database', help='Defaults to DB_NAME from .env.')
+    args = parser.parse_args()
+
+    load_dotenv()
+    counts = dict(SCALES[args.scale])
+    counts.update({name: getattr(args, name) for name in counts if getattr(args, name) is not None})
+
+    conn = connect(args.database or os.environ.get('DB_NAME'))
+    started = time.perf_counter()
+    inserted = generate(conn, counts, args.seed, args.end_date, args.days)
+    conn.close()
+
+    for table, count in inserted.items():
+        print(f"{table:<20}{count:>10}")
+    print(f"Done in {time.perf_counter() - started:.1f}s. Logins: "
+          + ', '.join(f"{username}/{password}" for username, (_, password) in ACCOUNTS.items()))
+
+
+if __name__ == '__main__':
+    main()
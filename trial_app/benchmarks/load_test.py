@@ -0,0 +1,359 @@
+"""
+Load-tests the app with role-based scenarios and reports latency per route.
+
+Virtual users log in as a manager (browsing dashboards and reports), a
+zookeeper (adding animals) or a veterinarian (adding checkups) and run a
+deterministic, weighted sequence of requests, either through the Flask
+test client (default) or over HTTP against a local threaded WSGI server
+(--server). Reports throughput and p50/p95/p99 latency per route and
+writes the results as JSON; --compare shows the change against an
+earlier results file.
+
+Needs a database with data from benchmarks/datagen.py (its logins are the
+defaults below) and the app's usual .env. Run from trial_app/:
+
+    python benchmarks/load_test.py --users manager=4,zookeeper=2,vet=2 --requests 200
+    python benchmarks/load_test.py --server --compare benchmarks/results/<earlier>.json
+"""
+import argparse
+import http.cookiejar
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date, datetime
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+from app import create_app, mysql  # noqa: E402
+from datagen import ACCOUNTS, SYLLABLES  # noqa: E402
+
+app = create_app()
+
+RESULTS_DIR = os.path.join(HERE, 'results')
+
+
+# --- Clients ---
+
+class TestClient:
+    """One virtual user's session through the Flask test client."""
+
+    def __init__(self):
+        self._client = app.test_client()
+
+    def request(self, method, path, data=None):
+        response = self._client.open(path, method=method, data=data)
+        response.get_data()
+        status = response.status_code
+        response.close()
+        return status
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpClient:
+    """One virtual user's session over real HTTP (keeps its own cookies)."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self._opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect)
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self._opener.open(req) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    """Serves the app on a free local port in a background thread. Returns (server, base URL)."""
+    server = make_server('127.0.0.1', 0, app, server_class=_ThreadingWSGIServer,
+                         handler_class=_QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+# --- Scenarios ---
+
+class Fixture:
+    """IDs the scenarios need, read once from the database before the run."""
+
+    def __init__(self):
+        with app.app_context():
+            cursor = mysql.connection.cursor()
+            cursor.execute("SELECT habitat_id FROM Habitat WHERE capacity > current_occupancy "
+                           "ORDER BY habitat_id")
+            self.open_habitats = [row['habitat_id'] for row in cursor.fetchall()]
+            cursor.execute("SELECT animal_id FROM Animal ORDER BY animal_id LIMIT 1000")
+            self.animals = [row['animal_id'] for row in cursor.fetchall()]
+            cursor.execute("SELECT employee_id FROM Employee WHERE role = 'Veterinarian' ORDER BY employee_id")
+            self.vets = [row['employee_id'] for row in cursor.fetchall()]
+            cursor.execute("SELECT visitor_id FROM Visitor ORDER BY visitor_id LIMIT 1000")
+            self.visitors = [row['visitor_id'] for row in cursor.fetchall()]
+            cursor.execute("SELECT COALESCE(MAX(animal_id), 0) AS a FROM Animal")
+            animal_base = cursor.fetchone()['a']
+            cursor.execute("SELECT COALESCE(MAX(record_id), 0) AS r FROM Veterinary_Status")
+            record_base = cursor.fetchone()['r']
+            cursor.close()
+        # New IDs are handed out across all virtual users
+        self._animal_ids = itertools.count(animal_base + 1)
+        self._record_ids = itertools.count(record_base + 1)
+        self._lock = threading.Lock()
+
+    def new_animal_id(self):
+        with self._lock:
+            return next(self._animal_ids)
+
+    def new_record_id(self):
+        with self._lock:
+            return next(self._record_ids)
+
+
+def _get(path):
+    return lambda rng, fixture: ('GET', path, None)
+
+
+def _edit_visitor_form(rng, fixture):
+    return 'GET', f"/edit_visitor/{rng.choice(fixture.visitors)}", None
+
+
+def _animal_search(rng, fixture):
+    return 'GET', f"/animals/search?q={rng.choice(SYLLABLES)}", None
+
+
+def _add_animal(rng, fixture):
+    # With every habitat full the form is re-rendered (200) and counts as an error
+    return 'POST', '/add_animal', {
+        'animal_id': fixture.new_animal_id(),
+        'name': f"Bench{rng.randrange(100000)}",
+        'species': rng.choice(['Lion', 'Otter', 'Penguin']),
+        'gender': rng.choice(['Male', 'Female']),
+        'age': rng.randint(0, 30),
+        'habitat_id': rng.choice(fixture.open_habitats) if fixture.open_habitats else '',
+    }
+
+
+def _add_vet_record(rng, fixture):
+    return 'POST', '/add_vet_record', {
+        'record_id': fixture.new_record_id(),
+        'animal_id': rng.choice(fixture.animals),
+        'vet_id': rng.choice(fixture.vets),
+        'checkup_date': date.today().isoformat(),
+        'status': rng.choice(['Healthy', 'Under Observation']),
+        'notes': 'Load test checkup',
+    }
+
+
+# scenario -> (login, [(route label, weight, request builder, expected statuses)])
+SCENARIOS = {
+    'manager': ('bench_manager', [
+        ('GET /dashboard', 5, _get('/dashboard'), {200}),
+        ('GET /animals', 3, _get('/animals'), {200}),
+        ('GET /habitats', 2, _get('/habitats'), {200}),
+        ('GET /visitors', 3, _get('/visitors'), {200}),
+        ('GET /visitors/unvisited', 1, _get('/visitors/unvisited'), {200}),
+        ('GET /veterinary', 2, _get('/veterinary'), {200}),
+        ('GET /edit_visitor/<id>', 1, _edit_visitor_form, {200}),
+    ]),
+    'zookeeper': ('bench_keeper', [
+        ('GET /dashboard', 3, _get('/dashboard'), {200}),
+        ('GET /animals', 4, _get('/animals'), {200}),
+        ('GET /add_animal', 2, _get('/add_animal'), {200}),
+        ('POST /add_animal', 2, _add_animal, {302}),
+        ('GET /veterinary', 1, _get('/veterinary'), {200}),
+    ]),
+    'vet': ('bench_vet', [
+        ('GET /dashboard', 2, _get('/dashboard'), {200}),
+        ('GET /veterinary', 4, _get('/veterinary'), {200}),
+        ('GET /add_vet_record', 2, _get('/add_vet_record'), {200}),
+        ('GET /animals/search', 3, _animal_search, {200}),
+        ('POST /add_vet_record', 2, _add_vet_record, {302}),
+    ]),
+}
+
+
+def run_user(scenario, index, make_client, fixture, requests, seed, password, results):
+    """One virtual user: logs in, then makes `requests` weighted requests."""
+    username, steps = SCENARIOS[scenario]
+    rng = random.Random(f"{seed}-{scenario}-{index}")
+    client = make_client()
+    status = client.request('POST', '/login', {'username': username,
+                                               'password': password or ACCOUNTS[username][1]})
+    if status != 302:
+        results.append(('POST /login', 0.0, False))
+        return
+
+    weights = [weight for _, weight, _, _ in steps]
+    for _ in range(requests):
+        label, _, build, expected = rng.choices(steps, weights)[0]
+        method, path, data = build(rng, fixture)
+        started = time.perf_counter()
+        try:
+            ok = client.request(method, path, data) in expected
+        except Exception:
+            ok = False
+        results.append((label, time.perf_counter() - started, ok))
+
+
+# --- Reporting ---
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(results, elapsed):
+    by_route = {}
+    for label, seconds, ok in results:
+        by_route.setdefault(label, []).append((seconds, ok))
+    routes = {}
+    for label, samples in sorted(by_route.items()):
+        timings = sorted(seconds for seconds, _ in samples)
+        routes[label] = {
+            'requests': len(samples),
+            'errors': sum(1 for _, ok in samples if not ok),
+            'throughput_rps': round(len(samples) / elapsed, 2),
+            'p50_ms': round(percentile(timings, 50) * 1000, 2),
+            'p95_ms': round(percentile(timings, 95) * 1000, 2),
+            'p99_ms': round(percentile(timings, 99) * 1000, 2),
+            'mean_ms': round(sum(timings) / len(timings) * 1000, 2),
+        }
+    all_timings = sorted(seconds for _, seconds, _ in results)
+    total = {
+        'requests': len(results),
+        'errors': sum(1 for _, _, ok in results if not ok),
+        'throughput_rps': round(len(results) / elapsed, 2),
+        'p50_ms': round(percentile(all_timings, 50) * 1000, 2),
+        'p95_ms': round(percentile(all_timings, 95) * 1000, 2),
+        'p99_ms': round(percentile(all_timings, 99) * 1000, 2),
+    }
+    return routes, total
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(routes, total, baseline=None):
+    header = f"{'route':<28}{'reqs':>7}{'errs':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    if baseline:
+        header += f"{'p95 vs base':>13}"
+    print(header)
+    for label, r in list(routes.items()) + [('TOTAL', total)]:
+        line = (f"{label:<28}{r['requests']:>7}{r['errors']:>6}{r['throughput_rps']:>9.1f}"
+                f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}")
+        base = (baseline.get('total') if label == 'TOTAL' else baseline.get('routes', {}).get(label)) \
+            if baseline else None
+        if base and base['p95_ms']:
+            line += f"{(r['p95_ms'] / base['p95_ms'] - 1) * 100:>+12.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', default='manager=2,zookeeper=2,vet=2',
+                        help='Virtual users per scenario (manager, zookeeper, vet).')
+    parser.add_argument('--requests', type=int, default=100, help='Requests per virtual user.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--server', action='store_true',
+                        help='Go through a local threaded WSGI server instead of the test client.')
+    parser.add_argument('--password', help='Password for the benchmark logins, if not the datagen default.')
+    parser.add_argument('--output', help='Results file (default: benchmarks/results/<time>-<commit>.json).')
+    parser.add_argument('--compare', help='Earlier results file to compare p95 latency against.')
+    args = parser.parse_args()
+
+    users = {}
+    for part in args.users.split(','):
+        scenario, _, count = part.partition('=')
+        if scenario not in SCENARIOS:
+            parser.error(f"Unknown scenario {scenario!r}; choose from {', '.join(SCENARIOS)}.")
+        users[scenario] = int(count or 1)
+
+    fixture = Fixture()
+    server = None
+    if args.server:
+        server, base_url = start_server()
+        make_client = lambda: HttpClient(base_url)  # noqa: E731
+    else:
+        make_client = TestClient
+
+    results = []  # (route label, seconds, ok); list.append is thread-safe
+    threads = [
+        threading.Thread(target=run_user, args=(scenario, i, make_client, fixture, args.requests,
+                                                args.seed, args.password, results))
+        for scenario, count in users.items() for i in range(count)
+    ]
+    started_at = datetime.now()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if server is not None:
+        server.shutdown()
+
+    routes, total = summarize(results, elapsed)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(routes, total, baseline)
+
+    commit = git_commit()
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{started_at:%Y%m%d-%H%M%S}-{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'commit': commit,
+            'started_at': started_at.isoformat(timespec='seconds'),
+            'mode': 'wsgi-server' if args.server else 'test-client',
+            'users': users,
+            'requests_per_user': args.requests,
+            'seed': args.seed,
+            'python': platform.python_version(),
+            'elapsed_s': round(elapsed, 3),
+            'total': total,
+            'routes': routes,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
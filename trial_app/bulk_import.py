@@ -0,0 +1,314 @@
+"""
+Streaming bulk import of animals, visitors, tickets, vet records and feedings
+from CSV or NDJSON.
+
+Rows are parsed one at a time, validated with the same rules as the form
+handlers (validation.py) and inserted in batches of `batch_size`, one
+transaction per batch, using executemany (which MySQLdb turns into a
+multi-row INSERT). A bad row is reported with its line number and skipped;
+it never aborts the rest of the import.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from validation import validate_animal, validate_feeding, validate_ticket, validate_vet_record, validate_visitor
+
+# Errors kept in the report; the count keeps going past this
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportReport:
+    """Running totals for one import."""
+
+    def __init__(self, entity):
+        self.entity = entity
+        self.rows_read = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []  # (line number, message), capped at MAX_REPORTED_ERRORS
+
+    def reject(self, line_no, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_no, message))
+
+    def summary(self):
+        return (f"{self.entity}: read {self.rows_read} row(s), inserted {self.inserted}, "
+                f"rejected {self.failed}.")
+
+
+# --- Parsing ---
+
+def iter_csv(text_stream):
+    """Yields (line number, row dict) from a CSV file with a header row."""
+    reader = csv.DictReader(text_stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def iter_ndjson(text_stream):
+    """Yields (line number, row dict) from newline-delimited JSON objects."""
+    for line_no, line in enumerate(text_stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_no, e
+            continue
+        yield line_no, row if isinstance(row, dict) else ValueError("Expected a JSON object.")
+
+
+def iter_rows(binary_stream, fmt):
+    """Decodes an uploaded/opened binary file and parses it as `fmt`."""
+    text_stream = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        return iter_csv(text_stream)
+    if fmt == 'ndjson':
+        return iter_ndjson(text_stream)
+    raise ValueError(f"Unsupported import format {fmt!r}; use 'csv' or 'ndjson'.")
+
+
+def guess_format(filename):
+    """'csv' or 'ndjson' from a file name, or None if it can't tell."""
+    name = (filename or '').lower()
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl', '.json')):
+        return 'ndjson'
+    return None
+
+
+def _as_text(row):
+    # JSON gives ints/floats; the form validators expect strings like a form post
+    return {key: (None if value is None or value == '' else str(value)) for key, value in row.items()}
+
+
+# --- Entities ---
+
+class Entity:
+    """A table that can be bulk-loaded."""
+
+    name = None
+    insert_sql = None
+
+    def validate(self, row):
+        raise NotImplementedError
+
+    def values(self, row):
+        raise NotImplementedError
+
+    def reserve(self, cursor, batch):
+        """
+        Called inside the batch transaction before inserting. Returns
+        (accepted, rejected) where rejected is a list of (line, message).
+        """
+        return list(batch), []
+
+
+class AnimalEntity(Entity):
+    name = 'animals'
+    insert_sql = """
+        INSERT INTO Animal (animal_id, name, species, gender, age, habitat_id)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """
+
+    def validate(self, row):
+        return validate_animal(row)
+
+    def values(self, row):
+        return (int(row['animal_id']), row['name'], row['species'], row.get('gender'),
+                int(row['age']), int(row['habitat_id']))
+
+    def reserve(self, cursor, batch):
+        """
+        Bulk version of sp_AddNewAnimal's capacity check: lock every habitat
+        the batch touches once, then hand out its free places in file order.
+        """
+        habitat_ids = sorted({values[5] for _, values in batch})
+        if not habitat_ids:
+            return [], []
+        placeholders = ', '.join(['%s'] * len(habitat_ids))
+        cursor.execute(f"""
+            SELECT habitat_id, capacity, current_occupancy
+            FROM Habitat
+            WHERE habitat_id IN ({placeholders})
+            FOR UPDATE
+        """, habitat_ids)
+        free = {row['habitat_id']: row['capacity'] - row['current_occupancy'] for row in cursor.fetchall()}
+
+        accepted, rejected = [], []
+        for line_no, values in batch:
+            habitat_id = values[5]
+            if habitat_id not in free:
+                rejected.append((line_no, 'Error: Habitat not found.'))
+            elif free[habitat_id] <= 0:
+                rejected.append((line_no, 'Error: Habitat is full. Cannot add animal.'))
+            else:
+                free[habitat_id] -= 1
+                accepted.append((line_no, values))
+        return accepted, rejected
+
+
+class VisitorEntity(Entity):
+    name = 'visitors'
+    insert_sql = """
+        INSERT INTO Visitor (visitor_id, f_name, l_name, age, phone_no)
+        VALUES (%s, %s, %s, %s, %s)
+    """
+
+    def validate(self, row):
+        return validate_visitor(row, require_id=True)
+
+    def values(self, row):
+        return (int(row['visitor_id']), row['f_name'], row['l_name'], int(row['age']), row['phone_no'])
+
+
+class TicketEntity(Entity):
+    name = 'tickets'
+    insert_sql = """
+        INSERT INTO Ticket (ticket_id, transaction_id, price, date, pay_mode, visitor_id)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """
+
+    def validate(self, row):
+        return validate_ticket(row)
+
+    def values(self, row):
+        return (int(row['ticket_id']), row.get('transaction_id'), Decimal(row['price']),
+                row['date'], row.get('pay_mode'), int(row['visitor_id']))
+
+
+class VetRecordEntity(Entity):
+    name = 'vet_records'
+    insert_sql = """
+        INSERT INTO Veterinary_Status (record_id, animal_id, vet_id, checkup_date, status, notes)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """
+
+    def validate(self, row):
+        return validate_vet_record(row)
+
+    def values(self, row):
+        return (int(row['record_id']), int(row['animal_id']), int(row['vet_id']), row['checkup_date'],
+                row['status'], row.get('notes'))
+
+
+class FeedingEntity(Entity):
+    name = 'feedings'
+    # log_id is AUTO_INCREMENT (migration 007)
+    insert_sql = """
+        INSERT INTO Feeding_Log (animal_id, diet_id, date_time, qty)
+        VALUES (%s, %s, %s, %s)
+    """
+
+    def validate(self, row):
+        return validate_feeding(row)
+
+    def values(self, row):
+        # A feeding without a time happened when it was reported
+        when = row.get('date_time') or datetime.now().isoformat(sep=' ', timespec='seconds')
+        return (int(row['animal_id']), int(row['diet_id']), when, int(row['qty']))
+
+
+ENTITIES = {entity.name: entity for entity in (
+    AnimalEntity(), VisitorEntity(), TicketEntity(), VetRecordEntity(), FeedingEntity())}
+
+
+# --- Loading ---
+
+def _db_error_message(e):
+    text = str(e)
+    if "1062" in text or "duplicate entry" in text.lower():
+        return 'Error: A record with this ID already exists.'
+    if "1452" in text or "foreign key constraint" in text.lower():
+        return 'Error: References a record that does not exist.'
+    return f'Database Error: {text}'
+
+
+def prepare_row(entity, row):
+    """
+    Validates one parsed row (a dict of strings or JSON values) for `entity`.
+    Returns (values, None), or (None, error message).
+    """
+    row = _as_text(row)
+    error = entity.validate(row)
+    if error:
+        return None, error
+    try:
+        return entity.values(row), None
+    except (ValueError, TypeError):
+        return None, 'Error: ID fields must be valid numbers.'
+
+
+def insert_batch(conn, entity, batch, report):
+    """Inserts one validated batch in a single transaction. Returns the inserted values."""
+    cursor = conn.cursor()
+    try:
+        accepted, rejected = entity.reserve(cursor, batch)
+        try:
+            if accepted:
+                cursor.executemany(entity.insert_sql, [values for _, values in accepted])
+            inserted = accepted
+        except Exception:
+            # Something in the batch is bad (e.g. a duplicate ID). Redo it row by
+            # row so only the offending rows are rejected; a failed INSERT only
+            # rolls back its own statement, not the transaction. Reserving per
+            # row means a rejected row doesn't hold on to a habitat place.
+            conn.rollback()
+            inserted, rejected = [], []
+            for row in batch:
+                accepted, row_rejected = entity.reserve(cursor, [row])
+                rejected.extend(row_rejected)
+                for line_no, values in accepted:
+                    try:
+                        cursor.execute(entity.insert_sql, values)
+                        inserted.append((line_no, values))
+                    except Exception as e:
+                        rejected.append((line_no, _db_error_message(e)))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    for line_no, message in sorted(rejected):
+        report.reject(line_no, message)
+    report.inserted += len(inserted)
+    return [values for _, values in inserted]
+
+
+def import_rows(conn, entity_name, rows, batch_size=500, on_inserted=None):
+    """
+    Loads parsed rows (an iterator of (line number, dict)) into the table
+    for `entity_name`. `on_inserted(entity_name, values_list)` is called
+    after each committed batch. Returns an ImportReport.
+    """
+    entity = ENTITIES[entity_name]
+    report = ImportReport(entity_name)
+    batch = []
+    for line_no, row in rows:
+        report.rows_read += 1
+        if isinstance(row, Exception):
+            report.reject(line_no, f'Error: Could not parse row ({row}).')
+            continue
+        values, error = prepare_row(entity, row)
+        if error:
+            report.reject(line_no, error)
+            continue
+        batch.append((line_no, values))
+        if len(batch) >= batch_size:
+            inserted = insert_batch(conn, entity, batch, report)
+            if on_inserted and inserted:
+                on_inserted(entity_name, inserted)
+            batch = []
+    if batch:
+        inserted = insert_batch(conn, entity, batch, report)
+        if on_inserted and inserted:
+            on_inserted(entity_name, inserted)
+    return report
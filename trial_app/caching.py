@@ -0,0 +1,179 @@
+"""
+In-process caches for values that are expensive to compute in MySQL.
+
+Each gunicorn worker keeps its own copy, so writes made through one worker
+only invalidate that worker's cache; the TTL bounds how stale the others
+can get.
+"""
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+
+class TTLCache:
+    """
+    A small thread-safe LRU cache whose entries also expire after `ttl` seconds.
+    Keeps hit/miss/eviction counters so callers can show how well it works.
+    """
+
+    def __init__(self, maxsize=128, ttl=60.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        """Returns the cached value for `key`, calling loader() on a miss."""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    async def get_or_load_async(self, key, loader):
+        """get_or_load() for async views: loader() returns an awaitable."""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = await loader()
+            self.set(key, value)
+        return value
+
+    def update(self, key, func):
+        """
+        Applies func(value) to a cached value in place, if it is still cached.
+        Returns True if the entry was there to update.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self._clock():
+                return False
+            func(entry[1])
+            return True
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+
+
+class ReferenceData:
+    """
+    Versioned cache for form reference data (habitat and vet dropdowns,
+    animal search results).
+
+    Entries are keyed by their dataset's current version, so bump('animals')
+    drops every cached result built from Animal at once - including each
+    cached search prefix - without having to find them. Old versions simply
+    age out of the LRU.
+    """
+
+    def __init__(self, maxsize=256, ttl=300.0, clock=time.monotonic):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl, clock=clock)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def version(self, name):
+        return self._versions.get(name, 0)
+
+    def get_or_load(self, name, loader, *args):
+        """Returns loader(*args) for dataset `name`, cached until the dataset is bumped."""
+        key = (name, self.version(name)) + args
+        return self.cache.get_or_load(key, lambda: loader(*args))
+
+    def bump(self, *names):
+        """Marks datasets as changed; their cached entries are no longer used."""
+        with self._lock:
+            for name in names:
+                self._versions[name] = self._versions.get(name, 0) + 1
+
+    def stats(self):
+        return dict(self.cache.stats(), versions=dict(self._versions))
+
+
+class DailyTicketTotals:
+    """
+    Per-day ticket totals (count and sum of price) for the dashboard report.
+
+    Built once from the Ticket_Daily_Rollup table, then kept current by
+    applying individual ticket sales/refunds so the report never needs a
+    full reload.
+    """
+
+    def __init__(self, rows=()):
+        # date -> [tickets_sold, priced_tickets, total_revenue]
+        # priced_tickets leaves out NULL prices, the same way AVG(price) does
+        self._days = {}
+        self._lock = threading.Lock()
+        for row in rows:
+            self._days[row['date']] = [
+                int(row['tickets_sold']),
+                int(row['priced_tickets']),
+                Decimal(row['total_revenue']),
+            ]
+
+    def apply(self, day, price, count=1):
+        """Adds `count` tickets of `price` on `day` (negative count removes them)."""
+        with self._lock:
+            totals = self._days.setdefault(day, [0, 0, Decimal('0')])
+            totals[0] += count
+            if price is not None:
+                totals[1] += count
+                totals[2] += Decimal(price) * count
+            if totals[0] <= 0:
+                del self._days[day]
+
+    def report(self):
+        """Rows in the shape the dashboard template expects, newest day first."""
+        with self._lock:
+            days = sorted(self._days.items(), reverse=True)
+        return [
+            {
+                'date': day,
+                'average_price': total / priced if priced else None,
+                'tickets_sold': sold,
+                'total_revenue': total,
+            }
+            for day, (sold, priced, total) in days
+        ]
@@ -0,0 +1,218 @@
+"""
+Password checking for login.
+
+Passwords are stored as Argon2id hashes (argon2-cffi) with a tunable cost.
+Rows still holding the plaintext passwords from create_usernames.sql are
+accepted once and rehashed on that login; hashes made with an older cost
+setting are upgraded the same way. `flask --app app:create_app hash-passwords`
+converts the remaining plaintext rows in one go.
+
+Hashing is deliberately slow, so it runs on a small bounded thread pool
+(argon2 releases the GIL) and failed attempts are rate-limited per username
+and per client IP. An attempt is counted before its password is checked
+and only taken back if it succeeds, so concurrent guesses can't all get in
+under the limit while the first ones are still hashing.
+"""
+import asyncio
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHash, VerificationError
+
+from async_db import AsyncDB
+
+
+class AttemptLimiter:
+    """
+    Counts login attempts per key in fixed windows of `window` seconds and
+    blocks a key after `limit` of them. Attempts are reserved before the
+    password check and released again if it succeeds, so what is left are
+    the failures and the checks still running. Keeps at most `maxsize`
+    keys, dropping the least recently seen.
+    """
+
+    def __init__(self, limit, window=300.0, maxsize=10000, clock=time.monotonic):
+        self.limit = limit
+        self.window = window
+        self.maxsize = maxsize
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> [window start, failures]
+        self._lock = threading.Lock()
+
+    def reserve(self, key):
+        """
+        Counts an attempt for `key` unless it is blocked. Returns the seconds
+        until it may try again, or 0 once the attempt has been counted.
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now - entry[0] >= self.window:
+                entry = self._entries[key] = [now, 0]
+            if entry[1] >= self.limit:
+                return entry[0] + self.window - now
+            entry[1] += 1
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return 0
+
+    def release(self, key):
+        """Takes back one reserved attempt that turned out not to be a failure."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > 0:
+                entry[1] -= 1
+
+    def reset(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class Credentials:
+    """Registered as app.extensions['credentials']."""
+
+    def __init__(self, app=None, mysql=None):
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        self._dummy_hash = None
+        if app is not None:
+            self.init_app(app, mysql)
+
+    def init_app(self, app, mysql):
+        config = app.config
+        config.setdefault('PASSWORD_TIME_COST', 3)
+        config.setdefault('PASSWORD_MEMORY_COST', 65536)  # KiB
+        config.setdefault('PASSWORD_PARALLELISM', 4)
+        config.setdefault('LOGIN_HASH_WORKERS', 4)
+        config.setdefault('LOGIN_MAX_ATTEMPTS_PER_USER', 5)
+        config.setdefault('LOGIN_MAX_ATTEMPTS_PER_IP', 50)
+        config.setdefault('LOGIN_ATTEMPT_WINDOW', 300.0)
+        config.setdefault('LOGIN_LIMITER_SIZE', 10000)
+        self.app = app
+        self.db = AsyncDB(mysql)
+        self.hasher = PasswordHasher(
+            time_cost=int(config['PASSWORD_TIME_COST']),
+            memory_cost=int(config['PASSWORD_MEMORY_COST']),
+            parallelism=int(config['PASSWORD_PARALLELISM']),
+        )
+        window = float(config['LOGIN_ATTEMPT_WINDOW'])
+        size = int(config['LOGIN_LIMITER_SIZE'])
+        self.user_attempts = AttemptLimiter(int(config['LOGIN_MAX_ATTEMPTS_PER_USER']), window, size)
+        self.ip_attempts = AttemptLimiter(int(config['LOGIN_MAX_ATTEMPTS_PER_IP']), window, size)
+        app.extensions['credentials'] = self
+
+    @property
+    def executor(self):
+        """The hashing thread pool for this process (re-created after a fork)."""
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            with self._lock:
+                if self._executor is None or self._executor_pid != pid:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=int(self.app.config['LOGIN_HASH_WORKERS']),
+                        thread_name_prefix='login-hash',
+                    )
+                    self._executor_pid = pid
+        return self._executor
+
+    # --- Hashing ---
+
+    def hash(self, password):
+        return self.hasher.hash(password)
+
+    @staticmethod
+    def is_hashed(stored):
+        return stored.startswith('$argon2')
+
+    def check(self, stored, password):
+        """
+        Returns (matches, new hash or None). A new hash is returned when the
+        stored value is plaintext or was hashed with different cost settings.
+        """
+        if stored is None:
+            # Unknown user: spend the same time as a real check
+            if self._dummy_hash is None:
+                self._dummy_hash = self.hash('not-a-password')
+            try:
+                self.hasher.verify(self._dummy_hash, password)
+            except VerificationError:
+                pass
+            return False, None
+        if not self.is_hashed(stored):
+            matches = hmac.compare_digest(stored.encode(), password.encode())
+            return matches, (self.hash(password) if matches else None)
+        try:
+            self.hasher.verify(stored, password)
+        except (VerificationError, InvalidHash):
+            return False, None
+        return True, (self.hash(password) if self.hasher.check_needs_rehash(stored) else None)
+
+    # --- Login ---
+
+    def reserve_attempt(self, username, ip):
+        """
+        Counts a login attempt against the username and the client IP before
+        its password is checked. Returns the seconds the client must wait
+        (nothing is counted then), or 0 if it may go on to authenticate().
+        """
+        user_key = username.lower()
+        wait = self.user_attempts.reserve(user_key)
+        if not wait:
+            wait = self.ip_attempts.reserve(ip)
+            if wait:
+                self.user_attempts.release(user_key)
+        return int(wait + 0.999)
+
+    async def authenticate(self, username, password, ip):
+        """
+        The Employee row for a correct username/password, otherwise None.
+        Call reserve_attempt() first; a failed check keeps the attempt counted,
+        a successful one takes it back.
+        """
+        try:
+            account = await self.db.fetch_one(
+                'SELECT employee_id, username, role, session_epoch, password FROM Employee WHERE username = %s',
+                [username]
+            )
+            matches, new_hash = await asyncio.wrap_future(
+                self.executor.submit(self.check, account['password'] if account else None, password))
+        except Exception:
+            # Not the client's fault: don't count it
+            self.user_attempts.release(username.lower())
+            self.ip_attempts.release(ip)
+            raise
+        if not matches:
+            return None
+        self.user_attempts.reset(username.lower())
+        self.ip_attempts.release(ip)
+        if new_hash is not None:
+            await self.db.execute('UPDATE Employee SET password = %s WHERE employee_id = %s',
+                                  [new_hash, account['employee_id']])
+        return account
+
+    def hash_plaintext_passwords(self, conn):
+        """Hashes every password still stored in plaintext. Returns how many were converted."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT employee_id, password FROM Employee WHERE password IS NOT NULL")
+            rows = [row for row in cursor.fetchall() if not self.is_hashed(row['password'])]
+            hashes = list(self.executor.map(lambda row: self.hash(row['password']), rows))
+            cursor.executemany("UPDATE Employee SET password = %s WHERE employee_id = %s",
+                               [(new_hash, row['employee_id']) for new_hash, row in zip(hashes, rows)])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        return len(rows)
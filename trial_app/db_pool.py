@@ -0,0 +1,472 @@
+"""
+Pooled MySQL connections for the Flask app.
+
+MySQLPool is a drop-in replacement for flask_mysqldb.MySQL: routes keep
+using `mysql.connection`, but each app context now borrows a connection
+from a bounded per-process pool and hands it back on teardown instead of
+opening and closing a fresh one.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from flask import g, has_request_context, request, session
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection frees up within the pool's wait timeout."""
+
+
+class _PooledConnection:
+    """Bookkeeping for one open connection."""
+
+    __slots__ = ('raw', 'created_at', 'last_used')
+
+    def __init__(self, raw, now):
+        self.raw = raw
+        self.created_at = now
+        self.last_used = now
+
+
+class ConnectionPool:
+    """
+    A thread-safe pool of DB-API connections.
+
+    connect      -- zero-argument callable that opens a new connection
+    min_size     -- connections kept open even when idle
+    max_size     -- hard cap on open connections; extra callers wait
+    idle_timeout -- seconds an idle connection (above min_size) is kept
+    recycle      -- seconds after which a connection is replaced (0 = never)
+    pre_ping     -- check a connection is alive before handing it out
+    wait_timeout -- seconds a caller waits for a free connection
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, idle_timeout=300.0,
+                 recycle=3600.0, pre_ping=True, wait_timeout=5.0, clock=time.monotonic):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1.")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self.wait_timeout = wait_timeout
+        self._clock = clock
+
+        self._idle = deque()   # most recently returned connection on the right
+        self._in_use = {}      # id(raw connection) -> _PooledConnection
+        self._size = 0         # open connections, idle + checked out
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # Metrics
+        self.checkouts = 0
+        self.timeouts = 0
+        self.created = 0
+        self.discarded = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+        for _ in range(min_size):
+            conn = self._open()
+            with self._cond:
+                self._size += 1
+                self._idle.append(conn)
+
+    # --- Public API ---
+
+    def acquire(self, timeout=None):
+        """Checks out a raw connection, waiting up to `timeout` seconds."""
+        timeout = self.wait_timeout if timeout is None else timeout
+        started = self._clock()
+        deadline = started + timeout
+        pooled = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed.")
+                self._expire_idle()
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Reserve the slot now, open the connection outside the lock
+                    self._size += 1
+                    break
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f"No database connection available after {timeout:.1f}s "
+                        f"(pool size {self.max_size})."
+                    )
+                self._cond.wait(remaining)
+
+            waited = self._clock() - started
+            self.checkouts += 1
+            self.wait_time_total += waited
+            self.wait_time_max = max(self.wait_time_max, waited)
+
+        try:
+            if pooled is None:
+                pooled = self._open()
+            else:
+                pooled = self._check(pooled)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        self._in_use_add(pooled)
+        return pooled.raw
+
+    def release(self, raw, discard=False):
+        """
+        Returns a connection to the pool. Any open transaction is rolled back
+        so the next borrower starts clean; broken connections are dropped.
+        """
+        pooled = self._in_use_pop(raw)
+        if pooled is None:
+            return
+        if not discard:
+            try:
+                raw.rollback()
+            except Exception:
+                discard = True
+        if not discard and self.recycle and self._clock() - pooled.created_at > self.recycle:
+            discard = True
+
+        with self._cond:
+            if discard or self._closed:
+                self._size -= 1
+                self.discarded += 1
+            else:
+                pooled.last_used = self._clock()
+                self._idle.append(pooled)
+            self._cond.notify()
+        if discard or self._closed:
+            self._close_quietly(raw)
+
+    def close(self):
+        """Closes every idle connection; checked-out ones close on release."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            self._close_quietly(pooled.raw)
+
+    def stats(self):
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                'size': self._size,
+                'idle': idle,
+                'in_use': self._size - idle,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'created': self.created,
+                'discarded': self.discarded,
+                'wait_time_total': round(self.wait_time_total, 6),
+                'wait_time_max': round(self.wait_time_max, 6),
+            }
+
+    # --- Internals ---
+
+    def _open(self):
+        raw = self._connect()
+        with self._cond:
+            self.created += 1
+        return _PooledConnection(raw, self._clock())
+
+    def _check(self, pooled):
+        """Replaces a connection that is too old or fails its ping."""
+        too_old = self.recycle and self._clock() - pooled.created_at > self.recycle
+        if too_old or (self.pre_ping and not self._ping(pooled.raw)):
+            self._close_quietly(pooled.raw)
+            with self._cond:
+                self.discarded += 1
+            return self._open()
+        return pooled
+
+    def _expire_idle(self):
+        """Drops connections idle past idle_timeout, keeping min_size open. Holds the lock."""
+        if not self.idle_timeout:
+            return
+        now = self._clock()
+        # The oldest idle connections are on the left
+        while self._idle and self._size > self.min_size and \
+                now - self._idle[0].last_used > self.idle_timeout:
+            pooled = self._idle.popleft()
+            self._size -= 1
+            self.discarded += 1
+            self._close_quietly(pooled.raw)
+
+    @staticmethod
+    def _ping(raw):
+        try:
+            if hasattr(raw, 'ping'):
+                raw.ping()
+            else:
+                cursor = raw.cursor()
+                cursor.execute("SELECT 1")
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _in_use_add(self, pooled):
+        with self._cond:
+            self._in_use[id(pooled.raw)] = pooled
+
+    def _in_use_pop(self, raw):
+        with self._cond:
+            return self._in_use.pop(id(raw), None)
+
+
+class ReplicaSet:
+    """
+    Round-robin over the connection pools of read replicas.
+
+    A replica that fails to hand out a working connection (the pool's
+    pre-ping or connect fails) is marked down and skipped for
+    `retry_after` seconds, after which the next checkout tries it again.
+    """
+
+    def __init__(self, pools, retry_after=10.0, clock=time.monotonic):
+        self.pools = list(pools)          # [(name, ConnectionPool)]
+        self.retry_after = retry_after
+        self._clock = clock
+        self._next = 0
+        self._down_until = {}             # name -> clock time it may be retried
+        self._lock = threading.Lock()
+        self.failures = 0
+
+    def acquire(self):
+        """
+        Checks out a connection from the next healthy replica. Returns
+        (pool, raw connection), or None if no replica can serve right now.
+        """
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self.pools) if self.pools else 0
+        now = self._clock()
+        for offset in range(len(self.pools)):
+            name, pool = self.pools[(start + offset) % len(self.pools)]
+            if self._down_until.get(name, 0) > now:
+                continue
+            try:
+                return pool, pool.acquire()
+            except PoolTimeout:
+                continue  # busy, not broken
+            except Exception:
+                with self._lock:
+                    self.failures += 1
+                    self._down_until[name] = self._clock() + self.retry_after
+        return None
+
+    def healthy(self):
+        now = self._clock()
+        return [name for name, _ in self.pools if self._down_until.get(name, 0) <= now]
+
+    def close(self):
+        for _, pool in self.pools:
+            pool.close()
+
+    def stats(self):
+        healthy = set(self.healthy())
+        return [dict(pool.stats(), replica=name, healthy=name in healthy) for name, pool in self.pools]
+
+
+class MySQLPool:
+    """
+    Flask extension exposing `connection` like flask_mysqldb.MySQL, backed
+    by a ConnectionPool. Reads the same MYSQL_* settings plus DB_POOL_*.
+
+    With MYSQL_REPLICAS set, `read_connection` hands read-only views a
+    connection to one of the replicas instead. After a write request
+    (anything but GET/HEAD/OPTIONS) the session is pinned to the primary
+    for DB_REPLICA_PIN_SECONDS, so the redirect that follows a write reads
+    its own changes.
+
+    `driver` is the DB-API module used to connect (MySQLdb by default); a
+    fake one makes the routing testable without MySQL.
+    """
+
+    def __init__(self, app=None, driver=None):
+        self.app = app
+        self.driver = driver
+        self._pool = None
+        self._replicas = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+        # Optional hooks (see metrics.py): wraps each borrowed connection, and
+        # is told how long each checkout waited for the pool
+        self.connection_wrapper = None
+        self.wait_observer = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('MYSQL_HOST', 'localhost')
+        app.config.setdefault('MYSQL_PORT', 3306)
+        app.config.setdefault('MYSQL_CURSORCLASS', None)
+        app.config.setdefault('MYSQL_CHARSET', None)
+        app.config.setdefault('MYSQL_REPLICAS', [])  # ['host', 'host:port', ...]
+        app.config.setdefault('DB_POOL_MIN_SIZE', 1)
+        app.config.setdefault('DB_POOL_MAX_SIZE', 10)
+        app.config.setdefault('DB_POOL_IDLE_TIMEOUT', 300.0)
+        app.config.setdefault('DB_POOL_RECYCLE', 3600.0)
+        app.config.setdefault('DB_POOL_PRE_PING', True)
+        app.config.setdefault('DB_POOL_WAIT_TIMEOUT', 5.0)
+        app.config.setdefault('DB_REPLICA_PIN_SECONDS', 5.0)
+        app.config.setdefault('DB_REPLICA_RETRY_AFTER', 10.0)
+        self.app = app
+        app.after_request(self._pin_after_write)
+        app.teardown_appcontext(self.teardown)
+
+    def _connect(self, host=None, port=None):
+        if self.driver is None:
+            import MySQLdb
+            import MySQLdb.cursors
+            self.driver = MySQLdb
+
+        config = self.app.config
+        kwargs = {
+            'host': host or config['MYSQL_HOST'],
+            'port': int(port or config['MYSQL_PORT']),
+            'user': config['MYSQL_USER'],
+            'passwd': config['MYSQL_PASSWORD'],
+            'db': config['MYSQL_DB'],
+        }
+        if config['MYSQL_CURSORCLASS']:
+            kwargs['cursorclass'] = getattr(self.driver.cursors, config['MYSQL_CURSORCLASS'])
+        if config['MYSQL_CHARSET']:
+            kwargs['charset'] = config['MYSQL_CHARSET']
+        return self.driver.connect(**kwargs)
+
+    def _new_pool(self, connect, min_size):
+        config = self.app.config
+        return ConnectionPool(
+            connect,
+            min_size=min_size,
+            max_size=int(config['DB_POOL_MAX_SIZE']),
+            idle_timeout=float(config['DB_POOL_IDLE_TIMEOUT']),
+            recycle=float(config['DB_POOL_RECYCLE']),
+            pre_ping=bool(config['DB_POOL_PRE_PING']),
+            wait_timeout=float(config['DB_POOL_WAIT_TIMEOUT']),
+        )
+
+    def _ensure_pools(self):
+        """Creates this process's pools on first use (and again after a fork)."""
+        pid = os.getpid()
+        if self._pool is None or self._pool_pid != pid:
+            with self._lock:
+                if self._pool is None or self._pool_pid != pid:
+                    config = self.app.config
+                    self._pool = self._new_pool(self._connect, int(config['DB_POOL_MIN_SIZE']))
+                    replicas = []
+                    for address in config['MYSQL_REPLICAS']:
+                        host, _, port = address.partition(':')
+                        connect = lambda host=host, port=port: self._connect(host, port or None)
+                        # min_size=0: a replica that is down must not stop the app starting
+                        replicas.append((address, self._new_pool(connect, 0)))
+                    self._replicas = ReplicaSet(replicas, float(config['DB_REPLICA_RETRY_AFTER'])) \
+                        if replicas else None
+                    self._pool_pid = pid
+
+    @property
+    def pool(self):
+        """The primary's pool for this process."""
+        self._ensure_pools()
+        return self._pool
+
+    @property
+    def replicas(self):
+        """The ReplicaSet for this process, or None if no replicas are configured."""
+        self._ensure_pools()
+        return self._replicas
+
+    def _borrowed(self, pool):
+        started = time.perf_counter()
+        raw = pool.acquire()
+        if self.wait_observer is not None:
+            self.wait_observer(time.perf_counter() - started)
+        return raw
+
+    def _wrap(self, raw):
+        return self.connection_wrapper(raw) if self.connection_wrapper else raw
+
+    @property
+    def connection(self):
+        """The primary connection borrowed by the current app context."""
+        if '_db_conn' not in g:
+            raw = self._borrowed(self.pool)
+            g._db_raw = raw
+            g._db_conn = self._wrap(raw)
+        return g._db_conn
+
+    @property
+    def read_connection(self):
+        """
+        A connection for read-only queries: a replica's if one is configured,
+        healthy and the session isn't pinned to the primary, otherwise the
+        primary `connection`.
+        """
+        if '_db_read_conn' in g:
+            return g._db_read_conn
+        acquired = self.acquire_replica()
+        if acquired is None:
+            return self.connection
+        g._db_read = acquired
+        g._db_read_conn = self._wrap(acquired[1])
+        return g._db_read_conn
+
+    def acquire_replica(self):
+        """(pool, raw connection) from a replica, or None when reads should go to the primary."""
+        replicas = self.replicas
+        if replicas is None or self.pinned():
+            return None
+        started = time.perf_counter()
+        acquired = replicas.acquire()
+        if acquired is not None and self.wait_observer is not None:
+            self.wait_observer(time.perf_counter() - started)
+        return acquired
+
+    def pinned(self):
+        """True while the session is inside its read-your-writes window."""
+        return has_request_context() and session.get('db_pinned_until', 0) > time.time()
+
+    def _pin_after_write(self, response):
+        if self.app.config['MYSQL_REPLICAS'] and request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            session['db_pinned_until'] = time.time() + float(self.app.config['DB_REPLICA_PIN_SECONDS'])
+        return response
+
+    def stats(self):
+        stats = self.pool.stats()
+        if self.replicas is not None:
+            stats['replicas'] = self.replicas.stats()
+        return stats
+
+    def teardown(self, exception):
+        g.pop('_db_read_conn', None)
+        read = g.pop('_db_read', None)
+        if read is not None:
+            pool, raw = read
+            pool.release(raw)
+        g.pop('_db_conn', None)
+        raw = g.pop('_db_raw', None)
+        if raw is not None:
+            self.pool.release(raw)
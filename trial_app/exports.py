@@ -0,0 +1,92 @@
+"""
+Streaming CSV / NDJSON exports of the listing pages and reports.
+
+Rows are written to the response as they come off the cursor, a chunk at
+a time, so an export of any size uses a constant amount of memory.
+Optionally the stream is gzip-compressed on the fly.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import Response, stream_with_context
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+# Rows written per chunk of the HTTP response
+ROWS_PER_CHUNK = 500
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Cannot export {type(value).__name__} as JSON.")
+
+
+def csv_chunks(rows, columns):
+    """Header line, then the rows as CSV text in chunks of ROWS_PER_CHUNK."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    count = 0
+    for row in rows:
+        writer.writerow([row.get(column) for column in columns])
+        count += 1
+        if count % ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def ndjson_chunks(rows, columns):
+    """One JSON object per line, in chunks of ROWS_PER_CHUNK."""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({column: row.get(column) for column in columns},
+                                default=_json_default))
+        if len(lines) == ROWS_PER_CHUNK:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def gzip_chunks(chunks):
+    """Compresses a stream of text chunks into a gzip stream."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_response(rows, columns, fmt, filename, compress=False):
+    """
+    A streamed download of `rows` (any iterable of dicts, typically a
+    generator over a server-side cursor) as CSV or NDJSON.
+    """
+    if fmt == 'csv':
+        chunks, mimetype = csv_chunks(rows, columns), 'text/csv'
+    elif fmt == 'ndjson':
+        chunks, mimetype = ndjson_chunks(rows, columns), 'application/x-ndjson'
+    else:
+        raise ValueError(f"Unsupported export format {fmt!r}; use 'csv' or 'ndjson'.")
+
+    filename = f"{filename}.{fmt}"
+    if compress:
+        chunks = gzip_chunks(chunks)
+        filename += '.gz'
+        mimetype = 'application/gzip'
+    else:
+        chunks = (chunk.encode('utf-8') for chunk in chunks)
+
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
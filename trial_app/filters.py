@@ -0,0 +1,93 @@
+"""
+Filters for the listing pages and the search API.
+
+A FilterSet turns query-string values into parameterized WHERE fragments
+that pagination.build_query ANDs together. Column names only ever come
+from the filter definitions, never from the request, and every filter
+compiles to an indexable predicate on a bare column (equality, a range, or
+a LIKE 'prefix%') so MySQL can use the indexes from migration 006:
+
+    ANIMAL_FILTERS = FilterSet([
+        Filter('species', 'A.species'),
+        Filter('min_age', 'A.age', '>=', int),
+        Filter('name', 'A.name', 'prefix'),
+    ])
+    conditions, params, applied = ANIMAL_FILTERS.parse(request.args)
+"""
+
+
+def like_prefix(term):
+    """A LIKE pattern matching values that start with `term` literally."""
+    return term.replace('\\', r'\\').replace('%', r'\%').replace('_', r'\_') + '%'
+
+
+class Filter:
+    """
+    One query parameter.
+
+    name     -- the query-string key (e.g. 'min_age')
+    columns  -- the column the value is compared with; for 'prefix', a list
+                of columns matches if any of them starts with the value
+    operator -- '=', '>=', '<=' or 'prefix'
+    convert  -- turns the submitted string into the SQL value; raises
+                ValueError for bad input
+    label    -- how the filter is named in error messages
+    """
+
+    def __init__(self, name, columns, operator='=', convert=str, label=None):
+        if operator not in ('=', '>=', '<=', 'prefix'):
+            raise ValueError(f"Unsupported filter operator {operator!r}.")
+        self.name = name
+        self.columns = [columns] if isinstance(columns, str) else list(columns)
+        self.operator = operator
+        self.convert = convert
+        self.label = label or name.replace('_', ' ')
+
+    def clause(self, value):
+        """The WHERE fragment and params for one (already converted) value."""
+        if self.operator == 'prefix':
+            pattern = like_prefix(value)
+            parts = [f"{column} LIKE %s" for column in self.columns]
+            clause = parts[0] if len(parts) == 1 else "(" + " OR ".join(parts) + ")"
+            return clause, [pattern] * len(parts)
+        return f"{self.columns[0]} {self.operator} %s", [value]
+
+
+class FilterSet:
+    """The filters a listing accepts."""
+
+    def __init__(self, filters):
+        self.filters = list(filters)
+
+    @property
+    def names(self):
+        return [f.name for f in self.filters]
+
+    def parse(self, args):
+        """
+        Returns (conditions, params, applied) for the filters present in
+        `args`; `applied` maps each used name to its submitted string, for
+        building page links. Blank values are ignored. Raises ValueError
+        naming the first value that can't be converted.
+        """
+        conditions, params, applied = [], [], {}
+        for f in self.filters:
+            raw = (args.get(f.name) or '').strip()
+            if not raw:
+                continue
+            try:
+                value = f.convert(raw)
+            except (ValueError, TypeError):
+                raise ValueError(f"Invalid {f.label}: {raw!r}.") from None
+            clause, values = f.clause(value)
+            conditions.append(clause)
+            params.extend(values)
+            applied[f.name] = raw
+        return conditions, params, applied
+
+
+def non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise ValueError(value)
+    return number
@@ -0,0 +1,121 @@
+"""
+Response caching with ETags for the read-only listing pages.
+
+Each cached view declares the tables it reads. Every table has a change
+version that the write routes bump; a page's ETag is a hash of its route,
+user, query string and the versions of its tables. A request whose
+If-None-Match still matches gets a 304 straight away, and a repeat request
+without one gets the stored body - neither runs the view, so neither
+touches MySQL or Jinja.
+
+Versions are per worker process, like the other caches: a write made
+through another worker is picked up once RESPONSE_CACHE_TTL runs out, when
+every ETag rolls over.
+"""
+import hashlib
+import threading
+import time
+import uuid
+from email.utils import formatdate
+from functools import wraps
+
+from flask import Response, g, make_response, message_flashed, request, session
+
+from caching import TTLCache
+
+# Query parameters whose responses are streamed and never cached
+UNCACHEABLE_ARGS = ('format', 'stream')
+
+
+class ResponseCache:
+    """Registered as app.extensions['response_cache']."""
+
+    def __init__(self, app=None, clock=time.time):
+        self._clock = clock
+        self._versions = {}       # table -> change counter
+        self._modified = {}       # table -> wall time of the last bump
+        self._lock = threading.Lock()
+        self._token = uuid.uuid4().hex  # a restart invalidates every ETag
+        self._started = clock()
+        self.bodies = None
+        self.not_modified = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RESPONSE_CACHE_TTL', 60.0)
+        app.config.setdefault('RESPONSE_CACHE_SIZE', 256)
+        self.ttl = float(app.config['RESPONSE_CACHE_TTL'])
+        self.bodies = TTLCache(maxsize=int(app.config['RESPONSE_CACHE_SIZE']), ttl=self.ttl)
+        message_flashed.connect(self._flashed, app)
+        app.extensions['response_cache'] = self
+
+    def bump(self, *tables):
+        """Marks tables as changed; pages that read them get new ETags."""
+        now = self._clock()
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+                self._modified[table] = now
+
+    def etag(self, key, tables):
+        window = int(self._clock() // self.ttl) if self.ttl else 0
+        versions = tuple((table, self._versions.get(table, 0)) for table in tables)
+        digest = hashlib.blake2b(repr((self._token, window, key, versions)).encode(), digest_size=16)
+        return digest.hexdigest()
+
+    def last_modified(self, tables):
+        return max([self._modified.get(table, self._started) for table in tables])
+
+    def stats(self):
+        return dict(self.bodies.stats(), not_modified=self.not_modified, versions=dict(self._versions))
+
+    def cached(self, *tables):
+        """
+        View decorator for GET pages that only read `tables`. Put it below
+        @requires_roles so access is still checked on every request.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapped(*args, **kwargs):
+                if request.method != 'GET' or '_flashes' in session or \
+                        any(arg in request.args for arg in UNCACHEABLE_ARGS):
+                    # Pending flash messages or a streamed response: render normally
+                    return view(*args, **kwargs)
+
+                key = (request.endpoint, session.get('role'), session.get('username'),
+                       tuple(sorted(request.args.items(multi=True))))
+                etag = self.etag(key, tables)
+                last_modified = self.last_modified(tables)
+
+                if request.if_none_match.contains(etag):
+                    self.not_modified += 1
+                    return self._headers(Response(status=304), etag, last_modified)
+
+                stored = self.bodies.get((key, etag))
+                if stored is not None:
+                    body, mimetype = stored
+                    return self._headers(Response(body, mimetype=mimetype), etag, last_modified)
+
+                g._response_flashed = False
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed or g._response_flashed:
+                    # Errors and one-off messages are not worth replaying
+                    return response
+                self.bodies.set((key, etag), (response.get_data(), response.mimetype))
+                return self._headers(response, etag, last_modified)
+            return wrapped
+        return decorator
+
+    @staticmethod
+    def _headers(response, etag, last_modified):
+        response.set_etag(etag)
+        response.headers['Last-Modified'] = formatdate(last_modified, usegmt=True)
+        # Browsers keep the page but must revalidate it; shared caches must not store it
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.vary.add('Cookie')
+        return response
+
+    @staticmethod
+    def _flashed(sender, message, category, **extra):
+        g._response_flashed = True
@@ -0,0 +1,353 @@
+"""
+Background jobs for work that shouldn't hold a request worker, such as the
+full-history reports.
+
+Jobs are rows in a local SQLite database (JOB_DB_PATH), so queued work
+survives a restart and every worker process on the host shares one queue.
+Each process runs JOB_WORKERS threads that claim jobs oldest first. A job
+type's `concurrency` caps how many of its jobs run at once across all
+processes; a failed job is retried after `backoff`, 2 x `backoff`, ... until
+it has had `attempts` tries. A claimed job holds a lease of JOB_LEASE
+seconds, renewed every third of that while it runs; if its process dies the
+lease runs out and the job is claimed again. Each claim has its own token,
+so a runner that lost its lease can't overwrite the result of the next one.
+
+    @job_queue.job('ticket_history', concurrency=1)
+    def ticket_history():
+        return Report(['date', 'tickets_sold'], iter_query("SELECT ..."))
+
+    job_id = job_queue.enqueue('ticket_history', owner=session['id'])
+
+Handlers run inside an app context. A handler that returns a Report has its
+rows written to a CSV file under JOB_RESULT_DIR; any other return value is
+stored as JSON. Finished jobs are deleted after JOB_RESULT_TTL seconds.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from exports import csv_chunks
+
+log = logging.getLogger('zoo.jobs')
+
+# A tabular result: `rows` is any iterable of dicts, written out as CSV
+Report = namedtuple('Report', ['columns', 'rows'])
+
+JobType = namedtuple('JobType', ['handler', 'concurrency', 'attempts', 'backoff'])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id           TEXT PRIMARY KEY,
+    type         TEXT NOT NULL,
+    params       TEXT NOT NULL,
+    owner        INTEGER,
+    status       TEXT NOT NULL,            -- queued, running, done, failed
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    run_after    REAL NOT NULL,
+    lease_until  REAL,
+    claim        TEXT,                     -- token of the current run
+    created_at   REAL NOT NULL,
+    started_at   REAL,
+    finished_at  REAL,
+    result       TEXT,
+    result_file  TEXT,
+    error        TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, run_after);
+CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (finished_at);
+"""
+
+
+class JobQueue:
+    """Registered as app.extensions['jobs']."""
+
+    def __init__(self, app=None, clock=time.time):
+        self._clock = clock
+        self.types = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._pid = None
+        self._schema_ready = False
+        self._next_prune = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        config.setdefault('JOB_DB_PATH', os.path.join(app.root_path, 'job_data', 'jobs.sqlite3'))
+        config.setdefault('JOB_RESULT_DIR', os.path.join(app.root_path, 'job_data', 'results'))
+        config.setdefault('JOB_WORKERS', 2)
+        config.setdefault('JOB_POLL_INTERVAL', 1.0)
+        config.setdefault('JOB_LEASE', 600.0)
+        config.setdefault('JOB_RESULT_TTL', 3600.0)
+        self.app = app
+        self.path = config['JOB_DB_PATH']
+        self.result_dir = config['JOB_RESULT_DIR']
+        app.before_request(self.ensure_started)
+        app.extensions['jobs'] = self
+
+    def job(self, name, concurrency=1, attempts=3, backoff=5.0):
+        """Registers a job handler under `name`."""
+        def decorator(handler):
+            self.types[name] = JobType(handler, concurrency, attempts, backoff)
+            return handler
+        return decorator
+
+    # --- Storage ---
+
+    def _db(self):
+        """This thread's SQLite connection (autocommit; transactions are explicit)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            self._create_schema()
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _create_schema(self):
+        """Creates the queue's directories and tables on first use, not at startup."""
+        if self._schema_ready:
+            return
+        with self._lock:
+            if not self._schema_ready:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                os.makedirs(self.result_dir, exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+                try:
+                    conn.executescript(SCHEMA)
+                finally:
+                    conn.close()
+                self._schema_ready = True
+
+    def enqueue(self, name, owner=None, **params):
+        """Queues a job and returns its id. `params` must be JSON-serializable."""
+        job_type = self.types.get(name)
+        if job_type is None:
+            raise ValueError(f"Unknown job type {name!r}.")
+        job_id = uuid.uuid4().hex
+        now = self._clock()
+        self._db().execute("""
+            INSERT INTO jobs (id, type, params, owner, status, max_attempts, run_after, created_at)
+            VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)
+        """, [job_id, name, json.dumps(params), owner, job_type.attempts, now, now])
+        self.ensure_started()
+        self._wake.set()
+        return job_id
+
+    def get(self, job_id):
+        """The job's row as a dict (params and result decoded), or None."""
+        row = self._db().execute("SELECT * FROM jobs WHERE id = ?", [job_id]).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return job
+
+    def result_path(self, job):
+        return os.path.join(self.result_dir, job['result_file']) if job['result_file'] else None
+
+    def stats(self):
+        counts = {}
+        for row in self._db().execute("SELECT type, status, COUNT(*) AS n FROM jobs GROUP BY type, status"):
+            counts.setdefault(row['type'], {})[row['status']] = row['n']
+        return {'workers': len(self._threads), 'jobs': counts}
+
+    # --- Workers ---
+
+    def ensure_started(self):
+        """Starts this process's worker threads (again after a fork)."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._stopping.clear()
+                self._threads = [
+                    threading.Thread(target=self._work, name=f'job-worker-{n}', daemon=True)
+                    for n in range(int(self.app.config['JOB_WORKERS']))
+                ]
+                for thread in self._threads:
+                    thread.start()
+                self._pid = os.getpid()
+
+    def stop(self, timeout=None):
+        """Lets the running jobs finish and stops the workers."""
+        self._stopping.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._pid = None
+
+    def _work(self):
+        poll_interval = float(self.app.config['JOB_POLL_INTERVAL'])
+        while not self._stopping.is_set():
+            try:
+                self._prune()
+                job = self._claim()
+            except sqlite3.Error:
+                log.exception("Job queue unavailable")
+                job = None
+            if job is None:
+                self._wake.wait(poll_interval)
+                self._wake.clear()
+                continue
+            self._run(job)
+
+    def _claim(self):
+        """Marks the next runnable job as running and returns it, or None."""
+        now = self._clock()
+        db = self._db()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            # Jobs whose process died on their last try are not claimed again
+            db.execute("""
+                UPDATE jobs SET status = 'failed', finished_at = ?, lease_until = NULL, claim = NULL,
+                                error = 'The worker running this job stopped.'
+                WHERE status = 'running' AND lease_until <= ? AND attempts >= max_attempts
+            """, [now, now])
+            running = dict(db.execute("""
+                SELECT type, COUNT(*) FROM jobs
+                WHERE status = 'running' AND lease_until > ?
+                GROUP BY type
+            """, [now]).fetchall())
+            open_types = [name for name, job_type in self.types.items()
+                          if running.get(name, 0) < job_type.concurrency]
+            if not open_types:
+                db.execute('COMMIT')
+                return None
+            row = db.execute(f"""
+                SELECT id, type, params, attempts FROM jobs
+                WHERE type IN ({', '.join('?' * len(open_types))})
+                  AND ((status = 'queued' AND run_after <= ?) OR (status = 'running' AND lease_until <= ?))
+                ORDER BY run_after, created_at
+                LIMIT 1
+            """, open_types + [now, now]).fetchone()
+            if row is not None:
+                claim = uuid.uuid4().hex
+                db.execute("""
+                    UPDATE jobs SET status = 'running', attempts = attempts + 1,
+                                    started_at = ?, lease_until = ?, claim = ?
+                    WHERE id = ?
+                """, [now, now + float(self.app.config['JOB_LEASE']), claim, row['id']])
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        if row is None:
+            return None
+        return {'id': row['id'], 'type': row['type'], 'params': json.loads(row['params']),
+                'attempts': row['attempts'] + 1, 'claim': claim}
+
+    def _heartbeat(self, job, done):
+        """Renews the job's lease every third of JOB_LEASE until `done` is set."""
+        lease = float(self.app.config['JOB_LEASE'])
+        while not done.wait(lease / 3):
+            try:
+                renewed = self._db().execute("""
+                    UPDATE jobs SET lease_until = ?
+                    WHERE id = ? AND claim = ? AND status = 'running'
+                """, [self._clock() + lease, job['id'], job['claim']]).rowcount
+            except sqlite3.Error:
+                log.exception("Could not renew the lease of job %s", job['id'])
+                continue
+            if not renewed:
+                log.warning("Job %s (%s) lost its lease while running", job['id'], job['type'])
+                return
+
+    def _finish(self, job, sql, params):
+        """Runs a final UPDATE of the job if this run still holds its claim. Returns whether it did."""
+        updated = self._db().execute(sql + " WHERE id = ? AND claim = ?",
+                                     params + [job['id'], job['claim']]).rowcount
+        if not updated:
+            log.warning("Job %s (%s) was claimed again while it ran; dropping this run's outcome",
+                        job['id'], job['type'])
+        return bool(updated)
+
+    def _run(self, job):
+        job_type = self.types[job['type']]
+        started = time.perf_counter()
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, done),
+                                     name=f"job-heartbeat-{job['id']}", daemon=True)
+        heartbeat.start()
+        try:
+            with self.app.app_context():
+                result = job_type.handler(**job['params'])
+                result_file = None
+                if isinstance(result, Report):
+                    result_file, rows = self._write_report(job, result)
+                    result = {'rows': rows, 'columns': list(result.columns)}
+        except Exception as e:
+            log.exception("Job %s (%s) failed on try %d", job['id'], job['type'], job['attempts'])
+            now = self._clock()
+            if job['attempts'] < job_type.attempts:
+                self._finish(job, """
+                    UPDATE jobs SET status = 'queued', run_after = ?, lease_until = NULL, claim = NULL, error = ?
+                """, [now + job_type.backoff * 2 ** (job['attempts'] - 1), str(e)])
+            else:
+                self._finish(job, """
+                    UPDATE jobs SET status = 'failed', finished_at = ?, lease_until = NULL, claim = NULL, error = ?
+                """, [now, str(e)])
+            return
+        finally:
+            done.set()
+        if not self._finish(job, """
+            UPDATE jobs SET status = 'done', finished_at = ?, lease_until = NULL, claim = NULL, error = NULL,
+                            result = ?, result_file = ?
+        """, [self._clock(), json.dumps(result, default=str), result_file]):
+            if result_file:
+                os.remove(os.path.join(self.result_dir, result_file))
+            return
+        log.info("Job %s (%s) finished in %.2fs", job['id'], job['type'], time.perf_counter() - started)
+
+    def _write_report(self, job, report):
+        """Writes a Report's rows as CSV. Returns (file name, row count)."""
+        # Named per claim, so a run that lost its lease never touches the next run's file
+        filename = f"{job['id']}-{job['claim'][:8]}.csv"
+        path = os.path.join(self.result_dir, filename)
+        count = 0
+
+        def counted(rows):
+            nonlocal count
+            for row in rows:
+                count += 1
+                yield row
+
+        with open(path + '.tmp', 'w', newline='', encoding='utf-8') as f:
+            for chunk in csv_chunks(counted(report.rows), report.columns):
+                f.write(chunk)
+        os.replace(path + '.tmp', path)
+        return filename, count
+
+    def _prune(self):
+        """Deletes finished jobs (and their files) older than JOB_RESULT_TTL, at most once a minute."""
+        now = self._clock()
+        if now < self._next_prune:
+            return
+        self._next_prune = now + 60
+        cutoff = now - float(self.app.config['JOB_RESULT_TTL'])
+        db = self._db()
+        expired = db.execute("""
+            SELECT id, result_file FROM jobs
+            WHERE status IN ('done', 'failed') AND finished_at < ?
+        """, [cutoff]).fetchall()
+        for row in expired:
+            if row['result_file']:
+                try:
+                    os.remove(os.path.join(self.result_dir, row['result_file']))
+                except FileNotFoundError:
+                    pass
+            db.execute("DELETE FROM jobs WHERE id = ?", [row['id']])
@@ -0,0 +1,330 @@
+"""
+In-process metrics in the Prometheus text format, served at /metrics.
+
+Records, per worker process:
+- request latency per endpoint/method/status
+- SQL timing and row counts per normalized statement (literals -> ?)
+- template render time
+- time spent waiting for a pooled DB connection
+and logs every query slower than SLOW_QUERY_THRESHOLD seconds to the
+'zoo.slow_queries' logger.
+
+Everything lives in a Registry object, so a fresh one can be handed to
+init_app() to inspect metrics without any external collector.
+"""
+import logging
+import re
+import threading
+import time
+
+from flask import g, request, before_render_template, template_rendered
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+slow_query_log = logging.getLogger('zoo.slow_queries')
+
+
+# --- Metric types ---
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(labels.get(name, '') for name in self.label_names)
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.type_name}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._expose_one(key, value))
+        return lines
+
+    def _expose_one(self, key, value):
+        """Yields the exposition lines for one label set."""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type_name = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _expose_one(self, key, value):
+        yield f'{self.name}{_format_labels(self.label_names, key)} {value}'
+
+
+class Gauge(_Metric):
+    type_name = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels))
+
+    def _expose_one(self, key, value):
+        yield f'{self.name}{_format_labels(self.label_names, key)} {value}'
+
+
+class Histogram(_Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts..., sum, count]
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[-1] if state else 0
+
+    def total(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[-2] if state else 0.0
+
+    def _expose_one(self, key, state):
+        cumulative = 0
+        for bound, count in zip(self.buckets, state):
+            cumulative += count
+            labels = _format_labels(self.label_names, key, [('le', repr(float(bound)))])
+            yield f'{self.name}_bucket{labels} {cumulative}'
+        labels = _format_labels(self.label_names, key, [('le', '+Inf')])
+        yield f'{self.name}_bucket{labels} {state[-1]}'
+        yield f'{self.name}_sum{_format_labels(self.label_names, key)} {state[-2]}'
+        yield f'{self.name}_count{_format_labels(self.label_names, key)} {state[-1]}'
+
+
+class Registry:
+    """A named set of metrics that can be rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _add(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._add(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text, labels=()):
+        return self._add(Gauge, name, help_text, labels)
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram, name, help_text, labels, buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def expose(self):
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.expose())
+        return '\n'.join(lines) + '\n'
+
+
+# --- SQL instrumentation ---
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_MULTI_ROW = re.compile(r"(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """
+    Groups statements that differ only in their values:
+    "SELECT * FROM Visitor WHERE visitor_id IN (1, 2, 3)"
+    -> "SELECT * FROM Visitor WHERE visitor_id IN (...)"
+    """
+    if isinstance(sql, bytes):
+        sql = sql.decode('utf-8', 'replace')
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _VALUE_LIST.sub('(...)', sql)
+    sql = _MULTI_ROW.sub(r'\1', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class TimedCursor:
+    """Wraps a DB-API cursor and reports every execute() to `observe`."""
+
+    def __init__(self, cursor, observe):
+        self._cursor = cursor
+        self._observe = observe
+
+    def execute(self, query, args=None):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(query, args)
+        finally:
+            self._observe(query, time.perf_counter() - started, self._cursor.rowcount)
+
+    def executemany(self, query, args):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, args)
+        finally:
+            self._observe(query, time.perf_counter() - started, self._cursor.rowcount)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class TimedConnection:
+    """Wraps a DB-API connection so its cursors are TimedCursors."""
+
+    def __init__(self, connection, observe):
+        self._connection = connection
+        self._observe = observe
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._connection.cursor(*args, **kwargs), self._observe)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+# --- Flask integration ---
+
+class Metrics:
+    """Hooks the app's requests, templates and DB pool into a Registry."""
+
+    def __init__(self, app=None, mysql=None, registry=None):
+        self.registry = registry or Registry()
+        if app is not None:
+            self.init_app(app, mysql)
+
+    def init_app(self, app, mysql=None):
+        app.config.setdefault('SLOW_QUERY_THRESHOLD', 0.5)
+        self.app = app
+        r = self.registry
+        self.request_latency = r.histogram(
+            'zoo_http_request_duration_seconds', 'Time to build each response.',
+            ['endpoint', 'method', 'status'])
+        self.query_latency = r.histogram(
+            'zoo_sql_query_duration_seconds', 'Time per SQL statement, by normalized text.',
+            ['statement'])
+        self.query_rows = r.counter(
+            'zoo_sql_rows_total', 'Rows returned or affected, by normalized statement.',
+            ['statement'])
+        self.slow_queries = r.counter(
+            'zoo_sql_slow_queries_total', 'Statements slower than SLOW_QUERY_THRESHOLD.',
+            ['statement'])
+        self.render_latency = r.histogram(
+            'zoo_template_render_seconds', 'Time to render each template.', ['template'])
+        self.pool_wait = r.histogram(
+            'zoo_db_pool_wait_seconds', 'Time spent waiting for a pooled DB connection.')
+        self.pool_connections = r.gauge(
+            'zoo_db_pool_connections', 'Pooled DB connections in this worker.', ['state'])
+        self.pool_checkouts = r.counter(
+            'zoo_db_pool_checkouts_total', 'Connections handed out by this worker\'s pools.')
+        self.replica_up = r.gauge(
+            'zoo_db_replica_up', 'Whether this worker is routing reads to each replica.', ['replica'])
+        self.mysql = mysql
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        if mysql is not None:
+            mysql.connection_wrapper = lambda raw: TimedConnection(raw, self.observe_query)
+            mysql.wait_observer = self._observe_checkout
+        app.extensions['metrics'] = self
+
+    def observe_query(self, query, seconds, rows):
+        statement = normalize_sql(query)
+        self.query_latency.observe(seconds, statement=statement)
+        if rows is not None and rows >= 0:
+            self.query_rows.inc(rows, statement=statement)
+        threshold = self.app.config['SLOW_QUERY_THRESHOLD']
+        if threshold and seconds >= threshold:
+            self.slow_queries.inc(statement=statement)
+            slow_query_log.warning("%.3fs %s [%s]", seconds, statement,
+                                   request.endpoint if request else '-')
+
+    def _observe_checkout(self, seconds):
+        self.pool_wait.observe(seconds)
+        self.pool_checkouts.inc()
+
+    def _before_request(self):
+        g._metrics_started = time.perf_counter()
+
+    def _after_request(self, response):
+        started = g.pop('_metrics_started', None)
+        if started is not None:
+            self.request_latency.observe(
+                time.perf_counter() - started,
+                endpoint=request.endpoint or 'unknown',
+                method=request.method,
+                status=response.status_code,
+            )
+        return response
+
+    def _before_render(self, sender, template, context, **extra):
+        g.setdefault('_metrics_render_started', []).append(time.perf_counter())
+
+    def _after_render(self, sender, template, context, **extra):
+        stack = g.get('_metrics_render_started')
+        if stack:
+            self.render_latency.observe(time.perf_counter() - stack.pop(),
+                                        template=template.name or 'unknown')
+
+    def expose(self):
+        """The registry in the Prometheus text format, with fresh pool gauges."""
+        if self.mysql is not None:
+            stats = self.mysql.stats()
+            for state in ('size', 'idle', 'in_use'):
+                self.pool_connections.set(stats[state], state=state)
+            for replica in stats.get('replicas', []):
+                self.replica_up.set(int(replica['healthy']), replica=replica['replica'])
+        return self.registry.expose()
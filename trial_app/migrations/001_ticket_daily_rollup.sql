@@ -0,0 +1,148 @@
+use zoodb;
+-- Per-day ticket rollup
+-- Keeps COUNT / SUM / AVG of ticket prices per date so the dashboard report
+-- and fn_GetDailyRevenue read one row per day instead of scanning Ticket.
+-- Run after zoodb_procedures_queries.sql, then CALL sp_RebuildTicketRollup()
+-- (or `flask rebuild-ticket-rollup`) once to backfill existing tickets.
+
+-- 1. The rollup table
+-- priced_tickets only counts tickets with a price, matching what AVG(price) does.
+-- Tickets without a date are not rolled up (they have no day to belong to).
+CREATE TABLE Ticket_Daily_Rollup (
+    date DATE PRIMARY KEY,
+    tickets_sold INT NOT NULL DEFAULT 0,
+    priced_tickets INT NOT NULL DEFAULT 0,
+    total_revenue DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    average_price DECIMAL(14,6) AS (
+        IF(priced_tickets > 0, total_revenue / priced_tickets, NULL)
+    ) STORED
+);
+
+-- 2. Triggers to keep it current on every Ticket write
+DELIMITER $$
+CREATE TRIGGER trg_After_Ticket_Insert
+AFTER INSERT ON Ticket
+FOR EACH ROW
+BEGIN
+    IF NEW.date IS NOT NULL THEN
+        INSERT INTO Ticket_Daily_Rollup (date, tickets_sold, priced_tickets, total_revenue)
+        VALUES (NEW.date, 1, IF(NEW.price IS NULL, 0, 1), COALESCE(NEW.price, 0))
+        ON DUPLICATE KEY UPDATE
+            tickets_sold = tickets_sold + 1,
+            priced_tickets = priced_tickets + IF(NEW.price IS NULL, 0, 1),
+            total_revenue = total_revenue + COALESCE(NEW.price, 0);
+    END IF;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER trg_After_Ticket_Delete
+AFTER DELETE ON Ticket
+FOR EACH ROW
+BEGIN
+    IF OLD.date IS NOT NULL THEN
+        UPDATE Ticket_Daily_Rollup
+        SET tickets_sold = tickets_sold - 1,
+            priced_tickets = priced_tickets - IF(OLD.price IS NULL, 0, 1),
+            total_revenue = total_revenue - COALESCE(OLD.price, 0)
+        WHERE date = OLD.date;
+
+        -- Drop days that no longer have any tickets
+        DELETE FROM Ticket_Daily_Rollup
+        WHERE date = OLD.date AND tickets_sold <= 0;
+    END IF;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER trg_After_Ticket_Update
+AFTER UPDATE ON Ticket
+FOR EACH ROW
+BEGIN
+    -- Only date and price affect the rollup
+    IF NOT (OLD.date <=> NEW.date) OR NOT (OLD.price <=> NEW.price) THEN
+        IF OLD.date IS NOT NULL THEN
+            UPDATE Ticket_Daily_Rollup
+            SET tickets_sold = tickets_sold - 1,
+                priced_tickets = priced_tickets - IF(OLD.price IS NULL, 0, 1),
+                total_revenue = total_revenue - COALESCE(OLD.price, 0)
+            WHERE date = OLD.date;
+
+            DELETE FROM Ticket_Daily_Rollup
+            WHERE date = OLD.date AND tickets_sold <= 0;
+        END IF;
+
+        IF NEW.date IS NOT NULL THEN
+            INSERT INTO Ticket_Daily_Rollup (date, tickets_sold, priced_tickets, total_revenue)
+            VALUES (NEW.date, 1, IF(NEW.price IS NULL, 0, 1), COALESCE(NEW.price, 0))
+            ON DUPLICATE KEY UPDATE
+                tickets_sold = tickets_sold + 1,
+                priced_tickets = priced_tickets + IF(NEW.price IS NULL, 0, 1),
+                total_revenue = total_revenue + COALESCE(NEW.price, 0);
+        END IF;
+    END IF;
+END$$
+DELIMITER ;
+
+-- 3. Backfill / rebuild
+-- Recomputes the whole rollup from Ticket in one transaction. Safe to run
+-- again at any time, e.g. after bulk-loading tickets with triggers disabled.
+DELIMITER $$
+CREATE PROCEDURE sp_RebuildTicketRollup()
+BEGIN
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+    DELETE FROM Ticket_Daily_Rollup;
+    INSERT INTO Ticket_Daily_Rollup (date, tickets_sold, priced_tickets, total_revenue)
+    SELECT
+        date,
+        COUNT(ticket_id),
+        COUNT(price),
+        COALESCE(SUM(price), 0)
+    FROM Ticket
+    WHERE date IS NOT NULL
+    GROUP BY date;
+    COMMIT;
+
+    SELECT COUNT(*) AS days_rebuilt FROM Ticket_Daily_Rollup;
+END$$
+DELIMITER ;
+
+-- 4. fn_GetDailyRevenue now reads a single rollup row
+DROP FUNCTION IF EXISTS fn_GetDailyRevenue;
+DELIMITER $$
+CREATE FUNCTION fn_GetDailyRevenue(
+    p_date DATE
+)
+RETURNS DECIMAL(10,2)
+READS SQL DATA
+BEGIN
+    DECLARE total_revenue DECIMAL(10,2);
+
+    SELECT R.total_revenue INTO total_revenue
+    FROM Ticket_Daily_Rollup R
+    WHERE R.date = p_date;
+
+    IF total_revenue IS NULL THEN
+        SET total_revenue = 0.00;
+    END IF;
+
+    RETURN total_revenue;
+END$$
+DELIMITER ;
+
+-- Aggregate Query (rollup version)
+-- Average ticket price per day, read from the rollup
+SELECT 
+    date, 
+    average_price,
+    tickets_sold
+FROM 
+    Ticket_Daily_Rollup
+ORDER BY 
+    date DESC;
@@ -0,0 +1,146 @@
+use zoodb;
+-- Denormalized habitat occupancy
+-- Replaces the COUNT(*) FROM Animal WHERE habitat_id = ... lookups in the
+-- habitats page, sp_AddNewAnimal and trg_Before_Habitat_Delete with a
+-- counter kept on the Habitat row itself.
+-- Note: Animal.habitat_id is already indexed by InnoDB for its foreign key,
+-- so no extra index is added here.
+
+-- 1. The counter column, backfilled from the current data
+ALTER TABLE Habitat
+ADD COLUMN current_occupancy INT NOT NULL DEFAULT 0;
+
+UPDATE Habitat H
+SET current_occupancy = (
+    SELECT COUNT(*) FROM Animal A WHERE A.habitat_id = H.habitat_id
+);
+
+-- 2. Triggers to keep it current on every Animal write
+DELIMITER $$
+CREATE TRIGGER trg_After_Animal_Insert
+AFTER INSERT ON Animal
+FOR EACH ROW
+BEGIN
+    UPDATE Habitat
+    SET current_occupancy = current_occupancy + 1
+    WHERE habitat_id = NEW.habitat_id;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER trg_After_Animal_Delete
+AFTER DELETE ON Animal
+FOR EACH ROW
+BEGIN
+    UPDATE Habitat
+    SET current_occupancy = current_occupancy - 1
+    WHERE habitat_id = OLD.habitat_id;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER trg_After_Animal_Update
+AFTER UPDATE ON Animal
+FOR EACH ROW
+BEGIN
+    -- Moving an animal to another habitat
+    IF NOT (OLD.habitat_id <=> NEW.habitat_id) THEN
+        UPDATE Habitat
+        SET current_occupancy = current_occupancy - 1
+        WHERE habitat_id = OLD.habitat_id;
+
+        UPDATE Habitat
+        SET current_occupancy = current_occupancy + 1
+        WHERE habitat_id = NEW.habitat_id;
+    END IF;
+END$$
+DELIMITER ;
+
+-- 3. sp_AddNewAnimal: O(1) capacity check that is safe under concurrent adds
+-- SELECT ... FOR UPDATE locks the habitat row, so two requests adding to the
+-- same habitat are serialized and cannot both take its last free place.
+DROP PROCEDURE IF EXISTS sp_AddNewAnimal;
+DELIMITER $$
+CREATE PROCEDURE sp_AddNewAnimal(
+    IN p_animal_id INT,
+    IN p_name VARCHAR(100),
+    IN p_species VARCHAR(100),
+    IN p_gender VARCHAR(10),
+    IN p_age INT,
+    IN p_habitat_id INT
+)
+BEGIN
+    DECLARE v_occupancy INT;
+    DECLARE max_capacity INT;
+
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+
+    -- 1. Lock the habitat and read its capacity and occupancy
+    SELECT capacity, current_occupancy INTO max_capacity, v_occupancy
+    FROM Habitat 
+    WHERE habitat_id = p_habitat_id
+    FOR UPDATE;
+
+    -- 2. Check if there is space
+    IF max_capacity IS NULL THEN
+        ROLLBACK;
+        SELECT 'Error: Habitat not found.' AS message;
+    ELSEIF v_occupancy < max_capacity THEN
+        -- trg_After_Animal_Insert bumps current_occupancy
+        INSERT INTO Animal (animal_id, name, species, gender, age, habitat_id)
+        VALUES (p_animal_id, p_name, p_species, p_gender, p_age, p_habitat_id);
+        COMMIT;
+        SELECT 'Success: Animal added.' AS message;
+    ELSE
+        ROLLBACK;
+        SELECT 'Error: Habitat is full. Cannot add animal.' AS message;
+    END IF;
+END$$
+DELIMITER ;
+
+-- 4. trg_Before_Habitat_Delete reads the counter instead of counting
+DROP TRIGGER IF EXISTS trg_Before_Habitat_Delete;
+DELIMITER $$
+CREATE TRIGGER trg_Before_Habitat_Delete
+BEFORE DELETE ON Habitat
+FOR EACH ROW
+BEGIN
+    IF OLD.current_occupancy > 0 THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Error: Cannot delete habitat. It still contains animals.';
+    END IF;
+END$$
+DELIMITER ;
+
+-- 5. Consistency check / repair
+-- Lists habitats whose counter disagrees with the Animal table; with
+-- p_repair = TRUE it also resets those counters to the real count.
+DELIMITER $$
+CREATE PROCEDURE sp_CheckHabitatOccupancy(
+    IN p_repair BOOLEAN
+)
+BEGIN
+    SELECT 
+        H.habitat_id,
+        H.name,
+        H.current_occupancy AS stored_occupancy,
+        COUNT(A.animal_id) AS actual_occupancy
+    FROM Habitat H
+    LEFT JOIN Animal A ON A.habitat_id = H.habitat_id
+    GROUP BY H.habitat_id, H.name, H.current_occupancy
+    HAVING stored_occupancy <> actual_occupancy;
+
+    IF p_repair THEN
+        UPDATE Habitat H
+        SET current_occupancy = (
+            SELECT COUNT(*) FROM Animal A WHERE A.habitat_id = H.habitat_id
+        );
+    END IF;
+END$$
+DELIMITER ;
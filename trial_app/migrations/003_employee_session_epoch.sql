@@ -0,0 +1,10 @@
+use zoodb;
+-- Session revocation epoch
+-- Run after create_usernames.sql. Login copies session_epoch into the
+-- session; bumping it (flask revoke-sessions) ends every session issued
+-- before for that employee.
+ALTER TABLE Employee
+ADD COLUMN session_epoch INT NOT NULL DEFAULT 0;
+
+-- Example: log out everyone
+-- UPDATE Employee SET session_epoch = session_epoch + 1;
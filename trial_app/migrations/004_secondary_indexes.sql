@@ -0,0 +1,49 @@
+use zoodb;
+-- Secondary indexes for reverse lookups and the keyset-paginated listings
+-- InnoDB already created an index for each foreign key column. Creating a
+-- named index that starts with the same column replaces that implicit index
+-- rather than adding a second one, so these don't double the write cost.
+
+-- Veterinary_Status is used by the app but was never part of
+-- zooDB_created_new.sql; create it here for fresh installs.
+CREATE TABLE IF NOT EXISTS Veterinary_Status (
+    record_id INT PRIMARY KEY,
+    animal_id INT,
+    vet_id INT,
+    checkup_date DATE,
+    status VARCHAR(50),
+    notes TEXT,
+    FOREIGN KEY (animal_id) REFERENCES Animal(animal_id),
+    FOREIGN KEY (vet_id) REFERENCES Employee(employee_id)
+);
+
+-- Visits only had PRIMARY KEY (visitor_id, animal_id): "who visited this
+-- animal?" had no usable index. (visitor_id, animal_id) lookups, including
+-- the NOT EXISTS anti-join in the unvisited report, keep using the PK.
+CREATE INDEX idx_visits_animal ON Visits (animal_id, visitor_id);
+
+-- Animals per habitat (occupancy repair, habitat moves)
+CREATE INDEX idx_animal_habitat ON Animal (habitat_id);
+
+-- An animal's checkups in date order
+CREATE INDEX idx_vet_animal_date ON Veterinary_Status (animal_id, checkup_date);
+
+-- Tickets per day (rollup rebuilds, per-day refreshes)
+CREATE INDEX idx_ticket_date ON Ticket (date);
+
+-- Sort keys of the paginated listings, so each page is an index range scan
+CREATE INDEX idx_animal_name ON Animal (name, animal_id);
+CREATE INDEX idx_visitor_name ON Visitor (l_name, f_name, visitor_id);
+CREATE INDEX idx_vet_date ON Veterinary_Status (checkup_date, record_id);
+
+-- Unvisited visitors report (anti-join version of the nested query)
+SELECT 
+    visitor_id, 
+    f_name, 
+    l_name
+FROM 
+    Visitor
+WHERE 
+    NOT EXISTS (SELECT 1 FROM Visits V WHERE V.visitor_id = Visitor.visitor_id)
+ORDER BY 
+    visitor_id;
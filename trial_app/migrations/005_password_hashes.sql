@@ -0,0 +1,33 @@
+use zoodb;
+-- Hashed passwords
+-- Run after create_usernames.sql. Login now looks an employee up by
+-- username alone and checks the Argon2 hash in the app, so username must be
+-- uniquely indexed. create_usernames.sql declared it UNIQUE, which already
+-- created that index; only add one where it is missing, so the column
+-- never carries two identical indexes.
+DROP PROCEDURE IF EXISTS sp_EnsureUsernameIndex;
+DELIMITER $$
+CREATE PROCEDURE sp_EnsureUsernameIndex()
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND TABLE_NAME = 'Employee'
+          AND COLUMN_NAME = 'username'
+          AND SEQ_IN_INDEX = 1
+          AND NON_UNIQUE = 0
+    ) THEN
+        CREATE UNIQUE INDEX uq_employee_username ON Employee (username);
+    END IF;
+END$$
+DELIMITER ;
+CALL sp_EnsureUsernameIndex();
+DROP PROCEDURE sp_EnsureUsernameIndex;
+
+-- password is already VARCHAR(255) from create_usernames.sql, room enough
+-- for the Argon2id hashes (about 100 characters).
+
+-- Then hash the plaintext sample passwords (they are also upgraded on each
+-- user's next login):
+-- flask --app app:create_app hash-passwords
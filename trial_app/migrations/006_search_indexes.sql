@@ -0,0 +1,40 @@
+use zoodb;
+-- Indexes for the filters on /animals, /visitors and /api/animals, /api/visitors
+-- Each filtered listing is still walked in its keyset order, so every index
+-- ends with the listing's sort columns: a filtered page is one index range
+-- scan that stops after LIMIT rows, with no filesort.
+
+-- ?species= (optionally with ?min_age= / ?max_age=, checked on the rows read)
+CREATE INDEX idx_animal_species_name ON Animal (species, name, animal_id);
+
+-- ?habitat_id= in name order. This replaces idx_animal_habitat from 004 as
+-- the foreign key's index; it is created first so the key is never without one.
+CREATE INDEX idx_animal_habitat_name ON Animal (habitat_id, name, animal_id);
+DROP INDEX idx_animal_habitat ON Animal;
+
+-- ?name= is a LIKE 'prefix%' on both names: idx_visitor_name (l_name, ...)
+-- serves the last name and this one the first name; MySQL merges the two
+-- range scans for the OR.
+CREATE INDEX idx_visitor_first_name ON Visitor (f_name, l_name, visitor_id);
+
+-- ?phone= prefix lookups
+CREATE INDEX idx_visitor_phone ON Visitor (phone_no);
+
+-- ?gender= and the age ranges on their own are not indexed: they match a
+-- large share of rows, so walking the name index and skipping the rows that
+-- don't match fills a page sooner than a range scan plus a sort would.
+
+-- Check with EXPLAIN that the filtered pages use the new indexes:
+EXPLAIN
+SELECT A.animal_id, A.name, A.species
+FROM Animal A
+JOIN Habitat H ON A.habitat_id = H.habitat_id
+WHERE A.species = 'Lion'
+ORDER BY A.name, A.animal_id
+LIMIT 51;
+
+EXPLAIN
+SELECT * FROM Visitor
+WHERE (l_name LIKE 'Sm%' OR f_name LIKE 'Sm%')
+ORDER BY l_name, f_name, visitor_id
+LIMIT 51;
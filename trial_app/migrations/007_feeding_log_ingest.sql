@@ -0,0 +1,10 @@
+use zoodb;
+-- Feeding events are now recorded through the batch ingestion endpoint
+-- (POST /api/ingest/feedings), which doesn't ask the keeper for a log_id.
+-- log_id leads the primary key, so InnoDB can number it itself.
+ALTER TABLE Feeding_Log
+MODIFY log_id INT NOT NULL AUTO_INCREMENT;
+
+-- An animal's feedings in time order. Starts with animal_id, so it also
+-- takes over as the index behind the animal_id foreign key.
+CREATE INDEX idx_feeding_animal_time ON Feeding_Log (animal_id, date_time);
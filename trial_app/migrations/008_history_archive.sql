@@ -0,0 +1,122 @@
+use zoodb;
+-- Hot/cold split for the history tables
+-- Ticket, Visits and Veterinary_Status only ever grow, but day-to-day use
+-- reads the last few months. `flask --app app:create_app archive-history`
+-- moves older rows into the *_Archive tables below, so the live tables, their
+-- indexes and the pages that read them stay the size of the retention window.
+-- The live tables keep their foreign keys; MySQL can't partition a table
+-- that has or is referenced by foreign keys, so only the archives are
+-- partitioned.
+
+-- 1. Archive tables
+-- Partitioned by year of the row's date. archive-history splits a partition
+-- off p_future for each year before it moves that year's rows in, and a
+-- query with a date range only reads the years it covers. The first
+-- partition created also holds every earlier year.
+-- Primary keys must include the partitioning column, so IDs are only
+-- unique together with their date here.
+CREATE TABLE Ticket_Archive (
+    ticket_id INT NOT NULL,
+    transaction_id VARCHAR(50),
+    price DECIMAL(10,2),
+    date DATE NOT NULL,
+    pay_mode VARCHAR(50),
+    visitor_id INT,
+    PRIMARY KEY (ticket_id, date),
+    KEY idx_ticket_archive_date (date, ticket_id),
+    KEY idx_ticket_archive_visitor (visitor_id)
+)
+PARTITION BY RANGE COLUMNS (date) (
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+
+CREATE TABLE Veterinary_Status_Archive (
+    record_id INT NOT NULL,
+    animal_id INT,
+    vet_id INT,
+    checkup_date DATE NOT NULL,
+    status VARCHAR(50),
+    notes TEXT,
+    PRIMARY KEY (record_id, checkup_date),
+    KEY idx_vet_archive_date (checkup_date, record_id),
+    KEY idx_vet_archive_animal_date (animal_id, checkup_date)
+)
+PARTITION BY RANGE COLUMNS (checkup_date) (
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+
+-- Visits has no date of its own: a visitor's visits are archived together
+-- with their ticket and carry its date (a returning visitor can have visits
+-- archived with more than one ticket). Not partitioned, because it is
+-- mostly probed by visitor_id (the unvisited-visitors anti-join), which
+-- would otherwise cost one index lookup per yearly partition.
+CREATE TABLE Visits_Archive (
+    visitor_id INT NOT NULL,
+    animal_id INT NOT NULL,
+    visit_date DATE NOT NULL,
+    PRIMARY KEY (visitor_id, animal_id, visit_date),
+    KEY idx_visits_archive_animal (animal_id, visitor_id)
+);
+
+-- 2. Archiving must not take tickets out of the daily rollup
+-- archive-history sets @zoo_archiving = 1 around its DELETEs from Ticket;
+-- the rollup keeps covering the full history, so the dashboard and
+-- fn_GetDailyRevenue never need to read Ticket_Archive.
+DROP TRIGGER IF EXISTS trg_After_Ticket_Delete;
+DELIMITER $$
+CREATE TRIGGER trg_After_Ticket_Delete
+AFTER DELETE ON Ticket
+FOR EACH ROW
+BEGIN
+    IF OLD.date IS NOT NULL AND @zoo_archiving IS NULL THEN
+        UPDATE Ticket_Daily_Rollup
+        SET tickets_sold = tickets_sold - 1,
+            priced_tickets = priced_tickets - IF(OLD.price IS NULL, 0, 1),
+            total_revenue = total_revenue - COALESCE(OLD.price, 0)
+        WHERE date = OLD.date;
+
+        -- Drop days that no longer have any tickets
+        DELETE FROM Ticket_Daily_Rollup
+        WHERE date = OLD.date AND tickets_sold <= 0;
+    END IF;
+END$$
+DELIMITER ;
+
+-- 3. Rebuilding the rollup reads both tables
+DROP PROCEDURE IF EXISTS sp_RebuildTicketRollup;
+DELIMITER $$
+CREATE PROCEDURE sp_RebuildTicketRollup()
+BEGIN
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+    DELETE FROM Ticket_Daily_Rollup;
+    INSERT INTO Ticket_Daily_Rollup (date, tickets_sold, priced_tickets, total_revenue)
+    SELECT
+        date,
+        COUNT(ticket_id),
+        COUNT(price),
+        COALESCE(SUM(price), 0)
+    FROM (
+        SELECT ticket_id, price, date FROM Ticket WHERE date IS NOT NULL
+        UNION ALL
+        SELECT ticket_id, price, date FROM Ticket_Archive
+    ) T
+    GROUP BY date;
+    COMMIT;
+
+    SELECT COUNT(*) AS days_rebuilt FROM Ticket_Daily_Rollup;
+END$$
+DELIMITER ;
+
+-- Check that a date-bounded archive query only reads the years it needs
+-- (the partitions column of the plan):
+EXPLAIN
+SELECT record_id, checkup_date, status
+FROM Veterinary_Status_Archive
+WHERE checkup_date >= '2023-01-01' AND checkup_date < '2024-01-01'
+ORDER BY checkup_date, record_id;
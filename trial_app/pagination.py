@@ -0,0 +1,161 @@
+"""
+Keyset (cursor-based) pagination helpers for the listing pages.
+
+Instead of OFFSET paging, each page remembers the sort key of its last row
+and the next page seeks past it, e.g. for (l_name, f_name, visitor_id):
+
+    l_name > %s OR (l_name = %s AND f_name > %s)
+      OR (l_name = %s AND f_name = %s AND visitor_id > %s)
+
+The cost of a page stays the same no matter how deep into the table the
+user goes. A row comparison like ``(l_name, f_name, visitor_id) > (...)``
+would be shorter, but comparing with NULL is never true, so it silently
+skips rows whose sort key is NULL (and a cursor ending on one stops the
+listing). The seek follows MySQL's ordering instead: NULLs sort first
+ascending and last descending.
+"""
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+
+class Keyset:
+    """
+    Describes the sort order of a listing.
+
+    columns    -- the SQL expressions used in ORDER BY (e.g. 'A.name')
+    fields     -- the matching keys in each result row (e.g. 'animal_name')
+    descending -- True to walk the listing newest/largest first
+    """
+
+    def __init__(self, columns, fields, descending=False):
+        if len(columns) != len(fields):
+            raise ValueError("Keyset columns and fields must line up.")
+        self.columns = tuple(columns)
+        self.fields = tuple(fields)
+        self.descending = descending
+
+    def order_by(self):
+        direction = " DESC" if self.descending else ""
+        return ", ".join(column + direction for column in self.columns)
+
+    def seek(self, after):
+        """Returns the WHERE fragment and params that skip past `after`."""
+        terms = []
+        params = []
+        for i, (column, value) in enumerate(zip(self.columns, after)):
+            beyond = self._beyond(column, value)
+            if beyond is not None:
+                equal_sql, equal_params = self._equal(self.columns[:i], after[:i])
+                terms.append(" AND ".join(equal_sql + [beyond]))
+                params.extend(equal_params)
+                if value is not None:
+                    params.append(value)
+        if not terms:
+            # `after` was the last possible key
+            return "1 = 0", []
+        return "(" + " OR ".join(f"({term})" for term in terms) + ")", params
+
+    def _beyond(self, column, value):
+        """SQL for `column` sorting strictly after `value`; None if nothing can."""
+        if self.descending:
+            return None if value is None else f"({column} < %s OR {column} IS NULL)"
+        return f"{column} IS NOT NULL" if value is None else f"{column} > %s"
+
+    @staticmethod
+    def _equal(columns, values):
+        sql = [f"{column} IS NULL" if value is None else f"{column} = %s"
+               for column, value in zip(columns, values)]
+        return sql, [value for value in values if value is not None]
+
+    def cursor_for(self, row):
+        """Builds the opaque 'after' token pointing at `row`."""
+        return encode_cursor([row[field] for field in self.fields])
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} in a page cursor.")
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, default=_json_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, keyset):
+    """
+    Turns an 'after' token back into key values.
+    Raises ValueError if the token is malformed or doesn't fit the keyset.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError("Invalid page cursor.") from e
+    if not isinstance(values, list) or len(values) != len(keyset.columns):
+        raise ValueError("Invalid page cursor.")
+    return values
+
+
+def build_query(select_sql, keyset, after=None, limit=None, conditions=(), params=()):
+    """
+    Appends WHERE / ORDER BY / LIMIT to a bare SELECT ... FROM ... statement.
+    `conditions` are extra parameterized WHERE fragments ANDed together.
+    """
+    clauses = list(conditions)
+    args = list(params)
+    if after is not None:
+        clause, values = keyset.seek(after)
+        clauses.append(clause)
+        args.extend(values)
+
+    sql = select_sql
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY " + keyset.order_by()
+    if limit is not None:
+        sql += " LIMIT %s"
+        args.append(limit)
+    return sql, args
+
+
+def fetch_page(cursor, select_sql, keyset, after=None, limit=50, conditions=(), params=()):
+    """
+    Runs one page of a keyset-paginated listing.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    # Ask for one extra row so we know whether a next page exists
+    sql, args = build_query(select_sql, keyset, after, limit + 1, conditions, params)
+    cursor.execute(sql, args)
+    rows = list(cursor.fetchall())
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = keyset.cursor_for(rows[-1])
+    return rows, next_cursor
+
+
+def stream_rows(cursor, select_sql, keyset, after=None, conditions=(), params=(), batch_size=500):
+    """
+    Yields every row from `after` to the end of the listing.
+
+    Meant to be used with an unbuffered (server-side) cursor so rows are
+    pulled from MySQL in batches as the response is written. The cursor is
+    closed once the generator is exhausted or discarded.
+    """
+    sql, args = build_query(select_sql, keyset, after, None, conditions, params)
+    try:
+        cursor.execute(sql, args)
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            for row in batch:
+                yield row
+    finally:
+        cursor.close()
@@ -0,0 +1,205 @@
+"""
+Session backends for the app, picked with the SESSION_BACKEND setting.
+
+'cookie'     -- Flask's signed cookie session (default). The whole session
+                (loggedin, id, username, role) fits in one small cookie, so
+                requests never touch disk or the database.
+'memory'     -- server-side sessions in a bounded in-process LRU store with
+                expiry sweeping. Only the signed session id goes in the
+                cookie. Sessions live in one worker process, so use it with a
+                single worker or sticky sessions.
+'filesystem' -- the old Flask-Session file store, kept for comparison.
+                Flask-Session is only in requirements-dev.txt.
+
+Login and logout call regenerate_session(), which empties the session and
+moves server-side ones to a fresh id, so an id planted before login (session
+fixation) or held after logout is worthless.
+"""
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, session
+from flask.sessions import SecureCookieSessionInterface, SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """A session dict that remembers its id and whether it was changed."""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+
+class MemorySessionStore:
+    """
+    Session id -> session data, bounded to `maxsize` entries (least recently
+    used are evicted first). Entries expire `ttl` seconds after their last
+    use; expired ones are swept at most every `sweep_interval` seconds.
+    """
+
+    def __init__(self, maxsize=10000, ttl=3600.0, sweep_interval=60.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._clock = clock
+        self._entries = OrderedDict()  # sid -> (expires_at, data)
+        self._lock = threading.Lock()
+        self._next_sweep = clock() + sweep_interval
+
+    def get(self, sid):
+        """Returns a copy of the session data and extends its expiry, or None."""
+        now = self._clock()
+        with self._lock:
+            self._maybe_sweep(now)
+            entry = self._entries.get(sid)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._entries[sid]
+                return None
+            self._entries[sid] = (now + self.ttl, entry[1])
+            self._entries.move_to_end(sid)
+            return dict(entry[1])
+
+    def set(self, sid, data):
+        now = self._clock()
+        with self._lock:
+            self._maybe_sweep(now)
+            self._entries[sid] = (now + self.ttl, dict(data))
+            self._entries.move_to_end(sid)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, sid):
+        with self._lock:
+            self._entries.pop(sid, None)
+
+    def sweep(self):
+        """Drops every expired session. Returns how many were removed."""
+        with self._lock:
+            return self._sweep(self._clock())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _maybe_sweep(self, now):
+        if now >= self._next_sweep:
+            self._sweep(now)
+
+    def _sweep(self, now):
+        expired = [sid for sid, (expires_at, _) in self._entries.items() if expires_at <= now]
+        for sid in expired:
+            del self._entries[sid]
+        self._next_sweep = now + self.sweep_interval
+        return len(expired)
+
+
+class MemorySessionInterface(SessionInterface):
+    """Keeps session data in a MemorySessionStore; the cookie holds a signed id."""
+
+    session_class = ServerSideSession
+
+    def __init__(self, store):
+        self.store = store
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt='zoo-session-id')
+
+    def open_session(self, app, request):
+        if not app.secret_key:
+            return None
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode('utf-8')
+            except BadSignature:
+                sid = None
+            if sid:
+                data = self.store.get(sid)
+                if data is not None:
+                    return self.session_class(data, sid=sid)
+        return self.session_class(sid=secrets.token_urlsafe(32), new=True)
+
+    def regenerate(self, session):
+        """Moves the session to a new id and drops the old one from the store."""
+        self.store.delete(session.sid)
+        session.sid = secrets.token_urlsafe(32)
+        session.new = True
+        session.modified = True
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            # Logged out (or never logged in): forget it on both sides
+            if session.modified:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if session.modified:
+            self.store.set(session.sid, session)
+        if session.new or self.should_set_cookie(app, session):
+            response.set_cookie(
+                name,
+                self._signer(app).sign(session.sid).decode('utf-8'),
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
+
+
+def regenerate_session(**data):
+    """
+    Replaces the current session with one holding just `data`, under a new id
+    where the backend keeps sessions server-side. The cookie backend needs
+    no new id: its cookie is the whole session and is re-issued anyway.
+    """
+    session.clear()
+    session.update(data)
+    regenerate = getattr(current_app.session_interface, 'regenerate', None)
+    if regenerate is not None:
+        regenerate(session)
+
+
+def init_app(app):
+    """Installs the session interface named by SESSION_BACKEND."""
+    app.config.setdefault('SESSION_BACKEND', 'cookie')
+    app.config.setdefault('SESSION_MEMORY_MAX_ENTRIES', 10000)
+    app.config.setdefault('SESSION_MEMORY_SWEEP_INTERVAL', 60.0)
+
+    backend = app.config['SESSION_BACKEND']
+    if backend == 'cookie':
+        app.session_interface = SecureCookieSessionInterface()
+    elif backend == 'memory':
+        store = MemorySessionStore(
+            maxsize=int(app.config['SESSION_MEMORY_MAX_ENTRIES']),
+            ttl=app.permanent_session_lifetime.total_seconds(),
+            sweep_interval=float(app.config['SESSION_MEMORY_SWEEP_INTERVAL']),
+        )
+        app.session_interface = MemorySessionInterface(store)
+    elif backend == 'filesystem':
+        try:
+            from flask_session import Session
+        except ImportError as exc:
+            raise RuntimeError("SESSION_BACKEND 'filesystem' needs Flask-Session; "
+                               "install requirements-dev.txt.") from exc
+
+        app.config['SESSION_TYPE'] = 'filesystem'
+        Session(app)
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND {backend!r}; use 'cookie', 'memory' or 'filesystem'.")
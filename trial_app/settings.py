@@ -0,0 +1,150 @@
+"""
+Settings read from the environment (and .env) by create_app() in app.py.
+
+Every extension also sets defaults of its own in init_app, so the values
+here only need to cover what deployments change.
+"""
+import os
+
+
+def from_env(config, root_path):
+    """Fills a Flask config from os.environ; root_path anchors the default data paths."""
+    # --- Database Configuration ---
+    # Reads from your .env file
+    config['MYSQL_HOST'] = os.environ.get('DB_HOST')
+    config['MYSQL_USER'] = os.environ.get('DB_USER')
+    config['MYSQL_PASSWORD'] = os.environ.get('DB_PASS')
+    config['MYSQL_DB'] = os.environ.get('DB_NAME')
+    config['MYSQL_CURSORCLASS'] = 'DictCursor'
+
+    # --- Connection Pool Configuration ---
+    # Each worker process keeps its own pool of MySQL connections
+    config['DB_POOL_MIN_SIZE'] = int(os.environ.get('DB_POOL_MIN_SIZE', 1))
+    config['DB_POOL_MAX_SIZE'] = int(os.environ.get('DB_POOL_MAX_SIZE', 10))
+    # Seconds an idle connection above the minimum is kept open
+    config['DB_POOL_IDLE_TIMEOUT'] = float(os.environ.get('DB_POOL_IDLE_TIMEOUT', 300))
+    # Seconds after which a connection is replaced, so it never hits MySQL's wait_timeout
+    config['DB_POOL_RECYCLE'] = float(os.environ.get('DB_POOL_RECYCLE', 3600))
+    config['DB_POOL_PRE_PING'] = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    # Seconds a request waits for a free connection before giving up
+    config['DB_POOL_WAIT_TIMEOUT'] = float(os.environ.get('DB_POOL_WAIT_TIMEOUT', 5))
+
+    # --- Read Replica Configuration ---
+    # Comma-separated "host[:port]" list; listing pages, exports and dashboard
+    # aggregates read from these, everything else uses the primary (DB_HOST)
+    config['MYSQL_REPLICAS'] = [
+        address.strip() for address in os.environ.get('DB_REPLICAS', '').split(',') if address.strip()
+    ]
+    # Seconds a session keeps reading from the primary after it writes
+    config['DB_REPLICA_PIN_SECONDS'] = float(os.environ.get('DB_REPLICA_PIN_SECONDS', 5))
+    # Seconds a replica that failed to connect is skipped
+    config['DB_REPLICA_RETRY_AFTER'] = float(os.environ.get('DB_REPLICA_RETRY_AFTER', 10))
+
+    # --- Listing Configuration ---
+    # Rows per page on /animals, /visitors and /veterinary
+    config['PAGE_SIZE'] = int(os.environ.get('PAGE_SIZE', 50))
+    config['MAX_PAGE_SIZE'] = int(os.environ.get('MAX_PAGE_SIZE', 500))
+    # Rows pulled from MySQL at a time when a listing is streamed (?stream=1)
+    config['STREAM_BATCH_SIZE'] = int(os.environ.get('STREAM_BATCH_SIZE', 500))
+
+    # --- Bulk Import Configuration ---
+    # Rows per INSERT transaction when bulk-loading animals, visitors or tickets
+    config['IMPORT_BATCH_SIZE'] = int(os.environ.get('IMPORT_BATCH_SIZE', 500))
+
+    # --- Archive Configuration ---
+    # `flask archive-history` moves tickets, visits and vet records older than
+    # this many days into the *_Archive tables (migration 008)
+    config['ARCHIVE_KEEP_DAYS'] = int(os.environ.get('ARCHIVE_KEEP_DAYS', 180))
+    # Rows moved per transaction
+    config['ARCHIVE_BATCH_SIZE'] = int(os.environ.get('ARCHIVE_BATCH_SIZE', 1000))
+
+    # --- Write Buffer Configuration ---
+    # Vet records and feedings posted to /api/ingest/<entity> are buffered and
+    # written in batches of WRITE_BUFFER_BATCH_SIZE rows, or after
+    # WRITE_BUFFER_FLUSH_INTERVAL seconds, whichever comes first
+    config['WRITE_BUFFER_BATCH_SIZE'] = int(os.environ.get('WRITE_BUFFER_BATCH_SIZE', 500))
+    config['WRITE_BUFFER_FLUSH_INTERVAL'] = float(os.environ.get('WRITE_BUFFER_FLUSH_INTERVAL', 1.0))
+    # Rows a worker process buffers before clients get 503 + Retry-After
+    config['WRITE_BUFFER_MAX_ROWS'] = int(os.environ.get('WRITE_BUFFER_MAX_ROWS', 20000))
+    # Seconds a batch waits for room in a full buffer before it is refused
+    config['WRITE_BUFFER_PUT_TIMEOUT'] = float(os.environ.get('WRITE_BUFFER_PUT_TIMEOUT', 2.0))
+    # Directory for the crash-recovery spill files; unset, a killed worker
+    # loses the rows it had not written yet
+    config['WRITE_BUFFER_SPILL_DIR'] = os.environ.get('WRITE_BUFFER_SPILL_DIR')
+
+    # --- Dashboard Cache Configuration ---
+    # How long (seconds) the manager dashboard aggregates are reused
+    config['DASHBOARD_CACHE_TTL'] = float(os.environ.get('DASHBOARD_CACHE_TTL', 60))
+    config['DASHBOARD_CACHE_SIZE'] = int(os.environ.get('DASHBOARD_CACHE_SIZE', 32))
+
+    # --- Reference Data Configuration ---
+    # Dropdown data for the entry forms (habitats, vets) and animal search results
+    config['REFERENCE_CACHE_TTL'] = float(os.environ.get('REFERENCE_CACHE_TTL', 300))
+    config['REFERENCE_CACHE_SIZE'] = int(os.environ.get('REFERENCE_CACHE_SIZE', 256))
+    # Most matches returned by the animal typeahead search
+    config['ANIMAL_SEARCH_LIMIT'] = int(os.environ.get('ANIMAL_SEARCH_LIMIT', 20))
+
+    # --- Response Cache Configuration ---
+    # Rendered listing pages are reused (and answered with 304s) until a write
+    # route changes one of their tables; other workers catch up within the TTL
+    config['RESPONSE_CACHE_TTL'] = float(os.environ.get('RESPONSE_CACHE_TTL', 60))
+    config['RESPONSE_CACHE_SIZE'] = int(os.environ.get('RESPONSE_CACHE_SIZE', 256))
+
+    # --- Template Configuration ---
+    # Templates are compiled once at startup and never re-checked on disk unless
+    # TEMPLATES_AUTO_RELOAD=true (flask run --debug turns it on as well)
+    config['TEMPLATES_AUTO_RELOAD'] = os.environ.get('TEMPLATES_AUTO_RELOAD', '').lower() == 'true' or None
+    # Compile every template when the app is created (false for one-off CLI runs)
+    config['TEMPLATE_PRECOMPILE'] = os.environ.get('TEMPLATE_PRECOMPILE', 'true').lower() == 'true'
+    # Optional directory for Jinja's compiled-template cache, for faster restarts
+    config['TEMPLATE_BYTECODE_CACHE_DIR'] = os.environ.get('TEMPLATE_BYTECODE_CACHE_DIR')
+    # Rendered table rows kept for reuse, keyed by the row's values
+    config['ROW_FRAGMENT_CACHE_SIZE'] = int(os.environ.get('ROW_FRAGMENT_CACHE_SIZE', 50000))
+
+    # --- Session Configuration ---
+    config['SECRET_KEY'] = os.environ.get('FLASK_SECRET_KEY')
+    # 'cookie' (signed cookie, default), 'memory' (in-process LRU) or 'filesystem'
+    config['SESSION_BACKEND'] = os.environ.get('SESSION_BACKEND', 'cookie')
+    config['SESSION_MEMORY_MAX_ENTRIES'] = int(os.environ.get('SESSION_MEMORY_MAX_ENTRIES', 10000))
+    config['SESSION_MEMORY_SWEEP_INTERVAL'] = float(os.environ.get('SESSION_MEMORY_SWEEP_INTERVAL', 60))
+
+    # --- Access Control Configuration ---
+    # Seconds a logged-in employee's role is trusted before Employee is re-read
+    config['AUTH_PRINCIPAL_TTL'] = float(os.environ.get('AUTH_PRINCIPAL_TTL', 30))
+    config['AUTH_PRINCIPAL_CACHE_SIZE'] = int(os.environ.get('AUTH_PRINCIPAL_CACHE_SIZE', 1024))
+
+    # --- Login Configuration ---
+    # Argon2id cost; raise it as far as the login p99 budget allows (benchmarks/bench_login.py)
+    config['PASSWORD_TIME_COST'] = int(os.environ.get('PASSWORD_TIME_COST', 3))
+    config['PASSWORD_MEMORY_COST'] = int(os.environ.get('PASSWORD_MEMORY_COST', 65536))  # KiB
+    config['PASSWORD_PARALLELISM'] = int(os.environ.get('PASSWORD_PARALLELISM', 4))
+    # Threads per worker that hash passwords, so logins can't exhaust the request threads
+    config['LOGIN_HASH_WORKERS'] = int(os.environ.get('LOGIN_HASH_WORKERS', 4))
+    # Failed logins allowed per username and per client IP in each window (seconds)
+    config['LOGIN_MAX_ATTEMPTS_PER_USER'] = int(os.environ.get('LOGIN_MAX_ATTEMPTS_PER_USER', 5))
+    config['LOGIN_MAX_ATTEMPTS_PER_IP'] = int(os.environ.get('LOGIN_MAX_ATTEMPTS_PER_IP', 50))
+    config['LOGIN_ATTEMPT_WINDOW'] = float(os.environ.get('LOGIN_ATTEMPT_WINDOW', 300))
+    config['LOGIN_LIMITER_SIZE'] = int(os.environ.get('LOGIN_LIMITER_SIZE', 10000))
+
+    # --- Metrics Configuration ---
+    # Queries slower than this (seconds) are logged to 'zoo.slow_queries'; 0 turns it off
+    config['SLOW_QUERY_THRESHOLD'] = float(os.environ.get('SLOW_QUERY_THRESHOLD', 0.5))
+    # Bearer token a Prometheus scraper sends to /metrics (Managers can always view it)
+    config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+
+    # --- Background Job Configuration ---
+    # Full-history reports run on a queue kept in a local SQLite file, shared by
+    # every worker process on the host
+    config['JOB_DB_PATH'] = os.environ.get('JOB_DB_PATH', os.path.join(root_path, 'job_data', 'jobs.sqlite3'))
+    config['JOB_RESULT_DIR'] = os.environ.get('JOB_RESULT_DIR', os.path.join(root_path, 'job_data', 'results'))
+    # Job threads per worker process
+    config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+    # Seconds a job may run before another worker assumes it died and retries it
+    config['JOB_LEASE'] = float(os.environ.get('JOB_LEASE', 600))
+    # Seconds finished jobs and their result files are kept
+    config['JOB_RESULT_TTL'] = float(os.environ.get('JOB_RESULT_TTL', 3600))
+
+    # --- ASGI Configuration ---
+    # Threads per worker process that run requests under asgi.py; more than
+    # DB_POOL_MAX_SIZE only adds requests waiting for a connection
+    config['ASGI_THREADS'] = int(os.environ.get('ASGI_THREADS', 10))
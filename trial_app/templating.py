@@ -0,0 +1,120 @@
+"""
+Template and static-asset setup for the listing pages.
+
+- Every template is compiled once at startup (precompile()), and
+  TEMPLATES_AUTO_RELOAD stays off outside debug mode, so requests never stat
+  or recompile template files. TEMPLATE_BYTECODE_CACHE_DIR optionally keeps
+  the compiled code on disk for faster restarts.
+- static_url('css/zoo.css') in a template gives /static/css/zoo.css?v=<hash
+  of the file>. Requests carrying the current hash are served with a
+  one-year immutable Cache-Control, so browsers fetch the stylesheet once
+  per deploy instead of receiving it inline with every page.
+- render_row('rows.html', 'animal_row', row) renders one table row with a
+  macro from templates/rows.html and caches the HTML keyed by the row's
+  values. Those values are the row's version: an edited row gets a new key
+  and its old fragment ages out of the LRU, so unchanged rows are never
+  rendered twice. Row macros must depend on nothing but the row.
+"""
+import hashlib
+import os
+
+from flask import get_template_attribute, request, url_for
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
+
+from caching import TTLCache
+
+
+class Templating:
+    """Registered as app.extensions['templating']."""
+
+    def __init__(self, app=None):
+        self._fingerprints = {}   # static filename -> (mtime, hash)
+        self._macros = {}         # (template, macro) -> callable
+        self.rows = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        config.setdefault('TEMPLATES_AUTO_RELOAD', None)
+        config.setdefault('TEMPLATE_PRECOMPILE', True)
+        config.setdefault('TEMPLATE_BYTECODE_CACHE_DIR', None)
+        config.setdefault('ROW_FRAGMENT_CACHE_SIZE', 50000)
+        config.setdefault('ROW_FRAGMENT_CACHE_TTL', 3600.0)
+        config.setdefault('STATIC_MAX_AGE', 365 * 24 * 3600)
+        self.app = app
+        if config['TEMPLATE_BYTECODE_CACHE_DIR']:
+            # Must be set before the first use of app.jinja_env creates it
+            os.makedirs(config['TEMPLATE_BYTECODE_CACHE_DIR'], exist_ok=True)
+            app.jinja_options = dict(app.jinja_options,
+                                     bytecode_cache=FileSystemBytecodeCache(config['TEMPLATE_BYTECODE_CACHE_DIR']))
+        if int(config['ROW_FRAGMENT_CACHE_SIZE']) > 0:
+            self.rows = TTLCache(maxsize=int(config['ROW_FRAGMENT_CACHE_SIZE']),
+                                 ttl=float(config['ROW_FRAGMENT_CACHE_TTL']))
+        app.add_template_global(self.static_url, 'static_url')
+        app.add_template_global(self.render_row, 'render_row')
+        app.after_request(self._cache_static)
+        if config['TEMPLATE_PRECOMPILE']:
+            self.precompile()
+        app.extensions['templating'] = self
+
+    @property
+    def reloading(self):
+        return self.app.jinja_env.auto_reload
+
+    def precompile(self):
+        """Compiles every template into the environment's cache. Returns how many."""
+        env = self.app.jinja_env
+        names = [name for name in env.list_templates() if name.endswith('.html')]
+        for name in names:
+            env.get_template(name)
+        return len(names)
+
+    # --- Static assets ---
+
+    def fingerprint(self, filename):
+        """A short hash of a static file's contents (re-read if it changed, when reloading)."""
+        path = os.path.join(self.app.static_folder, filename)
+        cached = self._fingerprints.get(filename)
+        if cached is not None and not self.reloading:
+            return cached[1]
+        mtime = os.path.getmtime(path)
+        if cached is None or cached[0] != mtime:
+            with open(path, 'rb') as f:
+                cached = (mtime, hashlib.blake2b(f.read(), digest_size=6).hexdigest())
+            self._fingerprints[filename] = cached
+        return cached[1]
+
+    def static_url(self, filename):
+        return url_for('static', filename=filename, v=self.fingerprint(filename))
+
+    def _cache_static(self, response):
+        if request.endpoint == 'static' and response.status_code == 200:
+            version = request.args.get('v')
+            if version and version == self.fingerprint(request.view_args['filename']):
+                response.cache_control.public = True
+                response.cache_control.max_age = int(self.app.config['STATIC_MAX_AGE'])
+                response.cache_control.immutable = True
+        return response
+
+    # --- Row fragments ---
+
+    def _macro(self, template_name, macro_name):
+        if self.reloading:
+            return get_template_attribute(template_name, macro_name)
+        macro = self._macros.get((template_name, macro_name))
+        if macro is None:
+            macro = self._macros[(template_name, macro_name)] = get_template_attribute(template_name, macro_name)
+        return macro
+
+    def render_row(self, template_name, macro_name, row):
+        """The HTML of macro_name(row), from the fragment cache when the row is unchanged."""
+        if self.rows is None:
+            return Markup(self._macro(template_name, macro_name)(row))
+        key = (template_name, macro_name, tuple(row.items()))
+        html = self.rows.get(key)
+        if html is None:
+            html = Markup(self._macro(template_name, macro_name)(row))
+            self.rows.set(key, html)
+        return html
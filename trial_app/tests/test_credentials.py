@@ -0,0 +1,121 @@
+"""Login rate limiting, with an in-memory Employee table standing in for MySQL."""
+import asyncio
+
+import pytest
+from flask import Flask
+
+from credentials import AttemptLimiter, Credentials
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeDB:
+    """The two AsyncDB calls authenticate() makes, over a dict of accounts."""
+
+    def __init__(self, accounts):
+        self.accounts = accounts
+
+    async def fetch_one(self, sql, params):
+        await asyncio.sleep(0)
+        return self.accounts.get(params[0])
+
+    async def execute(self, sql, params):
+        new_hash, employee_id = params
+        for account in self.accounts.values():
+            if account['employee_id'] == employee_id:
+                account['password'] = new_hash
+
+
+@pytest.fixture
+def credentials():
+    app = Flask(__name__)
+    app.config.update(PASSWORD_TIME_COST=1, PASSWORD_MEMORY_COST=8, PASSWORD_PARALLELISM=1,
+                      LOGIN_MAX_ATTEMPTS_PER_USER=3, LOGIN_MAX_ATTEMPTS_PER_IP=5)
+    credentials = Credentials(app, mysql=None)
+    credentials.db = FakeDB({'ballen': {'employee_id': 2, 'username': 'ballen', 'role': 'Zookeeper',
+                                        'session_epoch': 0, 'password': 'zoo123'}})
+    return credentials
+
+
+async def attempt(credentials, password, ip='10.0.0.1'):
+    wait = credentials.reserve_attempt('ballen', ip)
+    if wait:
+        return wait
+    return await credentials.authenticate('ballen', password, ip)
+
+
+def test_limiter_blocks_after_limit_until_window_ends():
+    clock = Clock()
+    limiter = AttemptLimiter(2, window=60, clock=clock)
+    assert limiter.reserve('a') == 0
+    assert limiter.reserve('a') == 0
+    clock.now = 20
+    assert limiter.reserve('a') == 40
+    clock.now = 60
+    assert limiter.reserve('a') == 0
+
+
+def test_limiter_release_gives_the_attempt_back():
+    limiter = AttemptLimiter(1)
+    assert limiter.reserve('a') == 0
+    limiter.release('a')
+    assert limiter.reserve('a') == 0
+    assert limiter.reserve('a') > 0
+
+
+def test_limiter_drops_least_recently_seen_keys():
+    limiter = AttemptLimiter(1, maxsize=2)
+    for key in 'abc':
+        limiter.reserve(key)
+    assert len(limiter) == 2
+    assert limiter.reserve('a') == 0
+
+
+def test_concurrent_guesses_cannot_exceed_the_limit(credentials):
+    async def guesses():
+        return await asyncio.gather(*(attempt(credentials, f'guess{n}') for n in range(10)))
+
+    results = asyncio.run(guesses())
+    # Every guess was counted before any hash finished, so only the first 3 were checked
+    assert results.count(None) == 3
+    assert all(isinstance(result, int) and result > 0 for result in results if result is not None)
+
+
+def test_success_resets_the_username_count(credentials):
+    asyncio.run(attempt(credentials, 'wrong'))
+    asyncio.run(attempt(credentials, 'wrong'))
+    assert asyncio.run(attempt(credentials, 'zoo123'))['username'] == 'ballen'
+    for _ in range(3):
+        assert asyncio.run(attempt(credentials, 'wrong')) is None
+    assert asyncio.run(attempt(credentials, 'zoo123')) > 0
+
+
+def test_plaintext_password_is_rehashed_on_login(credentials):
+    asyncio.run(attempt(credentials, 'zoo123'))
+    assert credentials.is_hashed(credentials.db.accounts['ballen']['password'])
+    assert asyncio.run(attempt(credentials, 'zoo123'))['employee_id'] == 2
+
+
+def test_blocked_ip_does_not_count_against_the_username(credentials):
+    for n in range(5):
+        credentials.reserve_attempt(f'user{n}', '10.0.0.9')
+    assert credentials.reserve_attempt('ballen', '10.0.0.9') > 0
+    assert asyncio.run(attempt(credentials, 'zoo123', ip='10.0.0.1'))['username'] == 'ballen'
+    assert len(credentials.user_attempts) == 5
+
+
+def test_lookup_errors_are_not_counted(credentials):
+    async def fail(sql, params):
+        raise ConnectionError("database went away")
+
+    credentials.db.fetch_one = fail
+    for _ in range(5):
+        with pytest.raises(ConnectionError):
+            asyncio.run(attempt(credentials, 'zoo123'))
+    assert credentials.reserve_attempt('ballen', '10.0.0.1') == 0
@@ -0,0 +1,160 @@
+"""ConnectionPool against sqlite3 connections standing in for MySQL."""
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from db_pool import ConnectionPool, PoolTimeout
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def sqlite_connect():
+    return sqlite3.connect(':memory:', check_same_thread=False)
+
+
+def make_pool(**kwargs):
+    kwargs.setdefault('min_size', 0)
+    kwargs.setdefault('max_size', 2)
+    return ConnectionPool(sqlite_connect, **kwargs)
+
+
+def test_returned_connection_is_reused():
+    pool = make_pool()
+    conn = pool.acquire()
+    conn.execute("SELECT 1")
+    pool.release(conn)
+
+    assert pool.acquire() is conn
+    stats = pool.stats()
+    assert stats['checkouts'] == 2
+    assert stats['created'] == 1
+    assert stats['size'] == 1
+    assert stats['in_use'] == 1
+
+
+def test_min_size_connections_open_up_front():
+    pool = make_pool(min_size=2, max_size=3)
+    assert pool.stats()['created'] == 2
+    assert pool.stats()['idle'] == 2
+
+
+def test_release_rolls_back_open_transaction():
+    pool = make_pool(max_size=1)
+    conn = pool.acquire()
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.commit()
+    conn.execute("INSERT INTO t VALUES (1)")
+    pool.release(conn)
+
+    conn = pool.acquire()
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+
+def test_exhausted_pool_times_out():
+    pool = make_pool(max_size=1)
+    pool.acquire()
+
+    started = time.monotonic()
+    with pytest.raises(PoolTimeout):
+        pool.acquire(timeout=0.05)
+    assert time.monotonic() - started >= 0.05
+    assert pool.stats()['timeouts'] == 1
+    assert pool.stats()['size'] == 1
+
+
+def test_waiter_gets_released_connection():
+    pool = make_pool(max_size=1)
+    conn = pool.acquire()
+    threading.Timer(0.05, pool.release, [conn]).start()
+
+    assert pool.acquire(timeout=2) is conn
+    assert pool.stats()['wait_time_max'] > 0
+
+
+def test_discarded_connection_frees_its_slot():
+    pool = make_pool(max_size=1)
+    conn = pool.acquire()
+    pool.release(conn, discard=True)
+
+    assert pool.stats()['size'] == 0
+    assert pool.stats()['discarded'] == 1
+    assert pool.acquire(timeout=0.05) is not conn
+
+
+def test_broken_connection_is_replaced_on_checkout():
+    pool = make_pool(max_size=1)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.close()  # the server went away while it sat idle
+
+    replacement = pool.acquire()
+    assert replacement is not conn
+    replacement.execute("SELECT 1")
+    assert pool.stats()['discarded'] == 1
+    assert pool.stats()['size'] == 1
+
+
+def test_connection_that_cannot_roll_back_is_dropped():
+    pool = make_pool(max_size=1)
+    conn = pool.acquire()
+    conn.close()
+    pool.release(conn)
+
+    assert pool.stats()['size'] == 0
+    assert pool.stats()['discarded'] == 1
+
+
+def test_failed_connect_releases_reserved_slot():
+    def connect():
+        raise sqlite3.OperationalError("can't connect")
+
+    pool = ConnectionPool(connect, min_size=0, max_size=1)
+    with pytest.raises(sqlite3.OperationalError):
+        pool.acquire()
+    assert pool.stats()['size'] == 0
+
+
+def test_idle_connections_above_min_size_expire():
+    clock = Clock()
+    pool = make_pool(min_size=1, max_size=2, idle_timeout=10, clock=clock)
+    first, second = pool.acquire(), pool.acquire()
+    pool.release(first)
+    pool.release(second)
+
+    clock.now = 11
+    pool.release(pool.acquire())
+    assert pool.stats()['size'] == 1
+
+
+def test_old_connections_are_recycled():
+    clock = Clock()
+    pool = make_pool(max_size=1, recycle=60, clock=clock)
+    conn = pool.acquire()
+    clock.now = 61
+    pool.release(conn)
+
+    assert pool.stats()['size'] == 0
+    assert pool.acquire() is not conn
+
+
+def test_closed_pool_refuses_checkouts():
+    pool = make_pool()
+    pool.release(pool.acquire())
+    pool.close()
+
+    assert pool.stats()['size'] == 0
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+
+
+def test_invalid_sizes_are_rejected():
+    with pytest.raises(ValueError):
+        make_pool(min_size=3, max_size=2)
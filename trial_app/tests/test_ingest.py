@@ -0,0 +1,38 @@
+"""POST /api/ingest/<entity>: what is checked before rows reach the write buffer."""
+import pytest
+
+pytest.importorskip('MySQLdb')
+
+import app as app_module  # noqa: E402
+
+VET = {'employee_id': 2, 'username': 'vet', 'role': 'Veterinarian', 'session_epoch': 0}
+
+
+@pytest.fixture(scope='module')
+def app():
+    return app_module.create_app({'TESTING': True, 'SECRET_KEY': 'test', 'SESSION_BACKEND': 'cookie'})
+
+
+@pytest.fixture
+def client(app):
+    app_module.auth.principals.set(VET['employee_id'], VET)
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess.update(loggedin=True, id=VET['employee_id'], username=VET['username'], role=VET['role'],
+                    epoch=VET['session_epoch'])
+    return client
+
+
+def test_vet_record_with_malformed_date_is_refused(client):
+    response = client.post('/api/ingest/vet_records', json=[
+        {'record_id': 1, 'animal_id': 3, 'vet_id': 2, 'checkup_date': '2024-05-01', 'status': 'Healthy'},
+        {'record_id': 2, 'animal_id': 3, 'vet_id': 2, 'checkup_date': '05/01/2024', 'status': 'Healthy'},
+    ])
+
+    assert response.status_code == 400
+    assert response.json['rejected'] == [{'index': 1, 'error': 'Error: Date must be in YYYY-MM-DD format.'}]
+    assert app_module.write_buffer.stats()['buffered'] == 0
+
+
+def test_rows_must_be_a_list_of_objects(client):
+    assert client.post('/api/ingest/vet_records', json={'rows': 'nope'}).status_code == 400
@@ -0,0 +1,145 @@
+"""Metrics against an in-process Registry, with sqlite3 standing in for MySQL."""
+import logging
+import sqlite3
+
+import pytest
+from flask import Flask, render_template_string
+
+from db_pool import MySQLPool
+from metrics import Counter, Gauge, Histogram, Metrics, Registry, _Metric, normalize_sql
+
+
+class SqliteDriver:
+    cursors = None
+
+    @staticmethod
+    def connect(**kwargs):
+        conn = sqlite3.connect(':memory:', check_same_thread=False)
+        conn.execute("CREATE TABLE Animal (animal_id INTEGER, name TEXT)")
+        conn.executemany("INSERT INTO Animal VALUES (?, ?)", [(1, 'Leo'), (2, 'Zara')])
+        conn.commit()
+        return conn
+
+
+@pytest.fixture
+def registry():
+    return Registry()
+
+
+@pytest.fixture
+def app(registry):
+    app = Flask(__name__)
+    app.config.update(MYSQL_USER='zoo', MYSQL_PASSWORD='', MYSQL_DB='zoodb', SLOW_QUERY_THRESHOLD=0)
+    mysql = MySQLPool(app, driver=SqliteDriver)
+    metrics = Metrics(app, mysql, registry=registry)
+
+    @app.route('/animals/<int:animal_id>')
+    def animal(animal_id):
+        cursor = mysql.connection.cursor()
+        cursor.execute("SELECT name FROM Animal WHERE animal_id = ?", [animal_id])
+        name = cursor.fetchone()[0]
+        return render_template_string("<p>{{ name }}</p>", name=name)
+
+    @app.route('/metrics')
+    def expose():
+        return metrics.expose()
+
+    return app
+
+
+def test_counter_and_gauge_exposition(registry):
+    counter = registry.counter('zoo_things_total', 'Things.', ['kind'])
+    counter.inc(kind='a')
+    counter.inc(2, kind='a')
+    gauge = registry.gauge('zoo_level', 'Level.')
+    gauge.set(7)
+
+    assert counter.value(kind='a') == 3
+    assert registry.expose().splitlines() == [
+        '# HELP zoo_level Level.',
+        '# TYPE zoo_level gauge',
+        'zoo_level 7',
+        '# HELP zoo_things_total Things.',
+        '# TYPE zoo_things_total counter',
+        'zoo_things_total{kind="a"} 3',
+    ]
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    histogram = registry.histogram('zoo_seconds', 'Seconds.', buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5):
+        histogram.observe(value)
+
+    assert histogram.count() == 4
+    assert histogram.total() == pytest.approx(6.05)
+    lines = registry.expose().splitlines()
+    assert 'zoo_seconds_bucket{le="0.1"} 1' in lines
+    assert 'zoo_seconds_bucket{le="1.0"} 3' in lines
+    assert 'zoo_seconds_bucket{le="+Inf"} 4' in lines
+    assert 'zoo_seconds_count 4' in lines
+
+
+def test_label_values_are_escaped(registry):
+    registry.counter('zoo_total', 'T.', ['statement']).inc(statement='say "hi"\n')
+    assert 'zoo_total{statement="say \\"hi\\"\\n"} 1' in registry.expose()
+
+
+def test_registry_returns_existing_metric(registry):
+    assert registry.counter('zoo_total', 'T.') is registry.counter('zoo_total', 'T.')
+
+
+def test_metric_types_implement_exposition():
+    with pytest.raises(NotImplementedError):
+        list(_Metric('zoo_base', 'Base.')._expose_one((), 0))
+    for cls in (Counter, Gauge, Histogram):
+        assert cls._expose_one is not _Metric._expose_one
+
+
+def test_normalize_sql_groups_statements_by_shape():
+    assert normalize_sql("SELECT * FROM Visitor WHERE visitor_id IN (1, 2, 3)") == \
+        "SELECT * FROM Visitor WHERE visitor_id IN (...)"
+    assert normalize_sql("SELECT *\n  FROM Animal WHERE name = 'Leo' AND age > %s") == \
+        "SELECT * FROM Animal WHERE name = ? AND age > ?"
+    assert normalize_sql("INSERT INTO T VALUES (%s, %s), (%s, %s)") == "INSERT INTO T VALUES (...)"
+
+
+def test_request_query_template_and_pool_metrics(app, registry):
+    client = app.test_client()
+    for animal_id in (1, 2):
+        assert client.get(f'/animals/{animal_id}').status_code == 200
+
+    requests = registry.get('zoo_http_request_duration_seconds')
+    assert requests.count(endpoint='animal', method='GET', status=200) == 2
+
+    statement = "SELECT name FROM Animal WHERE animal_id = ?"
+    assert registry.get('zoo_sql_query_duration_seconds').count(statement=statement) == 2
+    assert registry.get('zoo_template_render_seconds').count(template='unknown') == 2
+    assert registry.get('zoo_db_pool_wait_seconds').count() == 2
+    assert registry.get('zoo_db_pool_checkouts_total').value() == 2
+
+
+def test_metrics_endpoint_exposes_pool_state(app):
+    client = app.test_client()
+    client.get('/animals/1')
+    body = client.get('/metrics').text
+
+    assert '# TYPE zoo_db_pool_checkouts_total counter' in body
+    assert 'zoo_db_pool_connections{state="in_use"} 0' in body
+    assert 'zoo_db_pool_connections{state="idle"} 1' in body
+
+
+def test_slow_queries_are_logged(app, registry, caplog):
+    app.config['SLOW_QUERY_THRESHOLD'] = 1e-9
+    with caplog.at_level(logging.WARNING, logger='zoo.slow_queries'):
+        app.test_client().get('/animals/1')
+
+    statement = "SELECT name FROM Animal WHERE animal_id = ?"
+    assert registry.get('zoo_sql_slow_queries_total').value(statement=statement) == 1
+    assert any(statement in record.getMessage() and '[animal]' in record.getMessage()
+               for record in caplog.records)
+
+
+def test_slow_query_log_can_be_turned_off(app, registry):
+    app.test_client().get('/animals/1')
+    assert registry.get('zoo_sql_slow_queries_total').value(
+        statement="SELECT name FROM Animal WHERE animal_id = ?") == 0
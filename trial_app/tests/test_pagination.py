@@ -0,0 +1,106 @@
+"""Keyset pagination against sqlite3, which orders NULLs the way MySQL does."""
+import sqlite3
+
+import pytest
+
+from pagination import Keyset, decode_cursor, encode_cursor, fetch_page, stream_rows
+
+VISITORS = [
+    (1, 'Ann', 'Baker'),
+    (2, None, 'Baker'),
+    (3, 'Cy', None),
+    (4, None, None),
+    (5, 'Ann', 'Baker'),
+    (6, 'Bo', 'Adams'),
+    (7, 'Di', None),
+]
+CHECKUPS = [(1, '2024-03-01'), (2, None), (3, '2024-01-15'), (4, '2024-03-01'), (5, None)]
+
+VISITOR_KEYSET = Keyset(['l_name', 'f_name', 'visitor_id'], ['l_name', 'f_name', 'visitor_id'])
+CHECKUP_KEYSET = Keyset(['checkup_date', 'record_id'], ['checkup_date', 'record_id'], descending=True)
+
+
+class Cursor:
+    """A sqlite3 cursor that takes MySQLdb's %s placeholders and returns dict rows."""
+
+    def __init__(self, conn):
+        self._cursor = conn.cursor()
+
+    def execute(self, sql, args=()):
+        self._cursor.execute(sql.replace('%s', '?'), args)
+
+    def _row(self, row):
+        return {d[0]: value for d, value in zip(self._cursor.description, row)}
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def fetchmany(self, size):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def close(self):
+        self._cursor.close()
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE Visitor (visitor_id INTEGER PRIMARY KEY, f_name TEXT, l_name TEXT)")
+    conn.executemany("INSERT INTO Visitor VALUES (?, ?, ?)", VISITORS)
+    conn.execute("CREATE TABLE Veterinary_Status (record_id INTEGER PRIMARY KEY, checkup_date TEXT)")
+    conn.executemany("INSERT INTO Veterinary_Status VALUES (?, ?)", CHECKUPS)
+    return conn
+
+
+def walk(conn, select_sql, keyset, key, limit):
+    """Every page of a listing, followed cursor to cursor."""
+    seen, after = [], None
+    while True:
+        rows, next_cursor = fetch_page(Cursor(conn), select_sql, keyset, after, limit)
+        seen.extend(row[key] for row in rows)
+        if next_cursor is None:
+            return seen
+        after = decode_cursor(next_cursor, keyset)
+
+
+def ordered(conn, select_sql, keyset):
+    cursor = conn.execute(f"{select_sql} ORDER BY {keyset.order_by()}")
+    return [row[0] for row in cursor]
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3])
+def test_pages_cover_rows_with_null_sort_keys(conn, limit):
+    select_sql = "SELECT visitor_id, f_name, l_name FROM Visitor"
+    expected = ordered(conn, select_sql, VISITOR_KEYSET)
+    assert walk(conn, select_sql, VISITOR_KEYSET, 'visitor_id', limit) == expected
+    assert sorted(expected) == [1, 2, 3, 4, 5, 6, 7]
+
+
+@pytest.mark.parametrize('limit', [1, 2])
+def test_descending_pages_put_null_dates_last(conn, limit):
+    select_sql = "SELECT record_id, checkup_date FROM Veterinary_Status"
+    assert walk(conn, select_sql, CHECKUP_KEYSET, 'record_id', limit) == [4, 1, 3, 5, 2]
+
+
+def test_seek_past_the_last_null_key_is_empty(conn):
+    rows = list(stream_rows(Cursor(conn), "SELECT record_id FROM Veterinary_Status", CHECKUP_KEYSET,
+                            after=[None, 2]))
+    assert rows == []
+
+
+def test_seek_clause_for_non_null_keys():
+    clause, params = Keyset(['A.name', 'A.animal_id'], ['name', 'animal_id']).seek(['Leo', 4])
+    assert clause == "((A.name > %s) OR (A.name = %s AND A.animal_id > %s))"
+    assert params == ['Leo', 'Leo', 4]
+
+
+def test_cursor_round_trips_nulls():
+    token = encode_cursor([None, 'Ann', 3])
+    assert decode_cursor(token, VISITOR_KEYSET) == [None, 'Ann', 3]
+
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        decode_cursor('not a cursor', VISITOR_KEYSET)
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor([1]), VISITOR_KEYSET)
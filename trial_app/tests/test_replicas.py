@@ -0,0 +1,126 @@
+"""Read/write routing in MySQLPool, with a fake DB-API driver standing in for MySQL."""
+import types
+
+import pytest
+from flask import Flask
+
+from db_pool import MySQLPool
+
+
+class FakeConnection:
+    def __init__(self, host):
+        self.host = host
+
+    def ping(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeDriver:
+    """Connects to any host except those in `down`."""
+
+    cursors = types.SimpleNamespace()
+
+    def __init__(self):
+        self.down = set()
+
+    def connect(self, host, **kwargs):
+        if host in self.down:
+            raise ConnectionError(f"{host} is down")
+        return FakeConnection(host)
+
+
+@pytest.fixture
+def driver():
+    return FakeDriver()
+
+
+@pytest.fixture
+def mysql(driver):
+    return MySQLPool(driver=driver)
+
+
+@pytest.fixture
+def app(mysql):
+    app = Flask(__name__)
+    app.config.update(
+        SECRET_KEY='test',
+        MYSQL_HOST='primary',
+        MYSQL_USER='zoo',
+        MYSQL_PASSWORD='',
+        MYSQL_DB='zoodb',
+        MYSQL_REPLICAS=['replica1', 'replica2'],
+    )
+    mysql.init_app(app)
+
+    @app.route('/read')
+    def read():
+        return mysql.read_connection.host
+
+    @app.route('/write', methods=['POST'])
+    def write():
+        return mysql.connection.host
+
+    return app
+
+
+def test_reads_go_to_the_replicas_in_turn(app):
+    client = app.test_client()
+    assert [client.get('/read').text for _ in range(4)] == ['replica1', 'replica2', 'replica1', 'replica2']
+
+
+def test_writes_go_to_the_primary(app):
+    assert app.test_client().post('/write').text == 'primary'
+
+
+def test_reads_after_a_write_stay_on_the_primary(app):
+    client = app.test_client()
+    client.post('/write')
+    assert client.get('/read').text == 'primary'
+    # Other sessions still read from the replicas
+    assert app.test_client().get('/read').text.startswith('replica')
+
+
+def test_pin_expires(app):
+    app.config['DB_REPLICA_PIN_SECONDS'] = 0
+    client = app.test_client()
+    client.post('/write')
+    assert client.get('/read').text.startswith('replica')
+
+
+def test_failed_replica_is_skipped(app, mysql, driver):
+    driver.down.add('replica1')
+    client = app.test_client()
+    assert [client.get('/read').text for _ in range(3)] == ['replica2'] * 3
+
+    replicas = mysql.replicas
+    assert replicas.failures == 1
+    assert replicas.healthy() == ['replica2']
+
+
+def test_reads_fall_back_to_the_primary_when_every_replica_fails(app, mysql, driver):
+    driver.down.update({'replica1', 'replica2'})
+    assert app.test_client().get('/read').text == 'primary'
+    assert mysql.replicas.healthy() == []
+
+
+def test_down_replica_is_retried_after_retry_after(app, driver):
+    app.config['DB_REPLICA_RETRY_AFTER'] = 0
+    driver.down.add('replica1')
+    client = app.test_client()
+    client.get('/read')
+    driver.down.clear()
+    assert {client.get('/read').text for _ in range(2)} == {'replica1', 'replica2'}
+
+
+def test_connections_go_back_to_their_pools(app, mysql):
+    client = app.test_client()
+    client.get('/read')
+    client.post('/write')
+    assert mysql.pool.stats()['in_use'] == 0
+    assert all(stats['in_use'] == 0 for stats in mysql.replicas.stats())
@@ -0,0 +1,102 @@
+"""Session ids across login and logout, for each session backend."""
+import pytest
+from flask import Flask, session
+
+import session_backends
+from auth import EmployeeAuth
+
+ACCOUNT = {'employee_id': 2, 'username': 'ballen', 'role': 'Zookeeper', 'session_epoch': 0}
+
+
+def make_app(backend, tmp_path):
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY='test', SESSION_BACKEND=backend, SESSION_FILE_DIR=str(tmp_path))
+    session_backends.init_app(app)
+    auth = EmployeeAuth(app, mysql=None)
+
+    @app.route('/visit')
+    def visit():
+        session['cart'] = 'planted'
+        return 'ok'
+
+    @app.route('/login', methods=['POST'])
+    def login():
+        auth.login(ACCOUNT)
+        return 'ok'
+
+    @app.route('/logout')
+    def logout():
+        auth.logout()
+        return 'ok'
+
+    @app.route('/whoami')
+    def whoami():
+        return session.get('username', '-')
+
+    return app
+
+
+@pytest.fixture
+def memory_app(tmp_path):
+    return make_app('memory', tmp_path)
+
+
+def session_cookie(client, app):
+    cookie = client.get_cookie(app.config['SESSION_COOKIE_NAME'])
+    return cookie.value if cookie else None
+
+
+def test_login_issues_a_new_session_id(memory_app):
+    client = memory_app.test_client()
+    client.get('/visit')
+    planted = session_cookie(client, memory_app)
+
+    client.post('/login')
+    assert session_cookie(client, memory_app) != planted
+    assert client.get('/whoami').text == 'ballen'
+
+    # The id from before login no longer leads anywhere
+    attacker = memory_app.test_client()
+    attacker.set_cookie(memory_app.config['SESSION_COOKIE_NAME'], planted)
+    assert attacker.get('/whoami').text == '-'
+
+
+def test_login_drops_data_from_before(memory_app):
+    client = memory_app.test_client()
+    client.get('/visit')
+    client.post('/login')
+    with client.session_transaction() as sess:
+        assert 'cart' not in sess
+        assert sess['id'] == 2
+
+
+def test_logout_forgets_the_session(memory_app):
+    client = memory_app.test_client()
+    client.post('/login')
+    old = session_cookie(client, memory_app)
+    store = memory_app.session_interface.store
+
+    client.get('/logout')
+    assert session_cookie(client, memory_app) is None
+    assert len(store) == 0
+
+    replay = memory_app.test_client()
+    replay.set_cookie(memory_app.config['SESSION_COOKIE_NAME'], old)
+    assert replay.get('/whoami').text == '-'
+
+
+@pytest.mark.parametrize('backend', ['cookie', 'filesystem'])
+def test_login_and_logout_on_other_backends(backend, tmp_path):
+    if backend == 'filesystem':
+        pytest.importorskip('flask_session')
+    app = make_app(backend, tmp_path)
+    client = app.test_client()
+    client.get('/visit')
+    planted = session_cookie(client, app)
+
+    client.post('/login')
+    assert session_cookie(client, app) != planted
+    assert client.get('/whoami').text == 'ballen'
+
+    client.get('/logout')
+    assert client.get('/whoami').text == '-'
@@ -0,0 +1,33 @@
+"""The shared validation rules, as the forms, bulk import and ingest use them."""
+import pytest
+
+from validation import validate_feeding, validate_ticket, validate_vet_record
+
+VET_RECORD = {'record_id': '7', 'animal_id': '3', 'vet_id': '2', 'checkup_date': '2024-05-01',
+              'status': 'Healthy'}
+
+
+def test_valid_vet_record():
+    assert validate_vet_record(VET_RECORD) is None
+
+
+@pytest.mark.parametrize('checkup_date', ['2024-13-01', '01/05/2024', 'yesterday'])
+def test_vet_record_with_malformed_date_is_rejected(checkup_date):
+    error = validate_vet_record(dict(VET_RECORD, checkup_date=checkup_date))
+    assert error == 'Error: Date must be in YYYY-MM-DD format.'
+
+
+def test_vet_record_needs_every_field():
+    assert validate_vet_record(dict(VET_RECORD, status='')).startswith('Error: Record ID, Animal')
+
+
+def test_ticket_with_malformed_date_is_rejected():
+    ticket = {'ticket_id': '1', 'price': '12.50', 'date': '2024-02-30', 'visitor_id': '4'}
+    assert validate_ticket(ticket) == 'Error: Date must be in YYYY-MM-DD format.'
+
+
+def test_feeding_date_time_is_optional_but_parsed():
+    feeding = {'animal_id': '1', 'diet_id': '2', 'qty': '3'}
+    assert validate_feeding(feeding) is None
+    assert validate_feeding(dict(feeding, date_time='2024-05-01 08:30')) is None
+    assert validate_feeding(dict(feeding, date_time='8:30 tomorrow')).startswith('Error: Date/time')
@@ -0,0 +1,106 @@
+"""
+Server-side validation rules shared by the form handlers and bulk import.
+
+Each validator takes a mapping of field name -> submitted string (a form,
+a CSV row, a JSON object) and returns an error message, or None if the
+data is valid.
+"""
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+
+def validate_animal(data):
+    """Rules for add_animal."""
+    try:
+        if not data.get('name') or not data.get('species') or not data.get('animal_id') \
+                or not data.get('age') or not data.get('habitat_id'):
+            return 'Error: All fields are required.'
+        elif int(data.get('age')) < 0:
+            return 'Error: Age must be a positive number.'
+        elif int(data.get('animal_id')) <= 0:
+            return 'Error: Animal ID must be a positive number.'
+    except (ValueError, TypeError):
+        return 'Error: Age and Animal ID must be valid numbers.'
+    try:
+        int(data.get('habitat_id'))
+    except (ValueError, TypeError):
+        return 'Error: Habitat must be a valid habitat ID.'
+    return None
+
+
+def validate_visitor(data, require_id=False):
+    """Rules for edit_visitor; new visitors (require_id) also need a visitor_id."""
+    try:
+        if require_id and not data.get('visitor_id'):
+            return 'Error: Visitor ID is required.'
+        if not data.get('f_name') or not data.get('l_name') or not data.get('phone_no'):
+            return 'Error: Name and Phone Number fields cannot be empty.'
+        elif int(data.get('age')) <= 0:
+            return 'Error: Age must be a positive number.'
+    except (ValueError, TypeError):
+        return 'Error: Age must be a valid number.'
+    if require_id:
+        try:
+            if int(data.get('visitor_id')) <= 0:
+                return 'Error: Visitor ID must be a positive number.'
+        except (ValueError, TypeError):
+            return 'Error: Visitor ID must be a valid number.'
+    return None
+
+
+def validate_vet_record(data):
+    """Rules for add_vet_record."""
+    try:
+        if not all([data.get('record_id'), data.get('animal_id'), data.get('vet_id'),
+                    data.get('checkup_date'), data.get('status')]):
+            return 'Error: Record ID, Animal, Vet, Date, and Status are required fields.'
+        elif int(data.get('record_id')) <= 0:
+            return 'Error: Record ID must be a positive number.'
+    except (ValueError, TypeError):
+        return 'Error: Record ID must be a valid number.'
+    try:
+        date.fromisoformat(data.get('checkup_date'))
+    except (ValueError, TypeError):
+        return 'Error: Date must be in YYYY-MM-DD format.'
+    return None
+
+
+def validate_ticket(data):
+    """Rules for tickets (bulk import only; there is no ticket form)."""
+    if not all([data.get('ticket_id'), data.get('price'), data.get('date'), data.get('visitor_id')]):
+        return 'Error: Ticket ID, Price, Date, and Visitor are required fields.'
+    try:
+        if int(data.get('ticket_id')) <= 0:
+            return 'Error: Ticket ID must be a positive number.'
+        int(data.get('visitor_id'))
+    except (ValueError, TypeError):
+        return 'Error: Ticket ID and Visitor ID must be valid numbers.'
+    try:
+        if Decimal(data.get('price')) < 0:
+            return 'Error: Price cannot be negative.'
+    except (InvalidOperation, TypeError):
+        return 'Error: Price must be a valid amount.'
+    try:
+        date.fromisoformat(data.get('date'))
+    except (ValueError, TypeError):
+        return 'Error: Date must be in YYYY-MM-DD format.'
+    return None
+
+
+def validate_feeding(data):
+    """Rules for feeding events (batch ingestion and bulk import)."""
+    if not all([data.get('animal_id'), data.get('diet_id'), data.get('qty')]):
+        return 'Error: Animal, Diet and Quantity are required fields.'
+    try:
+        int(data.get('animal_id'))
+        int(data.get('diet_id'))
+        if int(data.get('qty')) <= 0:
+            return 'Error: Quantity must be a positive number.'
+    except (ValueError, TypeError):
+        return 'Error: Animal ID, Diet ID and Quantity must be valid numbers.'
+    if data.get('date_time'):
+        try:
+            datetime.fromisoformat(data.get('date_time'))
+        except (ValueError, TypeError):
+            return 'Error: Date/time must be in YYYY-MM-DD HH:MM[:SS] format.'
+    return None
@@ -0,0 +1,296 @@
+"""
+Write-behind buffer for high-volume inserts (vet checkups, feeding events).
+
+POST /api/ingest/<entity> validates a JSON batch in the request and hands
+the valid rows to this buffer, which answers 202 straight away. A flusher
+thread per worker process writes them out with bulk_import.insert_batch:
+one multi-row INSERT transaction per WRITE_BUFFER_BATCH_SIZE rows, or
+sooner once the oldest buffered row has waited WRITE_BUFFER_FLUSH_INTERVAL
+seconds.
+
+Backpressure: at most WRITE_BUFFER_MAX_ROWS rows are buffered. A batch
+that doesn't fit waits up to WRITE_BUFFER_PUT_TIMEOUT seconds for the
+flusher to make room and is then refused with BufferFull (the endpoint
+answers 503 with Retry-After), so a slow database slows the clients down
+instead of growing the queue without bound.
+
+Durability:
+- Rows that fail validation are rejected in the response; everything
+  accepted is either written or logged to 'zoo.write_behind' (rows the
+  database refuses, such as duplicate record IDs, are counted and logged,
+  as the client already has its 202).
+- On a normal shutdown (atexit, including gunicorn's graceful stop) the
+  buffer is flushed, waiting up to WRITE_BUFFER_SHUTDOWN_TIMEOUT seconds.
+- Without a spill file, rows still buffered when a process is killed are
+  lost. With WRITE_BUFFER_SPILL_DIR set, each accepted batch is appended
+  (and fsynced) to the process's spill file before the 202, and a
+  checkpoint is appended after every flush. Each process start gets a
+  spill file of its own name and holds an flock on it while it runs; when
+  the app is set up (and in each forked worker, on its first request) the
+  unflushed rows of spill files nobody holds any more are replayed. This
+  is at-least-once: rows committed just before a crash, without their
+  checkpoint, are written again (vet records are then rejected as
+  duplicates; feedings are recorded twice).
+"""
+import atexit
+import fcntl
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import deque
+
+import bulk_import
+
+log = logging.getLogger('zoo.write_behind')
+
+
+class BufferFull(Exception):
+    """The buffer had no room for a batch within WRITE_BUFFER_PUT_TIMEOUT."""
+
+
+class WriteBehindBuffer:
+    """Registered as app.extensions['write_behind']."""
+
+    def __init__(self, app=None, mysql=None, on_flushed=None, clock=time.monotonic):
+        self._clock = clock
+        self._rows = deque()          # (seq, entity name, values, queued at)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+        self._seq = 0
+        self._spill = None
+        self._spill_path = None
+        self.on_flushed = on_flushed  # on_flushed(entity name, inserted values)
+        self.flushed = 0
+        self.rejected = 0
+        self.batches = 0
+        if app is not None:
+            self.init_app(app, mysql)
+
+    def init_app(self, app, mysql):
+        config = app.config
+        config.setdefault('WRITE_BUFFER_MAX_ROWS', 20000)
+        config.setdefault('WRITE_BUFFER_BATCH_SIZE', 500)
+        config.setdefault('WRITE_BUFFER_FLUSH_INTERVAL', 1.0)
+        config.setdefault('WRITE_BUFFER_PUT_TIMEOUT', 2.0)
+        config.setdefault('WRITE_BUFFER_SHUTDOWN_TIMEOUT', 30.0)
+        config.setdefault('WRITE_BUFFER_SPILL_DIR', None)
+        self.app = app
+        self.mysql = mysql
+        self.max_rows = int(config['WRITE_BUFFER_MAX_ROWS'])
+        self.batch_size = int(config['WRITE_BUFFER_BATCH_SIZE'])
+        self.flush_interval = float(config['WRITE_BUFFER_FLUSH_INTERVAL'])
+        self.spill_dir = config['WRITE_BUFFER_SPILL_DIR']
+        atexit.register(self.close)
+        app.extensions['write_behind'] = self
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            # Replay what dead workers left behind now, not on the first submit;
+            # a worker forked later does it on its first request
+            app.before_request(self._ensure_started)
+            self._ensure_started()
+
+    # --- Producers ---
+
+    def submit(self, entity_name, values_list):
+        """
+        Buffers already validated rows for `entity_name`. Blocks while the
+        buffer is full; raises BufferFull if it stays full past the timeout,
+        and ValueError if the batch could never fit.
+        """
+        if len(values_list) > self.max_rows:
+            raise ValueError(f"A batch can hold at most {self.max_rows} rows.")
+        self._ensure_started()
+        deadline = self._clock() + float(self.app.config['WRITE_BUFFER_PUT_TIMEOUT'])
+        with self._cond:
+            while len(self._rows) + len(values_list) > self.max_rows:
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    raise BufferFull("The write buffer is full; retry shortly.")
+                self._cond.notify_all()  # make sure the flusher is draining
+                self._cond.wait(remaining)
+            now = self._clock()
+            entries = []
+            for values in values_list:
+                self._seq += 1
+                entries.append((self._seq, entity_name, values, now))
+            if self._spill is not None:
+                self._spill_write([{'seq': seq, 'entity': name, 'values': values}
+                                   for seq, name, values, _ in entries])
+            self._rows.extend(entries)
+            if len(self._rows) >= self.batch_size:
+                self._cond.notify_all()
+        return len(self._rows)
+
+    def stats(self):
+        with self._cond:
+            depth = len(self._rows)
+            oldest = self._clock() - self._rows[0][3] if self._rows else 0.0
+        return {
+            'buffered': depth,
+            'max_rows': self.max_rows,
+            'oldest_seconds': round(oldest, 3),
+            'flushed': self.flushed,
+            'rejected': self.rejected,
+            'batches': self.batches,
+            'spill_file': self._spill_path if self._spill is not None else None,
+        }
+
+    # --- Flusher ---
+
+    def _ensure_started(self):
+        """Starts this process's flusher (again after a fork) and replays dead processes' spills."""
+        if self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._pid == os.getpid():
+                return
+            self._rows.clear()
+            self._stopping = False
+            if self.spill_dir:
+                if self._spill is not None:
+                    self._spill.close()  # the parent's file, inherited across a fork
+                self._spill = self._open_spill()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._thread.start()
+        if self.spill_dir:
+            self._recover()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopping and not self._due():
+                    timeout = self.flush_interval
+                    if self._rows:
+                        timeout = max(0.0, self._rows[0][3] + self.flush_interval - self._clock())
+                    self._cond.wait(timeout)
+                if self._stopping and not self._rows:
+                    return
+                batch = [self._rows.popleft() for _ in range(min(self.batch_size, len(self._rows)))]
+            try:
+                self._write(batch)
+            except Exception:
+                # The database is unreachable: put the rows back in front and
+                # back off; producers keep feeling the backpressure meanwhile
+                log.exception("Flushing %d buffered row(s) failed; retrying", len(batch))
+                with self._cond:
+                    self._rows.extendleft(reversed(batch))
+                    if self._stopping:
+                        return
+                    self._cond.wait(self.flush_interval * 5)
+                continue
+            with self._cond:
+                self._cond.notify_all()  # room for blocked producers
+
+    def _due(self):
+        return bool(self._rows) and (len(self._rows) >= self.batch_size
+                                     or self._clock() - self._rows[0][3] >= self.flush_interval)
+
+    def _write(self, batch):
+        """Inserts one batch, a transaction per entity. Raises if the database is unreachable."""
+        groups = {}
+        for seq, name, values, _ in batch:
+            groups.setdefault(name, []).append((seq, values))
+        with self.app.app_context():
+            for name, rows in groups.items():
+                report = bulk_import.ImportReport(name)
+                inserted = bulk_import.insert_batch(self.mysql.connection, bulk_import.ENTITIES[name],
+                                                    rows, report)
+                for seq, message in report.errors:
+                    log.warning("Dropped buffered %s row #%d: %s", name, seq, message)
+                self.flushed += report.inserted
+                self.rejected += report.failed
+                if self.on_flushed and inserted:
+                    self.on_flushed(name, inserted)
+        self.batches += 1
+        if self._spill is not None:
+            with self._cond:
+                self._spill_write([{'flushed': batch[-1][0]}])
+                if not self._rows:
+                    # Everything so far is in MySQL: start the file over
+                    self._spill.truncate(0)
+                    self._spill.seek(0)
+
+    def close(self):
+        """Flushes what is buffered and stops the flusher (called at exit)."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(float(self.app.config['WRITE_BUFFER_SHUTDOWN_TIMEOUT']))
+        if self._rows:
+            log.error("%d buffered row(s) were not written before shutdown%s", len(self._rows),
+                      '; they stay in the spill file' if self._spill is not None else ' and are lost')
+        if self._spill is not None:
+            self._spill.close()
+            if not self._rows:
+                os.remove(self._spill_path)
+            self._spill = None
+        self._thread = None
+        self._pid = None
+
+    # --- Spill file ---
+
+    def _spill_write(self, records):
+        self._spill.write(''.join(json.dumps(record) + '\n' for record in records))
+        self._spill.flush()
+        os.fsync(self._spill.fileno())
+
+    def _open_spill(self):
+        """
+        Creates this process's spill file and keeps an exclusive flock on it
+        until the process exits, which is how _recover tells a live process's
+        file from a dead one's. The name is unique per process start, so a
+        process that reuses a dead one's pid never appends to (or truncates)
+        that process's file.
+        """
+        self._spill_path = os.path.join(self.spill_dir, f'spill-{os.getpid()}-{secrets.token_hex(4)}.ndjson')
+        spill = open(self._spill_path + '.new', 'a', encoding='utf-8')
+        fcntl.flock(spill.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        os.rename(self._spill_path + '.new', self._spill_path)  # _recover only sees it once it is locked
+        return spill
+
+    def _recover(self):
+        """Re-buffers the unflushed rows from spill files whose process has exited."""
+        for filename in sorted(os.listdir(self.spill_dir)):
+            if not (filename.startswith('spill-') and filename.endswith('.ndjson')):
+                continue
+            path = os.path.join(self.spill_dir, filename)
+            if path == self._spill_path:
+                continue
+            try:
+                f = open(path, encoding='utf-8')
+            except FileNotFoundError:
+                continue  # another process replayed it meanwhile
+            with f:
+                try:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # its process is running, or another process is replaying it
+                if os.fstat(f.fileno()).st_nlink == 0:
+                    continue  # replayed and removed by another process since we opened it
+                records, flushed = [], 0
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # torn last line from the crash
+                    if 'flushed' in record:
+                        flushed = record['flushed']  # rows are flushed in order
+                    else:
+                        records.append(record)
+                by_entity = {}
+                for record in records:
+                    if record['seq'] > flushed:
+                        by_entity.setdefault(record['entity'], []).append(tuple(record['values']))
+                for name, values_list in by_entity.items():
+                    log.warning("Replaying %d %s row(s) from %s", len(values_list), name, filename)
+                    for start in range(0, len(values_list), self.max_rows):
+                        self.submit(name, values_list[start:start + self.max_rows])
+                os.remove(path)